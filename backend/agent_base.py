@@ -1,8 +1,11 @@
 # backend/agent_base.py
 
-from abc import ABC, abstractmethod
+from abc import ABC
 from typing import Dict, Any
 
+from services.executors import ASYNC_IO, node_executors
+from services.profiling import span
+
 
 class BaseNode(ABC):
     """
@@ -12,6 +15,20 @@ class BaseNode(ABC):
     - Tools
     """
 
+    # Streaming (see services/streams.py):
+    # - produces_stream: publishes partial output while running
+    #   (enabled per node with `stream: true` in its config)
+    # - accepts_stream: can start on a streaming parent's chunks
+    produces_stream = False
+    accepts_stream = False
+
+    # Executor tier (see services/executors.py):
+    # - "async": `execute` runs on the event loop and only awaits;
+    #   blocking helpers go through `node_executors.run_blocking`
+    # - "blocking_io" / "cpu": implement `execute_sync` instead; it
+    #   runs in the I/O thread pool / the CPU worker pool
+    execution_class = ASYNC_IO
+
     def __init__(
         self,
         name: str,
@@ -24,7 +41,6 @@ class BaseNode(ABC):
         self.type = node_type
         self.icon = icon
 
-    @abstractmethod
     async def execute(
         self,
         node_input: Dict[str, Any],
@@ -33,6 +49,10 @@ class BaseNode(ABC):
         """
         Execute the node.
 
+        Async nodes override this. Blocking and CPU-bound nodes keep
+        it and implement `execute_sync`, which is dispatched to the
+        executor tier of their `execution_class`.
+
         Args:
             node_input: Configuration/input for this node
             parent_outputs: Outputs from parent nodes
@@ -40,7 +60,17 @@ class BaseNode(ABC):
         Returns:
             A dictionary containing execution result
         """
-        raise NotImplementedError
+        if self.execution_class == ASYNC_IO:
+            raise NotImplementedError(f"{type(self).__name__} must implement execute()")
+        return await node_executors.run_sync(self, node_input, parent_outputs)
+
+    def execute_sync(
+        self,
+        node_input: Dict[str, Any],
+        parent_outputs: Dict[str, Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Synchronous body of "blocking_io" and "cpu" nodes."""
+        raise NotImplementedError(f"{type(self).__name__} must implement execute_sync()")
 
     def get_parent_data(
         self,
@@ -52,13 +82,27 @@ class BaseNode(ABC):
         This is useful for agents/tools that consume
         text from previous steps.
         """
-        parts = []
+        with span("get_parent_data"):
+            parts = []
 
-        for output in parent_outputs.values():
-            if output.get("success"):
-                parts.append(str(output.get("data", "")))
+            for output in parent_outputs.values():
+                if output.get("success"):
+                    parts.append(str(output.get("data", "")))
 
-        return "\n\n".join(parts)
+            return "\n\n".join(parts)
+
+    def get_parent_stream(
+        self,
+        parent_outputs: Dict[str, Dict[str, Any]],
+    ):
+        """
+        StreamChannel of a parent that is still producing its output,
+        or None. Only set for nodes with `accepts_stream`.
+        """
+        for output in parent_outputs.values():
+            if output.get("stream") is not None:
+                return output["stream"]
+        return None
 
 
 class BaseAgent(BaseNode):
@@ -66,6 +110,10 @@ class BaseAgent(BaseNode):
     Base class for all LLM-based agents.
     """
 
+    # Agents only await the LLM service (the Gemini backend uses the
+    # async client); prompt building is cheap
+    execution_class = ASYNC_IO
+
     def __init__(
         self,
         name: str,
@@ -81,6 +129,22 @@ class BaseAgent(BaseNode):
         )
         self.llm = llm
 
+    def llm_options(self, node_input: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Per-node model and generation options from the node config:
+        `model` (name, tier or "auto"), `max_output_tokens`, `temperature`.
+        """
+        options: Dict[str, Any] = {}
+
+        if node_input.get("model"):
+            options["model"] = node_input["model"]
+        if node_input.get("max_output_tokens") not in (None, ""):
+            options["max_output_tokens"] = int(node_input["max_output_tokens"])
+        if node_input.get("temperature") not in (None, ""):
+            options["temperature"] = float(node_input["temperature"])
+
+        return options
+
 
 class BaseTool(BaseNode):
     """
@@ -1,14 +1,101 @@
 # backend/agents/guardrail.py
 
+import asyncio
+import json
+import re
+
 from agent_base import BaseAgent
+from services.llm_backends import ERROR_PREFIX
+from services.streams import StreamError
+
+
+# Long inputs are checked as overlapping chunks of this many characters
+CHUNK_CHARS = 8000
+CHUNK_OVERLAP = 400
+# Chunk checks in flight at once
+CHUNK_CONCURRENCY = 4
+
+# Separator between stream chunks in the checked output
+STREAM_JOIN = "\n\n"
+
+_FALSE_VERDICT = re.compile(r'"allowed"\s*:\s*false')
+
+
+def parse_verdict(response):
+    """
+    Structured verdict from a validator response:
+    {"allowed": bool, "reason": str | None}. Accepts code fences and
+    text around the JSON object; when no object parses, an explicit
+    `"allowed": false` still blocks.
+
+    Fails closed: only `true` (or the string "true", any case) allows.
+    A failed LLM call or a response without a verdict is not allowed,
+    and carries an `error` instead of a reason.
+    """
+    if response.startswith(ERROR_PREFIX):
+        return {"allowed": False, "reason": None, "error": response}
+
+    decoder = json.JSONDecoder()
+    for match in re.finditer(r"\{", response):
+        try:
+            verdict, _ = decoder.raw_decode(response, match.start())
+        except ValueError:
+            continue
+        if isinstance(verdict, dict) and "allowed" in verdict:
+            allowed = verdict["allowed"]
+            if isinstance(allowed, str):
+                allowed = allowed.strip().lower() == "true"
+            return {"allowed": allowed is True, "reason": verdict.get("reason")}
+
+    if _FALSE_VERDICT.search(response):
+        return {"allowed": False, "reason": None}
+    return {"allowed": False, "reason": None, "error": "Unparseable validator response"}
+
+
+def split_overlapping(text, size=CHUNK_CHARS, overlap=CHUNK_OVERLAP):
+    """
+    (start, end) character spans covering `text`, consecutive spans
+    sharing `overlap` characters so content cut at a boundary is seen
+    whole by one of them. Ends snap back to whitespace when possible.
+    """
+    overlap = min(overlap, size // 2)
+    spans, start = [], 0
+
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            cut = text.rfind("\n", start + size // 2, end)
+            if cut == -1:
+                cut = text.rfind(" ", start + size // 2, end)
+            if cut != -1:
+                end = cut + 1
+        spans.append((start, end))
+        if end == len(text):
+            break
+        start = end - overlap
+
+    return spans
 
 
 class GuardrailAgent(BaseAgent):
     """
     Guardrail agent that validates text against safety and policy constraints.
     If content is unsafe, it blocks further workflow execution.
+
+    Behind a streaming parent each chunk is checked as it arrives and
+    the first unsafe chunk blocks the workflow.
+
+    Inputs longer than `chunk_chars` (default 8000) are split into
+    overlapping chunks checked concurrently (`concurrency` at a time);
+    the first unsafe verdict cancels the remaining checks. A blocked
+    output reports the `reason` and the `location` of the chunk.
+
+    A check that yields no verdict (LLM error, unparseable response)
+    blocks as well and reports an `error`.
     """
 
+    accepts_stream = True
+
     def __init__(self, llm):
         super().__init__(
             name="Guardrail",
@@ -25,6 +112,10 @@ class GuardrailAgent(BaseAgent):
         1. Explicit node input
         2. Aggregated parent node outputs
         """
+        stream = None if node_input.get("input") else self.get_parent_stream(parent_outputs)
+        if stream is not None:
+            return await self._check_stream(stream, node_input)
+
         text = node_input.get("input") or self.get_parent_data(parent_outputs)
 
         if not text:
@@ -33,13 +124,51 @@ class GuardrailAgent(BaseAgent):
                 "error": "No input provided for safety validation",
             }
 
+        chunk_chars = int(node_input.get("chunk_chars") or CHUNK_CHARS)
+        if len(text) > chunk_chars:
+            return await self._check_chunked(text, chunk_chars, node_input)
+
+        response = await self._check(text, node_input)
+
+        # ================================
+        # Blocking logic
+        # ================================
+        verdict = parse_verdict(response)
+        if not verdict["allowed"]:
+            return self._blocked(response, verdict, {"start": 0, "end": len(text)})
+
+        return {
+            "success": True,
+            "data": text,
+            "node_type": "guardrail",
+        }
+
+    @staticmethod
+    def _blocked(response, verdict, location):
+        blocked = {
+            "success": False,
+            "blocked": True,
+            "data": response,
+            "reason": verdict["reason"],
+            "location": location,
+            "node_type": "guardrail",
+        }
+        if verdict.get("error"):
+            # No verdict at all: blocked because the check failed
+            blocked["error"] = f"Safety check failed: {verdict['error']}"
+        return blocked
+
+    async def _check(self, text, node_input):
+        """Raw JSON verdict of the validator for one text."""
         # ================================
         # Guardrail Prompt
         # ================================
+        # The text goes in as shared `context` (a stable prefix placed
+        # before these instructions by the LLM service).
         prompt = f"""
 You are a strict content safety validator.
 
-Analyze the input below and determine whether it violates
+Analyze the input document above and determine whether it violates
 any safety, ethical, or policy constraints such as:
 - harmful or illegal activity
 - hate, harassment, or violence
@@ -53,28 +182,135 @@ If the content is unsafe:
 
 If the content is safe:
 {{ "allowed": true }}
-
-Input:
-\"\"\"
-{text}
-\"\"\"
 """
 
-        response = self.llm(prompt)
+        return await self.llm(
+            prompt, context=text, task="guardrail", **self.llm_options(node_input)
+        )
 
-        # ================================
-        # Blocking logic
-        # ================================
-        if '"allowed": false' in response:
+    async def _check_chunked(self, text, chunk_chars, node_input):
+        """
+        Check overlapping chunks with bounded fan-out; the first unsafe
+        verdict cancels every other check.
+        """
+        overlap = int(node_input.get("chunk_overlap", CHUNK_OVERLAP))
+        concurrency = max(1, int(node_input.get("concurrency", CHUNK_CONCURRENCY)))
+        spans = split_overlapping(text, chunk_chars, overlap)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def check(start, end):
+            async with semaphore:
+                return await self._check(text[start:end], node_input)
+
+        checks = {
+            asyncio.ensure_future(check(start, end)): index
+            for index, (start, end) in enumerate(spans)
+        }
+        pending = set(checks)
+
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                # Lowest chunk first when several finish together
+                for task in sorted(done, key=checks.get):
+                    response = task.result()
+                    verdict = parse_verdict(response)
+                    if verdict["allowed"]:
+                        continue
+
+                    index = checks[task]
+                    start, end = spans[index]
+                    return self._blocked(response, verdict, {
+                        "chunk": index,
+                        "chunks": len(spans),
+                        "start": start,
+                        "end": end,
+                        "line": text.count("\n", 0, start) + 1,
+                    })
+        finally:
+            for task in pending:
+                task.cancel()
+
+        return {
+            "success": True,
+            "data": text,
+            "chunks": len(spans),
+            "node_type": "guardrail",
+        }
+
+    async def _check_stream(self, stream, node_input):
+        """
+        Check chunks concurrently as they are published; stop at the
+        first unsafe verdict. Published chunks longer than `chunk_chars`
+        are split like a long input; locations are offsets into the
+        returned (joined) text.
+        """
+        chunk_chars = int(node_input.get("chunk_chars") or CHUNK_CHARS)
+        overlap = int(node_input.get("chunk_overlap", CHUNK_OVERLAP))
+        semaphore = asyncio.Semaphore(max(1, int(node_input.get("concurrency", CHUNK_CONCURRENCY))))
+
+        async def check(text):
+            async with semaphore:
+                return await self._check(text, node_input)
+
+        chunks = []
+        checks = {}
+        pending = set()
+        offset = 0
+        blocked = None
+
+        def collect(done):
+            nonlocal blocked
+            for task in sorted(done, key=lambda task: checks[task]["start"]):
+                verdict = parse_verdict(task.result())
+                if blocked is None and not verdict["allowed"]:
+                    blocked = self._blocked(task.result(), verdict, checks[task])
+
+        try:
+            async for chunk in stream:
+                if chunks:
+                    offset += len(STREAM_JOIN)
+                chunks.append(chunk)
+                if chunk.strip():
+                    for start, end in split_overlapping(chunk, chunk_chars, overlap):
+                        task = asyncio.ensure_future(check(chunk[start:end]))
+                        pending.add(task)
+                        checks[task] = {
+                            "chunk": len(chunks) - 1,
+                            "start": offset + start,
+                            "end": offset + end,
+                        }
+                offset += len(chunk)
+
+                done = {task for task in pending if task.done()}
+                pending -= done
+                collect(done)
+                if blocked is not None:
+                    break
+
+            while pending and blocked is None:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                collect(done)
+
+        except StreamError as e:
             return {
                 "success": False,
-                "blocked": True,
-                "data": response,
+                "error": f"Input stream failed: {str(e)}",
                 "node_type": "guardrail",
             }
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if blocked is not None:
+            return blocked
 
         return {
             "success": True,
-            "data": text,
+            "data": STREAM_JOIN.join(chunks),
             "node_type": "guardrail",
         }
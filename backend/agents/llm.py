@@ -33,31 +33,29 @@ class LLMAgent(BaseAgent):
         # ================================
         # Prompt Construction
         # ================================
+        # Parent data is sent separately as `context`: the LLM service
+        # places it in a stable prefix shared with other agents that
+        # read the same document, so it can be cached.
         if execution_mode == "system_prompt":
             # Treat prompt as system-level instruction
             final_prompt = f"""System Instruction:
-{user_prompt}
-
-User Input:
-{parent_data}"""
+{user_prompt}"""
+            if parent_data:
+                final_prompt += "\n\nApply the instruction to the input document above."
 
         elif execution_mode == "combined":
             # Combine prompt and input data
-            final_prompt = f"""{user_prompt}
-
-Input Data:
-{parent_data}"""
+            final_prompt = user_prompt
+            if parent_data:
+                final_prompt += "\n\nUse the input document above as the input data."
 
         else:
             # Default: user prompt mode
-            if user_prompt:
-                final_prompt = f"""{user_prompt}
-
-{parent_data}"""
-            else:
-                final_prompt = parent_data
+            final_prompt = user_prompt
+            if parent_data and not user_prompt:
+                final_prompt = "Respond to the input document above."
 
-        if not final_prompt.strip():
+        if not user_prompt.strip() and not parent_data.strip():
             return {
                 "success": False,
                 "error": "No input or prompt provided",
@@ -67,7 +65,11 @@ Input Data:
         # LLM Execution
         # ================================
         try:
-            output = self.llm(final_prompt)
+            output = await self.llm(
+                final_prompt,
+                context=parent_data or None,
+                **self.llm_options(node_input),
+            )
 
             return {
                 "success": True,
@@ -24,6 +24,7 @@ class LLMWithToolsAgent(BaseAgent):
         """
         user_prompt = node_input.get("prompt", "")
         enable_tools = node_input.get("enable_tools", False)
+        options = self.llm_options(node_input)
 
         parent_data = self.get_parent_data(parent_outputs)
 
@@ -36,20 +37,17 @@ class LLMWithToolsAgent(BaseAgent):
         # ================================
         # Initial Prompt
         # ================================
-        if user_prompt:
-            base_prompt = f"""{user_prompt}
-
-Input:
-{parent_data}"""
-        else:
-            base_prompt = parent_data
+        # Parent data is sent separately as `context` on every call, so
+        # all three prompts share one stable (cacheable) prefix.
+        context = parent_data or None
+        base_prompt = user_prompt or "Respond to the input document above."
 
         # ================================
         # No tools → simple LLM call
         # ================================
         if not enable_tools or not self.available_tools:
             try:
-                output = self.llm(base_prompt)
+                output = await self.llm(base_prompt, context=context, **options)
                 return {
                     "success": True,
                     "data": output,
@@ -85,7 +83,13 @@ Response:
 
         try:
             # Step 1: LLM decision
-            decision = self.llm(react_prompt).strip()
+            # Short classification-style call: the router (when enabled)
+            # sends it to the fast tier
+            decision = (
+                await self.llm(
+                    react_prompt, context=context, task="tool_decision", **options
+                )
+            ).strip()
 
             # ================================
             # Tool Invocation
@@ -118,7 +122,9 @@ Tool Output:
 Using the tool output, provide a complete and accurate answer:
 """
 
-                    final_answer = self.llm(final_prompt)
+                    final_answer = await self.llm(
+                        final_prompt, context=context, **options
+                    )
 
                     return {
                         "success": True,
@@ -1,14 +1,22 @@
 # backend/agents/summarizer.py
 
+import asyncio
+
 from agent_base import BaseAgent
+from services.streams import StreamError
 
 
 class SummarizerAgent(BaseAgent):
     """
     Agent responsible for summarizing text input.
     Supports different summary lengths via `mode`.
+
+    Behind a streaming parent (e.g. page-batched extraction) each chunk
+    is summarized as it arrives and the partial summaries are combined.
     """
 
+    accepts_stream = True
+
     def __init__(self, llm):
         super().__init__(
             name="Summarizer",
@@ -21,9 +29,10 @@ class SummarizerAgent(BaseAgent):
         # ================================
         # Input Resolution
         # ================================
+        stream = None if node_input.get("input") else self.get_parent_stream(parent_outputs)
         text = node_input.get("input") or self.get_parent_data(parent_outputs)
 
-        if not text:
+        if not text and stream is None:
             return {
                 "success": False,
                 "error": "No text to summarize",
@@ -42,20 +51,33 @@ class SummarizerAgent(BaseAgent):
 
         limit = word_limits.get(mode, 100)
 
+        # Cap output length to the requested summary size
+        # (~2 tokens per word leaves room for formatting)
+        options = {"max_output_tokens": limit * 2, **self.llm_options(node_input)}
+
         # ================================
         # Prompt Construction
         # ================================
+        # The text goes in as shared `context` (a stable prefix placed
+        # before these instructions by the LLM service).
         prompt = f"""
-Summarize the following text in approximately {limit} words.
-
-Text:
-{text}
+Summarize the input document above in approximately {limit} words.
 """
 
         # ================================
         # LLM Execution
         # ================================
-        summary = self.llm(prompt)
+        if stream is not None:
+            try:
+                summary = await self._summarize_stream(stream, prompt, options)
+            except StreamError as e:
+                return {
+                    "success": False,
+                    "error": f"Input stream failed: {str(e)}",
+                    "node_type": "summarizer",
+                }
+        else:
+            summary = await self.llm(prompt, context=text, **options)
 
         return {
             "success": True,
@@ -63,3 +85,33 @@ Text:
             "mode": mode,
             "node_type": "summarizer",
         }
+
+    async def _summarize_stream(self, stream, prompt, options):
+        """
+        Summarize chunks concurrently as they are published, then
+        merge the partial summaries into one.
+        """
+        tasks = []
+        try:
+            async for chunk in stream:
+                if chunk.strip():
+                    tasks.append(asyncio.ensure_future(
+                        self.llm(prompt, context=chunk, **options)
+                    ))
+
+            partials = await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        if not partials:
+            raise StreamError("No text to summarize")
+        if len(partials) == 1:
+            return partials[0]
+
+        merge_prompt = f"""
+The input document above consists of summaries of consecutive parts
+of one document. Merge them into a single summary. {prompt.strip()}
+"""
+        return await self.llm(merge_prompt, context="\n\n".join(partials), **options)
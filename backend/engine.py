@@ -1,103 +1,807 @@
 # backend/engine.py
 
+import asyncio
+import copy
+import time
+import uuid
 from collections import deque
 
+from services.deadlines import deadline_scope, remaining
+from services.execution_context import node_scope, priority_scope
+from services.executors import block_detector
+from services.output_memory import OutputMemory
+from services.profiling import span
+from services.streams import StreamChannel, StreamError, stream_scope
+
+
+class Plan:
+    """
+    Execution plan compiled from a workflow.
+
+    Holds the graph structures, the topological order and the map
+    regions. Each Map node and the subgraph it fans out over (every
+    node reachable from it, stopping at Join nodes) form one unit;
+    `units` is the topological order over that condensed graph.
+    """
+
+    def __init__(self, workflow):
+        # ================================
+        # Build graph structures
+        # ================================
+        self.workflow = workflow
+        self.node_map = {node.id: node for node in workflow.nodes}
+        self.children = {node.id: [] for node in workflow.nodes}
+        self.parents = {node.id: [] for node in workflow.nodes}
+
+        for connection in workflow.connections:
+            self.children[connection.source].append(connection.target)
+            self.parents[connection.target].append(connection.source)
+
+        self.order = self._toposort(list(self.node_map), self.parents, self.children)
+        if self.order is None:
+            raise Exception("Cycle detected in workflow")
+
+        # ================================
+        # Identify output node (if exists)
+        # ================================
+        self.output_node_id = None
+        for node in workflow.nodes:
+            if node.subtype == "output":
+                self.output_node_id = node.id
+                break
+
+        # ================================
+        # Map regions
+        # ================================
+        self.regions = {}
+        region_of = {}
+        for node_id in self.order:
+            if self.node_map[node_id].subtype == "map" and node_id not in region_of:
+                region = self._map_region(node_id)
+                self.regions[node_id] = region
+                for member in region:
+                    region_of[member] = node_id
+
+        self.units = self._condense(region_of)
+
+    def with_overrides(self, overrides):
+        """
+        Copy of the plan with node configs merged with `overrides`
+        (node id -> config dict). The plan itself is left untouched,
+        so a compiled plan can be shared by concurrent runs.
+        """
+        unknown = set(overrides) - set(self.node_map)
+        if unknown:
+            raise Exception(f"Unknown node ids: {', '.join(sorted(unknown))}")
+
+        plan = copy.copy(self)
+        plan.node_map = dict(self.node_map)
+        for node_id, config in overrides.items():
+            node = copy.copy(self.node_map[node_id])
+            node.config = {**node.config, **config}
+            plan.node_map[node_id] = node
+        return plan
+
+    @staticmethod
+    def _toposort(node_ids, parents, children):
+        """Kahn's algorithm; None if the graph has a cycle."""
+        indegree = {node_id: 0 for node_id in node_ids}
+        for node_id in node_ids:
+            for child in children[node_id]:
+                if child in indegree:
+                    indegree[child] += 1
+
+        queue = deque(node_id for node_id in node_ids if indegree[node_id] == 0)
+        order = []
+
+        while queue:
+            current = queue.popleft()
+            order.append(current)
+
+            for neighbor in children[current]:
+                if neighbor not in indegree:
+                    continue
+                indegree[neighbor] -= 1
+                if indegree[neighbor] == 0:
+                    queue.append(neighbor)
+
+        return order if len(order) == len(node_ids) else None
+
+    def _map_region(self, map_id):
+        """Nodes downstream of a Map node, up to (excluding) Join nodes."""
+        region = set()
+        stack = list(self.children[map_id])
+
+        while stack:
+            node_id = stack.pop()
+            if node_id in region:
+                continue
+
+            subtype = self.node_map[node_id].subtype
+            if subtype == "join":
+                continue
+            if subtype == "map":
+                raise Exception("Nested map nodes are not supported")
+
+            region.add(node_id)
+            stack.extend(self.children[node_id])
+
+        # Keep the global topological order inside the region
+        return [node_id for node_id in self.order if node_id in region]
+
+    def _condense(self, region_of):
+        """
+        Topological order of units: ("node", id) or ("map", map_id).
+        """
+        def unit_of(node_id):
+            return region_of.get(node_id, node_id)
+
+        unit_ids = list(dict.fromkeys(unit_of(node_id) for node_id in self.order))
+        unit_children = {unit: set() for unit in unit_ids}
+        unit_parents = {unit: set() for unit in unit_ids}
+
+        for node_id in self.order:
+            for child in self.children[node_id]:
+                source, target = unit_of(node_id), unit_of(child)
+                if source != target:
+                    unit_children[source].add(target)
+                    unit_parents[target].add(source)
+
+        order = self._toposort(unit_ids, unit_parents, unit_children)
+        if order is None:
+            raise Exception("Map region must only feed into Join nodes")
+
+        return [
+            ("map", unit) if unit in self.regions else ("node", unit)
+            for unit in order
+        ]
+
+
+class Execution:
+    """
+    Handle for a running workflow, used for cooperative cancellation.
+    """
+
+    def __init__(self, execution_id):
+        self.id = execution_id
+        self.cancelled = False
+        # task -> node id for nodes in flight (several while a map fans out)
+        self.tasks = {}
+        self.started_at = time.time()
+
+    @property
+    def running_nodes(self):
+        return sorted(set(self.tasks.values()))
+
+    def cancel(self):
+        self.cancelled = True
+        for task in list(self.tasks):
+            if not task.done():
+                task.cancel()
+
 
 class WorkflowEngine:
     """
     Executes a workflow DAG using topological sorting.
     Each node is executed only after its dependencies complete.
+
+    Deadlines:
+    - `timeout_s` in a node's config bounds that node
+    - `deadline_s` passed to `execute` bounds the whole workflow and
+      is propagated to the node's own calls (see services/deadlines.py)
+
+    Fan-out:
+    - A Map node's downstream subgraph runs once per item, with at
+      most `concurrency` items in flight; Join nodes collect the
+      per-item outputs in order
+
+    Branching:
+    - A Router node's output lists the `selected` children; a failed
+      router selects none. A node whose every incoming edge is untaken
+      (or comes from a skipped node) is not run and gets status
+      "skipped"
+
+    Streaming:
+    - A node with `produces_stream` and `stream: true` in its config
+      publishes partial output; children with `accepts_stream` whose
+      only parent it is run concurrently and read the chunks
+
+    Checkpoints:
+    - With a CheckpointStore, successful outputs are recorded after
+      each unit; `completed` outputs of an earlier run (minus `rerun`
+      nodes and their descendants) are restored instead of re-run
+
+    Memory:
+    - Once all consumers of an output have run it is dropped if the
+      caller did not ask for it; outputs are spilled to the artifact
+      store only when the execution exceeds its memory budget (see
+      services/output_memory.py)
     """
 
-    def __init__(self, registry):
+    def __init__(self, registry, artifacts=None, checkpoints=None):
         self.registry = registry
+        # Optional ArtifactStore: large outputs are passed by reference
+        self.artifacts = artifacts
+        # Optional CheckpointStore: outputs are persisted for resume
+        self.checkpoints = checkpoints
+        # execution_id -> Execution (running workflows only)
+        self.executions = {}
+
+    def cancel(self, execution_id):
+        """Cancel a running execution. Returns False if unknown."""
+        execution = self.executions.get(execution_id)
+        if not execution:
+            return False
+        execution.cancel()
+        return True
 
-    async def execute(self, workflow):
+    async def execute(
+        self,
+        workflow=None,
+        deadline_s=None,
+        execution_id=None,
+        retain=None,
+        result_nodes=None,
+        memory_budget_bytes=None,
+        priority=None,
+        tenant=None,
+        plan=None,
+        overrides=None,
+        completed=None,
+        rerun=None,
+    ):
         """
         Execute the given workflow.
 
+        `retain` (node ids) are never released; `result_nodes`, when
+        given, are the only outputs the caller needs in full.
+        `priority` / `tenant` select the scheduler queue of every LLM
+        and tool call made by the run.
+
+        A precompiled `plan` (see Plan) skips planning; `overrides`
+        (node id -> config) are applied to a copy of it.
+
+        Resume: `completed` (node id -> output from a checkpoint) are
+        restored instead of run, except the `rerun` node ids and
+        everything downstream of them.
+
         Returns:
             results (dict): node_id -> output
             logs (list): execution logs
         """
-        results = {}
+        plan = plan or Plan(workflow)
+        if overrides:
+            plan = plan.with_overrides(overrides)
 
-        # ================================
-        # Build graph structures
-        # ================================
-        node_map = {node.id: node for node in workflow.nodes}
-        adjacency = {node.id: [] for node in workflow.nodes}
-        indegree = {node.id: 0 for node in workflow.nodes}
+        execution = Execution(execution_id or uuid.uuid4().hex)
+        if execution.id in self.executions:
+            raise Exception(f"Execution already running: {execution.id}")
 
-        for connection in workflow.connections:
-            adjacency[connection.source].append(connection.target)
-            indegree[connection.target] += 1
+        memory = OutputMemory(
+            plan,
+            self.artifacts,
+            retain=retain,
+            result_nodes=result_nodes,
+            budget_bytes=memory_budget_bytes,
+        )
+
+        restored = self._restore(plan, completed or {}, set(rerun or ()))
+        if self.checkpoints:
+            self.checkpoints.begin(execution.id, plan.workflow, overrides)
+            for node_id, output in restored.items():
+                self.checkpoints.record(execution.id, node_id, output)
+
+        self.executions[execution.id] = execution
+        event = "failed"
+        try:
+            with deadline_scope(deadline_s), priority_scope(priority, tenant):
+                results, event = await self._run(plan, execution, memory, restored)
+        finally:
+            del self.executions[execution.id]
+            if self.checkpoints:
+                self.checkpoints.finish(execution.id, event)
 
         # ================================
-        # Topological sort (Kahn's Algorithm)
+        # Execution logs
         # ================================
-        queue = deque(node_id for node_id, deg in indegree.items() if deg == 0)
-        execution_order = []
-
-        while queue:
-            current = queue.popleft()
-            execution_order.append(current)
+        logs = [
+            {
+                "event": event,
+                "execution_id": execution.id,
+                "duration_ms": round((time.time() - execution.started_at) * 1000, 1),
+                "memory": memory.metrics(),
+            }
+        ]
+        if completed:
+            logs[0]["restored_nodes"] = sorted(restored)
+        if self.checkpoints and self.checkpoints.errors(execution.id):
+            logs[0]["checkpoint_error"] = self.checkpoints.errors(execution.id)
 
-            for neighbor in adjacency[current]:
-                indegree[neighbor] -= 1
-                if indegree[neighbor] == 0:
-                    queue.append(neighbor)
+        return results, logs
 
-        if len(execution_order) != len(node_map):
-            raise Exception("Cycle detected in workflow")
+    async def _run(self, plan, execution, memory, restored):
+        results = dict(restored)
+        event = "completed"
+        await memory.after_unit(list(restored), results)
 
         # ================================
-        # Identify output node (if exists)
+        # Execute units in order
         # ================================
-        output_node_id = None
-        for node in workflow.nodes:
-            if node.subtype == "output":
-                output_node_id = node.id
-                break
+        for kind, unit_id in plan.units:
 
-        # ================================
-        # Execute nodes in order
-        # ================================
-        for node_id in execution_order:
-            node = node_map[node_id]
+            # Already run alongside a streaming producer
+            if unit_id in results:
+                continue
 
-            # Instantiate node
-            node_instance = self.registry.get_node_instance(node.subtype)
+            # ================================
+            # Cancellation / deadline checks
+            # ================================
+            if execution.cancelled:
+                event = "cancelled"
+            elif remaining() == 0:
+                event = "deadline_exceeded"
 
-            # Collect parent outputs
-            parent_outputs = {
-                conn.source: results[conn.source]
-                for conn in workflow.connections
-                if conn.target == node_id and conn.source in results
-            }
+            if event != "completed":
+                for node_id in plan.order:
+                    if node_id not in results:
+                        results[node_id] = self._status_output(
+                            plan.node_map[node_id], event, "Not started"
+                        )
+                break
 
-            # Execute node
-            output = await node_instance.execute(node.config, parent_outputs)
-            results[node_id] = output
+            if kind == "node" and self._streams(plan, unit_id, results):
+                outputs = await self._run_streaming(plan, unit_id, results, execution)
+            else:
+                outputs = {unit_id: await self._run_unit(plan, kind, unit_id, results, execution)}
+
+            members = [
+                member
+                for output_id in outputs
+                for member in [output_id, *plan.regions.get(output_id, [])]
+            ]
+            if self.checkpoints:
+                for member in members:
+                    if self._reusable(results.get(member)):
+                        self.checkpoints.record(execution.id, member, results[member])
+            await memory.after_unit(members, results)
 
             # ================================
             # Guardrail blocking support
             # ================================
-            if output.get("blocked") is True:
-                if output_node_id:
+            blocked = {
+                member: results[member]
+                for member in members
+                if results.get(member, {}).get("blocked") is True
+            }
+            if blocked:
+                if plan.output_node_id:
                     output_node = self.registry.get_node_instance("output")
-                    results[output_node_id] = await output_node.execute(
-                        {}, {node_id: output}
+                    results[plan.output_node_id] = await output_node.execute(
+                        {}, blocked
                     )
                 break
 
-        # ================================
-        # Execution logs
-        # ================================
-        logs = [
-            {
-                "event": "completed"
+        return results, event
+
+    @staticmethod
+    def _reusable(output):
+        """Outputs worth checkpointing: successes and untaken branches."""
+        return bool(output) and (output.get("success") or output.get("status") == "skipped")
+
+    @classmethod
+    def _restore(cls, plan, completed, rerun):
+        """
+        Checkpointed outputs still valid for this plan, by unit: every
+        member reusable and not in `rerun`, and every parent outside
+        the unit restored too (so nothing downstream of a re-run node
+        is kept). A map region is restored whole or not at all.
+        """
+        restored = {}
+        for _, unit_id in plan.units:
+            members = [unit_id, *plan.regions.get(unit_id, [])]
+            if all(
+                node_id not in rerun
+                and cls._reusable(completed.get(node_id))
+                and all(
+                    parent in restored or parent in members
+                    for parent in plan.parents[node_id]
+                )
+                for node_id in members
+            ):
+                for node_id in members:
+                    restored[node_id] = completed[node_id]
+
+        return restored
+
+    async def _run_unit(self, plan, kind, unit_id, results, execution):
+        if kind == "map":
+            return await self._run_map(plan, unit_id, results, execution)
+        return await self._run_node(plan, unit_id, results, execution)
+
+    # ================================
+    # Single node
+    # ================================
+    async def _run_node(self, plan, node_id, results, execution):
+        """
+        Run one node with parent outputs taken from `results` and
+        store its (possibly externalized) output there.
+        """
+        node = plan.node_map[node_id]
+
+        # Lazy branching: don't run nodes no taken edge leads to
+        if self._unreachable(plan, node_id, results):
+            output = self._status_output(node, "skipped", "Branch not taken")
+            results[node_id] = output
+            return output
+
+        # Instantiate node
+        node_instance = self.registry.get_node_instance(node.subtype)
+
+        # Collect parent outputs (dead edges contribute nothing)
+        parent_outputs = {
+            source: results[source]
+            for source in plan.parents[node_id]
+            if source in results and self._edge_taken(plan, source, node_id, results[source])
+        }
+
+        # Nodes like the retriever take their query from their consumers
+        node_input = node.config
+        if getattr(node_instance, "reads_downstream_prompts", False):
+            node_input = {
+                **node.config,
+                "downstream_prompts": [
+                    plan.node_map[child].config.get("prompt")
+                    for child in plan.children[node_id]
+                ],
             }
-        ]
 
-        return results, logs
+        # Execute node
+        output = await self._execute_with_limits(
+            node, node_instance, node_input, parent_outputs, execution
+        )
+        if self.artifacts:
+            output = await self.artifacts.externalize(output)
+
+        results[node_id] = output
+        return output
+
+    async def _execute_with_limits(self, node, node_instance, node_input, parent_outputs, execution):
+        """
+        Run one node under its `timeout_s` and the workflow deadline.
+        Timeouts and cancellation become distinct result statuses.
+        """
+        timeout_s = node.config.get("timeout_s")
+        timeout_s = float(timeout_s) if timeout_s not in (None, "") else None
+
+        # Which limit binds: the node's own or the workflow budget
+        workflow_left = remaining()
+        node_bound = timeout_s is not None and (
+            workflow_left is None or timeout_s <= workflow_left
+        )
+
+        with deadline_scope(timeout_s) as budget, node_scope(node.id, node.subtype), span(
+            f"node {node.id} ({node.subtype})"
+        ):
+            # The task copies the context, so the node sees the deadline
+            # and its own identity
+            work = node_instance.execute(node_input, parent_outputs)
+            if block_detector:
+                work = block_detector.watch(work, node.id, node.subtype)
+            task = asyncio.ensure_future(work)
+            execution.tasks[task] = node.id
+
+            try:
+                return await asyncio.wait_for(task, budget)
+
+            except asyncio.TimeoutError:
+                if node_bound:
+                    return self._status_output(
+                        node, "timeout", f"Node timed out after {budget:.1f}s"
+                    )
+                return self._status_output(
+                    node, "deadline_exceeded", "Workflow deadline exceeded"
+                )
+
+            except asyncio.CancelledError:
+                # Only swallow cancellations requested through cancel()
+                if not execution.cancelled:
+                    raise
+                return self._status_output(node, "cancelled", "Execution cancelled")
+
+            finally:
+                execution.tasks.pop(task, None)
+
+    # ================================
+    # Map fan-out
+    # ================================
+    async def _run_map(self, plan, map_id, results, execution):
+        """
+        Run a Map node, then its region once per item. Behind a
+        streaming parent, items start as each chunk is split.
+
+        Each region node ends up with an aggregated output whose
+        `items` holds the per-item outputs in item order.
+
+        A guardrail blocking one item stops the other items, and its
+        aggregated output is blocked, so the workflow stops as it does
+        for a block outside a map.
+        """
+        region = plan.regions[map_id]
+        concurrency = max(1, int(plan.node_map[map_id].config.get("concurrency", 4)))
+        semaphore = asyncio.Semaphore(concurrency)
+        tasks = []
+        per_item = []
+        blocked = False
+
+        async def run_item(item_results):
+            nonlocal blocked
+            async with semaphore:
+                for node_id in region:
+                    if execution.cancelled or blocked:
+                        break
+                    output = await self._run_node(plan, node_id, item_results, execution)
+                    if output.get("blocked") is True:
+                        blocked = True
+                        for task in tasks:
+                            if task is not asyncio.current_task():
+                                task.cancel()
+                        break
+
+        def start(item):
+            if blocked:
+                return
+            item_results = dict(results)
+            item_results[map_id] = {
+                "success": True,
+                "data": item,
+                "item_index": len(per_item),
+                "node_type": "map",
+            }
+            per_item.append(item_results)
+            tasks.append(asyncio.ensure_future(run_item(item_results)))
+
+        try:
+            stream = self._parent_stream(plan, map_id, results)
+            if stream is not None:
+                # Items start while the parent is still producing
+                map_output = await self._map_stream(plan, map_id, results, stream, start)
+            else:
+                map_output = await self._run_node(plan, map_id, results, execution)
+                if map_output.get("success"):
+                    for item in map_output["items"]:
+                        start(item)
+
+            if not map_output.get("success"):
+                reason = (
+                    "Branch not taken"
+                    if map_output.get("status") == "skipped"
+                    else "Map node produced no items"
+                )
+                for node_id in region:
+                    results[node_id] = self._status_output(
+                        plan.node_map[node_id], "skipped", reason
+                    )
+                return map_output
+
+            # Items stopped by a block end cancelled; anything else raises
+            for outcome in await asyncio.gather(*tasks, return_exceptions=True):
+                if isinstance(outcome, BaseException) and not (
+                    blocked and isinstance(outcome, asyncio.CancelledError)
+                ):
+                    raise outcome
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        for node_id in region:
+            node = plan.node_map[node_id]
+            outputs = [
+                item_results.get(node_id)
+                or (
+                    self._status_output(node, "cancelled", "Stopped: another item was blocked")
+                    if blocked
+                    else self._status_output(node, "skipped", "Item stopped before this node")
+                )
+                for item_results in per_item
+            ]
+            succeeded = [output for output in outputs if output.get("success")]
+
+            aggregated = {
+                "success": bool(succeeded),
+                "data": "\n\n".join(str(output.get("data", "")) for output in succeeded),
+                "items": outputs,
+                "count": len(outputs),
+                "mapped": True,
+                "node_type": node.subtype,
+            }
+            first_blocked = next(
+                (index for index, output in enumerate(outputs) if output.get("blocked") is True),
+                None,
+            )
+            if first_blocked is not None:
+                # The block is this node's result, as outside a map
+                aggregated.update({
+                    "success": False,
+                    "blocked": True,
+                    "data": outputs[first_blocked].get("data", ""),
+                    "reason": outputs[first_blocked].get("reason"),
+                    "blocked_item": first_blocked,
+                })
+            if self.artifacts:
+                aggregated = await self.artifacts.externalize(aggregated)
+            results[node_id] = aggregated
+
+        return map_output
+
+    async def _map_stream(self, plan, map_id, results, stream, start):
+        """
+        Split each streamed chunk with the Map node as it arrives and
+        start its items right away. Stores and returns the Map output.
+        """
+        node = plan.node_map[map_id]
+        map_instance = self.registry.get_node_instance(node.subtype)
+        max_items = int(node.config.get("max_items", 50))
+        items = []
+
+        try:
+            async for chunk in stream:
+                output = await map_instance.execute(
+                    node.config, {"stream": {"success": True, "data": chunk}}
+                )
+                for item in output.get("items", [])[: max_items - len(items)]:
+                    items.append(item)
+                    start(item)
+                if len(items) >= max_items:
+                    break
+        except StreamError as e:
+            output = {"success": False, "error": str(e), "node_type": node.subtype}
+        else:
+            output = {
+                "success": bool(items),
+                "data": f"{len(items)} items",
+                "items": items,
+                "count": len(items),
+                "split": node.config.get("split", "auto"),
+                "streamed": True,
+                "node_type": node.subtype,
+            }
+            if not items:
+                output["error"] = "Nothing to map over"
+
+        results[map_id] = output
+        return output
+
+    # ================================
+    # Streaming producers
+    # ================================
+    def _streams(self, plan, node_id, results):
+        """True if the node should run as a streaming producer."""
+        node = plan.node_map[node_id]
+        if not node.config.get("stream") or self._unreachable(plan, node_id, results):
+            return False
+        instance = self.registry.get_node_instance(node.subtype)
+        return getattr(instance, "produces_stream", False)
+
+    def _stream_consumers(self, plan, node_id):
+        """Children that can start on the producer's chunks."""
+        consumers = []
+        for child in plan.children[node_id]:
+            if plan.parents[child] != [node_id]:
+                continue
+            instance = self.registry.get_node_instance(plan.node_map[child].subtype)
+            if getattr(instance, "accepts_stream", False):
+                consumers.append(("map" if child in plan.regions else "node", child))
+        return consumers
+
+    @staticmethod
+    def _parent_stream(plan, node_id, results):
+        for source in plan.parents[node_id]:
+            stream = results.get(source, {}).get("stream")
+            if stream is not None:
+                return stream
+        return None
+
+    async def _run_streaming(self, plan, node_id, results, execution):
+        """
+        Run a streaming producer together with its stream consumers.
+        Returns {unit id: output} for every unit run.
+
+        While the producer runs its result is a placeholder carrying
+        the channel; it is replaced by the final output at the end. A
+        consumer that blocks (guardrail) stops the producer early.
+        """
+        node = plan.node_map[node_id]
+        channel = StreamChannel()
+        results[node_id] = {
+            "success": True,
+            "status": "streaming",
+            "data": "",
+            "stream": channel,
+            "node_type": node.subtype,
+        }
+
+        async def produce():
+            try:
+                with stream_scope(channel):
+                    output = await self._run_node(plan, node_id, results, execution)
+            except asyncio.CancelledError:
+                channel.close("Producer stopped")
+                raise
+            channel.close(
+                None if output.get("success") else output.get("error") or "Producer failed"
+            )
+            return output
+
+        producer = asyncio.ensure_future(produce())
+        consumers = {
+            asyncio.ensure_future(
+                self._run_unit(plan, kind, child, results, execution)
+            ): child
+            for kind, child in self._stream_consumers(plan, node_id)
+        }
+
+        outputs = {}
+        try:
+            pending = set(consumers)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    outputs[consumers[task]] = task.result()
+                    if task.result().get("blocked") is True:
+                        producer.cancel()
+
+            try:
+                outputs[node_id] = await producer
+            except asyncio.CancelledError:
+                if not producer.cancelled():
+                    raise
+                outputs[node_id] = results[node_id] = self._status_output(
+                    node, "cancelled", "Stopped: a downstream node blocked the stream"
+                )
+        finally:
+            for task in [producer, *consumers]:
+                if not task.done():
+                    task.cancel()
+
+        return outputs
+
+    @staticmethod
+    def _edge_taken(plan, source, node_id, output):
+        """
+        False for a dead edge: from a skipped node, from a router that
+        did not select `node_id`, or from a router that failed (and so
+        selected nothing).
+        """
+        if output.get("status") == "skipped":
+            return False
+        if "selected" in output and node_id not in output["selected"]:
+            return False
+        if plan.node_map[source].subtype == "router" and not output.get("success"):
+            return False
+        return True
+
+    @classmethod
+    def _unreachable(cls, plan, node_id, results):
+        """True if the node has parents and every incoming edge is dead."""
+        parents = plan.parents[node_id]
+        if not parents:
+            return False
+
+        for source in parents:
+            output = results.get(source)
+            if output is None or cls._edge_taken(plan, source, node_id, output):
+                return False
+
+        return True
+
+    @staticmethod
+    def _status_output(node, status, message):
+        return {
+            "success": False,
+            "status": status,
+            "error": message,
+            "node_type": node.subtype,
+        }
@@ -0,0 +1,111 @@
+# backend/loadtest/bench_serialization.py
+
+"""
+Serialization Benchmark
+-----------------------
+Compares the previous `/api/execute` encoding path
+(ExecuteResponse validation + jsonable_encoder + json.dumps, with
+pretty-printed web-search json_data) against the fast path in
+`responses.py` (direct projection + orjson, optional field
+selection and gzip).
+
+Usage (from backend/):
+    python -m loadtest.bench_serialization --nodes 40 --iterations 200
+"""
+
+import argparse
+import gzip
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+
+from models import ExecuteResponse
+from responses import dumps, encode_response, project_results
+
+
+def synthetic_results(node_count: int, indent):
+    """A wide workflow: searches, LLM answers and a final output."""
+    results = {}
+    search_hits = [
+        {
+            "rank": i,
+            "title": f"Result {i} about workflow engines",
+            "url": f"https://example.com/articles/{i}",
+            "snippet": "Workflow engines schedule DAGs of tasks. " * 8,
+        }
+        for i in range(1, 7)
+    ]
+
+    for index in range(node_count):
+        node_id = f"node_{index}"
+        if index % 3 == 0:
+            results[node_id] = {
+                "success": True,
+                "data": "### Search results\n\n" + "snippet text " * 300,
+                "json_data": json.dumps({"query": "q", "results": search_hits}, indent=indent),
+                "node_type": "web_search",
+                "count": 6,
+            }
+        else:
+            results[node_id] = {
+                "success": True,
+                "data": "Generated answer paragraph. " * 150,
+                "node_type": "llm",
+                "prompt_used": "Summarize the findings",
+                "description": "",
+                "execution_mode": "user_prompt",
+            }
+
+    results["output"] = {"success": True, "data": "Final answer. " * 100, "node_type": "output"}
+    return results
+
+
+def measure(label, fn, iterations):
+    fn()  # warm up
+    start = time.process_time()
+    for _ in range(iterations):
+        body = fn()
+    cpu_ms = (time.process_time() - start) * 1000 / iterations
+    print(f"{label:38}{cpu_ms:>10.3f} ms{len(body):>12,} B")
+    return body
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark execute response encoding")
+    parser.add_argument("--nodes", type=int, default=40)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    logs = [{"event": "completed"}]
+    legacy_results = synthetic_results(args.nodes, indent=2)
+    results = synthetic_results(args.nodes, indent=None)
+
+    def legacy():
+        response = ExecuteResponse(success=True, status="success", result=legacy_results, logs=logs)
+        return json.dumps(
+            jsonable_encoder(response),
+            ensure_ascii=False, allow_nan=False, separators=(",", ":"),
+        ).encode("utf-8")
+
+    def fast():
+        return dumps({"success": True, "result": project_results(results), "logs": logs})
+
+    def fast_projected():
+        projected = project_results(results, ["output"], ["data", "node_type"])
+        return dumps({"success": True, "result": projected, "logs": logs})
+
+    def fast_gzip():
+        payload = {"success": True, "result": project_results(results), "logs": logs}
+        return encode_response(payload, "gzip").body
+
+    print(f"{'path':38}{'cpu/req':>13}{'size':>14}")
+    legacy_body = measure("legacy (pydantic + json, indent=2)", legacy, args.iterations)
+    measure("fast (projection + orjson)", fast, args.iterations)
+    measure("fast + projection (output.data)", fast_projected, args.iterations)
+    measure("fast + gzip", fast_gzip, args.iterations)
+    print(f"{'legacy gzip size (reference)':38}{'':>13}{len(gzip.compress(legacy_body)):>12,} B")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+# backend/loadtest/fake_gemini.py
+
+"""
+Fake Gemini Server
+------------------
+Local stand-in for the Gemini REST API used by load tests.
+
+Speaks the `models/{model}:generateContent` wire protocol with:
+- Tunable latency distributions (fixed / uniform / exponential / lognormal)
+- Random 5xx error injection
+- Random and concurrency-based 429 (RESOURCE_EXHAUSTED) injection
+- `cachedContents` creation for context-caching runs
+
+Usage (from backend/):
+    python -m loadtest.fake_gemini --port 8090 --latency lognormal:median=0.6,sigma=0.5
+
+Then point the backend at it:
+    GEMINI_API_KEY=fake GEMINI_BASE_URL=http://127.0.0.1:8090 uvicorn main:app
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import time
+from typing import Any, Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+# ================================
+# Latency Model
+# ================================
+class LatencyModel:
+    """
+    Random latency generator parsed from a compact spec string:
+
+    - fixed:0.2
+    - uniform:low=0.1,high=0.9
+    - exponential:mean=0.5
+    - lognormal:median=0.6,sigma=0.5
+    """
+
+    def __init__(self, kind: str = "lognormal", **params: float):
+        self.kind = kind
+        self.params = params
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        kind, _, raw = spec.partition(":")
+        params: Dict[str, float] = {}
+
+        if kind == "fixed" and raw and "=" not in raw:
+            params["value"] = float(raw)
+        elif raw:
+            for item in raw.split(","):
+                key, _, value = item.partition("=")
+                params[key.strip()] = float(value)
+
+        model = cls(kind, **params)
+        model.sample()  # validate spec eagerly
+        return model
+
+    def sample(self) -> float:
+        p = self.params
+
+        if self.kind == "fixed":
+            return p.get("value", 0.2)
+        if self.kind == "uniform":
+            return random.uniform(p.get("low", 0.1), p.get("high", 1.0))
+        if self.kind == "exponential":
+            return random.expovariate(1.0 / p.get("mean", 0.5))
+        if self.kind == "lognormal":
+            return random.lognormvariate(
+                math.log(p.get("median", 0.5)), p.get("sigma", 0.5)
+            )
+
+        raise ValueError(f"Unknown latency distribution: {self.kind}")
+
+    def __repr__(self):
+        params = ",".join(f"{k}={v}" for k, v in self.params.items())
+        return f"{self.kind}:{params}"
+
+
+# ================================
+# Server Configuration
+# ================================
+class FakeGeminiConfig:
+    """
+    Behaviour knobs of the fake server.
+    """
+
+    def __init__(
+        self,
+        latency: Optional[LatencyModel] = None,
+        per_token_s: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        max_concurrency: int = 0,
+        output_words: int = 60,
+    ):
+        self.latency = latency or LatencyModel("lognormal", median=0.5, sigma=0.5)
+        self.per_token_s = per_token_s
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.max_concurrency = max_concurrency
+        self.output_words = output_words
+
+
+def _error(code: int, status: str, message: str) -> JSONResponse:
+    """Error body in the Google API error format."""
+    return JSONResponse(
+        status_code=code,
+        content={"error": {"code": code, "message": message, "status": status}},
+    )
+
+
+def _prompt_text(body: Dict[str, Any]) -> str:
+    """Flatten the `contents` of a generateContent request into text."""
+    parts = []
+    for content in body.get("contents", []):
+        for part in content.get("parts", []):
+            parts.append(part.get("text", ""))
+    return "\n".join(parts)
+
+
+def _fake_answer(prompt: str, words: int) -> str:
+    """
+    Deterministic-ish answer that keeps the real agents on their
+    happy path (guardrail JSON verdicts, direct ReAct answers).
+    """
+    if "content safety validator" in prompt:
+        return '{ "allowed": true }'
+
+    filler = ("lorem ipsum dolor sit amet consectetur adipiscing elit " * words)
+    return " ".join(filler.split()[:words])
+
+
+# ================================
+# App Factory
+# ================================
+def create_app(config: FakeGeminiConfig) -> FastAPI:
+    app = FastAPI(title="Fake Gemini")
+    state = {"in_flight": 0, "requests": 0, "errors": 0, "rate_limited": 0}
+    cached_contents: Dict[str, int] = {}  # name -> token count
+
+    @app.get("/stats")
+    async def stats():
+        return {**state, "cached_contents": len(cached_contents), "latency": repr(config.latency)}
+
+    @app.post("/{version}/cachedContents")
+    async def create_cached_content(version: str, request: Request):
+        body = await request.json()
+        tokens = max(1, len(_prompt_text(body)) // 4)
+        name = f"cachedContents/fake-{len(cached_contents)}"
+        cached_contents[name] = tokens
+        return {
+            "name": name,
+            "model": body.get("model", ""),
+            "usageMetadata": {"totalTokenCount": tokens},
+        }
+
+    @app.post("/{version}/models/{model_action}")
+    async def generate_content(version: str, model_action: str, request: Request):
+        model, _, action = model_action.partition(":")
+        if action != "generateContent":
+            return _error(404, "NOT_FOUND", f"Unsupported action: {action}")
+
+        state["requests"] += 1
+
+        if config.max_concurrency and state["in_flight"] >= config.max_concurrency:
+            state["rate_limited"] += 1
+            return _error(429, "RESOURCE_EXHAUSTED", "Concurrency quota exceeded")
+
+        if random.random() < config.rate_limit_rate:
+            state["rate_limited"] += 1
+            return _error(429, "RESOURCE_EXHAUSTED", "Resource has been exhausted")
+
+        body = await request.json()
+        prompt = _prompt_text(body)
+
+        generation_config = body.get("generationConfig") or {}
+        words = config.output_words
+        if generation_config.get("maxOutputTokens"):
+            words = min(words, int(generation_config["maxOutputTokens"]))
+
+        state["in_flight"] += 1
+        try:
+            await asyncio.sleep(config.latency.sample() + words * config.per_token_s)
+        finally:
+            state["in_flight"] -= 1
+
+        if random.random() < config.error_rate:
+            state["errors"] += 1
+            return _error(500, "INTERNAL", "An internal error has occurred")
+
+        text = _fake_answer(prompt, words)
+        prompt_tokens = max(1, len(prompt) // 4)
+        cached_tokens = cached_contents.get(body.get("cachedContent", ""), 0)
+
+        return {
+            "candidates": [
+                {
+                    "content": {"parts": [{"text": text}], "role": "model"},
+                    "finishReason": "STOP",
+                    "index": 0,
+                }
+            ],
+            "usageMetadata": {
+                "promptTokenCount": prompt_tokens + cached_tokens,
+                "cachedContentTokenCount": cached_tokens,
+                "candidatesTokenCount": words,
+                "totalTokenCount": prompt_tokens + cached_tokens + words,
+            },
+            "modelVersion": model,
+            "responseId": f"fake-{time.time_ns()}",
+        }
+
+    return app
+
+
+# ================================
+# CLI
+# ================================
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local fake Gemini API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument(
+        "--latency",
+        default="lognormal:median=0.5,sigma=0.5",
+        help="fixed:S | uniform:low=,high= | exponential:mean= | lognormal:median=,sigma=",
+    )
+    parser.add_argument("--per-token", type=float, default=0.0,
+                        help="Extra seconds per output token")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with HTTP 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with HTTP 429")
+    parser.add_argument("--max-concurrency", type=int, default=0,
+                        help="Answer 429 above this many in-flight requests (0 = unlimited)")
+    parser.add_argument("--output-words", type=int, default=60)
+    args = parser.parse_args()
+
+    config = FakeGeminiConfig(
+        latency=LatencyModel.parse(args.latency),
+        per_token_s=args.per_token,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        max_concurrency=args.max_concurrency,
+        output_words=args.output_words,
+    )
+
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
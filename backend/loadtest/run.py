@@ -0,0 +1,331 @@
+# backend/loadtest/run.py
+
+"""
+Load Test Driver
+----------------
+Drives a weighted mix of realistic workflows against `/api/execute`
+and reports throughput, latency percentiles and event-loop lag.
+
+Targets:
+- In-process (default): imports `main.app` and calls it through an
+  ASGI transport, so the backend's own event-loop lag is measured.
+  The app's startup and shutdown handlers run around the test.
+- Remote: `--url http://host:port` against a running server
+  (lag is then measured on the driver's loop only).
+
+Usage (from backend/, with the fake server running):
+    GEMINI_API_KEY=fake GEMINI_BASE_URL=http://127.0.0.1:8090 \\
+        python -m loadtest.run --concurrency 32 --duration 60 \\
+        --mix chat=5,guarded_summary=3,research=2
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List
+
+import httpx
+
+
+# ================================
+# Workflow Mixes
+# ================================
+SAMPLE_TEXT = (
+    "AgentForge lets business users compose AI workflows visually. "
+    "Each workflow is a DAG of input, agent, tool and output nodes. "
+) * 20
+
+
+def _workflow(nodes: List[dict]) -> dict:
+    """Build a linear workflow payload from (subtype, config) node specs."""
+    workflow_nodes = []
+    for index, spec in enumerate(nodes):
+        workflow_nodes.append({
+            "id": f"n{index}",
+            "type": "agent",
+            "subtype": spec["subtype"],
+            "name": spec["subtype"],
+            "config": spec.get("config", {}),
+        })
+
+    connections = [
+        {"source": f"n{i}", "target": f"n{i + 1}"}
+        for i in range(len(workflow_nodes) - 1)
+    ]
+
+    return {
+        "workflow": {
+            "id": f"loadtest-{uuid.uuid4().hex[:8]}",
+            "name": "Load Test",
+            "nodes": workflow_nodes,
+            "connections": connections,
+        }
+    }
+
+
+def chat_workflow() -> dict:
+    return _workflow([
+        {"subtype": "input", "config": {"input_type": "text", "value": "What is a DAG?"}},
+        {"subtype": "llm", "config": {"prompt": "Answer briefly."}},
+        {"subtype": "output"},
+    ])
+
+
+def guarded_summary_workflow() -> dict:
+    return _workflow([
+        {"subtype": "input", "config": {"input_type": "text", "value": SAMPLE_TEXT}},
+        {"subtype": "guardrail"},
+        {"subtype": "summarizer", "config": {"mode": "small"}},
+        {"subtype": "output"},
+    ])
+
+
+def research_workflow() -> dict:
+    return _workflow([
+        {"subtype": "input", "config": {"input_type": "text", "value": SAMPLE_TEXT}},
+        {"subtype": "guardrail"},
+        {"subtype": "llm", "config": {"prompt": "Extract the key claims."}},
+        {"subtype": "llm_tools", "config": {"prompt": "Critique the claims."}},
+        {"subtype": "summarizer", "config": {"mode": "medium"}},
+        {"subtype": "output"},
+    ])
+
+
+MIXES: Dict[str, Callable[[], dict]] = {
+    "chat": chat_workflow,
+    "guarded_summary": guarded_summary_workflow,
+    "research": research_workflow,
+}
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """Parse `name=weight,...` into a weight map."""
+    weights = {}
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in MIXES:
+            raise SystemExit(f"Unknown workflow mix: {name} (known: {', '.join(MIXES)})")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+# ================================
+# Measurement
+# ================================
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+async def monitor_loop_lag(samples: List[float], stop: asyncio.Event, interval: float = 0.01):
+    """Record how late the event loop wakes up a periodic sleeper."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - start - interval))
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, int] = defaultdict(int)
+        self.started = 0.0
+        self.finished = 0.0
+
+    def record(self, mix: str, latency: float, status: str):
+        self.statuses[status] += 1
+        if status == "ok":
+            self.latencies[mix].append(latency)
+
+    def report(self, lag: List[float]) -> dict:
+        elapsed = max(self.finished - self.started, 1e-9)
+        all_latencies = [v for values in self.latencies.values() for v in values]
+        total = sum(self.statuses.values())
+
+        def summary(values: List[float]) -> dict:
+            return {
+                "count": len(values),
+                "p50_ms": round(percentile(values, 50) * 1000, 1),
+                "p90_ms": round(percentile(values, 90) * 1000, 1),
+                "p99_ms": round(percentile(values, 99) * 1000, 1),
+                "max_ms": round(max(values, default=0.0) * 1000, 1),
+            }
+
+        return {
+            "elapsed_s": round(elapsed, 2),
+            "requests": total,
+            "statuses": dict(self.statuses),
+            "throughput_rps": round(total / elapsed, 2),
+            "success_rps": round(self.statuses.get("ok", 0) / elapsed, 2),
+            "latency": summary(all_latencies),
+            "latency_by_mix": {mix: summary(v) for mix, v in self.latencies.items()},
+            "loop_lag": summary(lag),
+        }
+
+
+# ================================
+# Driver
+# ================================
+async def worker(client: httpx.AsyncClient, weights: Dict[str, float],
+                 recorder: Recorder, deadline: float, budget: List[int]):
+    names = list(weights)
+    mix_weights = [weights[name] for name in names]
+
+    while time.perf_counter() < deadline:
+        if budget[0] <= 0:
+            return
+        budget[0] -= 1
+
+        mix = random.choices(names, mix_weights)[0]
+        payload = MIXES[mix]()
+        start = time.perf_counter()
+
+        try:
+            response = await client.post("/api/execute", json=payload)
+            if response.status_code == 200 and response.json().get("success"):
+                status = "ok"
+            else:
+                status = f"http_{response.status_code}"
+        except httpx.TimeoutException:
+            status = "timeout"
+        except httpx.HTTPError as exc:
+            status = type(exc).__name__
+
+        recorder.record(mix, time.perf_counter() - start, status)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """
+    Run an ASGI app's startup handlers, and its shutdown handlers on
+    exit (ASGITransport only sends HTTP requests).
+    """
+    inbox: asyncio.Queue = asyncio.Queue()
+    outbox: asyncio.Queue = asyncio.Queue()
+    task = asyncio.create_task(
+        app({"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}, inbox.get, outbox.put)
+    )
+
+    async def step(event: str):
+        await inbox.put({"type": f"lifespan.{event}"})
+        reply = asyncio.ensure_future(outbox.get())
+        await asyncio.wait({reply, task}, return_when=asyncio.FIRST_COMPLETED)
+        if not reply.done():
+            reply.cancel()
+            task.result()
+            raise RuntimeError(f"App exited during lifespan {event}")
+        message = reply.result()
+        if message["type"] != f"lifespan.{event}.complete":
+            await asyncio.gather(task, return_exceptions=True)
+            raise RuntimeError(f"Lifespan {event} failed: {message.get('message', '')}")
+
+    await step("startup")
+    try:
+        yield
+    finally:
+        await step("shutdown")
+        await task
+
+
+@asynccontextmanager
+async def build_client(url: str, concurrency: int, timeout: float):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    if url:
+        async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+            yield client
+        return
+
+    # In-process: the backend shares this event loop, so lag is the server's.
+    from main import app
+    async with lifespan(app), httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://loadtest",
+        timeout=timeout,
+        limits=limits,
+    ) as client:
+        yield client
+
+
+async def run(args) -> dict:
+    weights = parse_mix(args.mix)
+    recorder = Recorder()
+    lag: List[float] = []
+    stop = asyncio.Event()
+
+    async with build_client(args.url, args.concurrency, args.timeout) as client:
+        if args.warmup:
+            await asyncio.gather(*(
+                client.post("/api/execute", json=MIXES[name]())
+                for name in weights
+            ), return_exceptions=True)
+
+        lag_task = asyncio.create_task(monitor_loop_lag(lag, stop))
+        recorder.started = time.perf_counter()
+        deadline = recorder.started + args.duration
+        budget = [args.requests or float("inf")]
+
+        await asyncio.gather(*(
+            worker(client, weights, recorder, deadline, budget)
+            for _ in range(args.concurrency)
+        ))
+
+        recorder.finished = time.perf_counter()
+        stop.set()
+        await lag_task
+
+    return recorder.report(lag)
+
+
+def print_report(report: dict):
+    print(f"\nRequests:    {report['requests']} in {report['elapsed_s']}s")
+    print(f"Throughput:  {report['throughput_rps']} req/s ({report['success_rps']} ok/s)")
+    print(f"Statuses:    {report['statuses']}")
+
+    header = f"{'':18}{'count':>8}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}"
+    print("\n" + header)
+    rows = [("all", report["latency"])] + sorted(report["latency_by_mix"].items())
+    rows.append(("event-loop lag", report["loop_lag"]))
+    for name, s in rows:
+        print(f"{name:18}{s['count']:>8}{s['p50_ms']:>10}{s['p90_ms']:>10}"
+              f"{s['p99_ms']:>10}{s['max_ms']:>10}")
+    print("(latencies in ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test /api/execute")
+    parser.add_argument("--url", default="",
+                        help="Target base URL (default: in-process main.app)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run")
+    parser.add_argument("--requests", type=int, default=0,
+                        help="Stop after this many requests (0 = duration only)")
+    parser.add_argument("--mix", default="chat=5,guarded_summary=3,research=2")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--warmup", action="store_true",
+                        help="Run each workflow once before measuring")
+    parser.add_argument("--json", dest="json_path", default="",
+                        help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+
+    if args.json_path:
+        with open(args.json_path, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
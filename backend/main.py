@@ -29,36 +29,41 @@ load_dotenv()
 # ================================
 # Standard Library Imports
 # ================================
-import shutil
-import time
+import asyncio
 from pathlib import Path
 from typing import List
+from urllib.parse import parse_qsl
 
 # ================================
 # Third-Party Imports
 # ================================
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request
+from fastapi.responses import FileResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 # ================================
 # Local Application Imports
 # ================================
-from models import ExecuteRequest, ExecuteResponse, Workflow
+from models import (
+    ExecuteRequest,
+    ExecuteResponse,
+    ResumeRequest,
+    SavedWorkflowExecuteRequest,
+    Workflow,
+)
+from settings import CACHE_DIR
 from registry import registry
-from engine import WorkflowEngine
-from services.gemini import gemini_generate
-
-# ================================
-# Agent Injection (Gemini)
-# ================================
-import agents.llm
-import agents.summarizer
-import agents.guardrail
-
-agents.llm.gemini_generate = gemini_generate
-agents.summarizer.gemini_generate = gemini_generate
-agents.guardrail.gemini_generate = gemini_generate
-
+from engine import Plan, WorkflowEngine
+from services.uploads import UploadStore, iter_upload_file
+from services.artifacts import ArtifactStore, parse_range
+from services.checkpoints import CHECKPOINTS, CheckpointStore
+from services.document_cache import document_cache
+from services.fetcher import fetcher
+from services.scheduler import llm_scheduler, tool_scheduler
+from services.executors import block_detector, node_executors
+from services.profiling import finish_profile, profile_path, should_profile, span, start_profile
+from services.workers import ExecutionRegistry, WorkflowStore
+from responses import encode_response, project_results
 
 # ================================
 # FastAPI App Initialization
@@ -70,26 +75,139 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Profile-Id", "X-Profile-Url"],
 )
 
 
+# ================================
+# Execution Profiling
+# ================================
+def _is_execution(path: str) -> bool:
+    return path == "/api/execute" or (
+        path.startswith(("/api/workflows/", "/api/executions/"))
+        and path.endswith(("/execute", "/resume"))
+    )
+
+
+class ProfileExecutions:
+    """
+    Profile workflow executions when asked (`?profile=1`) or sampled
+    (PROFILE_SAMPLE_RATE). The profile wraps the whole request, so
+    body validation and response encoding are included; it is saved
+    before the last body chunk goes out, so the returned profile URL
+    is ready when the client reads it.
+
+    A plain ASGI middleware: every other request is passed straight
+    to the app.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _is_execution(scope["path"]):
+            return await self.app(scope, receive, send)
+
+        query = scope.get("query_string", b"")
+        requested = b"profile=" in query and dict(
+            parse_qsl(query.decode("latin-1"), keep_blank_values=True)
+        ).get("profile") in ("1", "true")
+        if not should_profile(requested):
+            return await self.app(scope, receive, send)
+
+        profile = start_profile()
+        if profile is None:
+            return await self.app(scope, receive, send)
+
+        scope.setdefault("state", {})["profile"] = profile
+        finished = False
+
+        async def finish():
+            nonlocal finished
+            if not finished:
+                finished = True
+                await asyncio.to_thread(finish_profile, profile)
+
+        async def send_profiled(message):
+            if message["type"] == "http.response.start":
+                message = {
+                    **message,
+                    "headers": [
+                        *message.get("headers", []),
+                        (b"x-profile-id", profile.id.encode()),
+                        (b"x-profile-url", f"/api/profiles/{profile.id}".encode()),
+                    ],
+                }
+            elif message["type"] == "http.response.body" and not message.get("more_body"):
+                await finish()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_profiled)
+        finally:
+            await finish()
+
+
+app.add_middleware(ProfileExecutions)
+
+
+@app.get("/api/profiles/{profile_id}")
+async def get_profile(profile_id: str):
+    """Download a stored profile (open it in https://www.speedscope.app)"""
+    path = profile_path(profile_id)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(
+        path,
+        media_type="application/json",
+        filename=path.name,
+    )
+
+
 # ================================
 # File Upload Configuration
 # ================================
 UPLOAD_DIR = Path("uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
 
-ALLOWED_EXTENSIONS = {".pdf", ".jpg", ".jpeg", ".png"}
+# Content-addressed: identical uploads share one file on disk
+upload_store = UploadStore(UPLOAD_DIR)
+
+
+# ================================
+# Artifact Store (large node outputs)
+# ================================
+ARTIFACT_DIR = CACHE_DIR / "artifacts"
+artifact_store = ArtifactStore(ARTIFACT_DIR)
+
+
+# ================================
+# Execution Checkpoints (resume)
+# ================================
+checkpoint_store = (
+    CheckpointStore(CACHE_DIR / "checkpoints", artifacts=artifact_store)
+    if CHECKPOINTS
+    else None
+)
 
 
 # ================================
 # Core Engine
 # ================================
-engine = WorkflowEngine(registry)
+engine = WorkflowEngine(registry, artifacts=artifact_store, checkpoints=checkpoint_store)
+
+# ================================
+# Shared State (all serve.py workers)
+# ================================
+# Saved workflows, with per-worker compiled plans
+workflow_store = WorkflowStore(CACHE_DIR / "workflows")
+
+# Which worker runs which execution id (cancel / resume across workers)
+execution_registry = ExecutionRegistry(CACHE_DIR / "executions")
 
-# In-memory storage 
 
-workflows_db = {}
+def compile_plan(workflow: dict) -> Plan:
+    return Plan(Workflow(**workflow))
 
 
 # ================================
@@ -107,6 +225,42 @@ async def health():
     return {"status": "healthy", "gemini": True}
 
 
+@app.get("/api/metrics/llm")
+async def llm_metrics():
+    """LLM latency and model routing statistics"""
+    return registry.llm.metrics()
+
+
+@app.get("/api/metrics/scheduler")
+async def scheduler_metrics():
+    """Queue depths, dispatch counts and wait percentiles per priority"""
+    return {
+        "llm": llm_scheduler.metrics(),
+        "tools": tool_scheduler.metrics(),
+    }
+
+
+@app.get("/api/metrics/executors")
+async def executor_metrics():
+    """Node dispatch per executor tier and (debug mode) loop blocking"""
+    return {
+        **node_executors.metrics(),
+        "loop_blocking": block_detector.metrics() if block_detector else None,
+    }
+
+
+@app.get("/api/metrics/checkpoints")
+async def checkpoint_metrics():
+    """Checkpoint writer backlog and write failures"""
+    return checkpoint_store.metrics() if checkpoint_store else {"enabled": False}
+
+
+@app.get("/api/metrics/fetch")
+async def fetch_metrics():
+    """URL fetcher cache statistics"""
+    return fetcher.metrics()
+
+
 @app.get("/api/nodes")
 async def get_nodes():
     """Return all available agent/tool metadata"""
@@ -119,81 +273,294 @@ async def get_nodes():
 @app.post("/api/upload")
 async def upload_file(file: UploadFile = File(...)):
     """
-    Upload PDF or image files.
-    Returns saved file path for workflow usage.
+    Upload PDF or image files (multipart).
+    Returns saved file path and content hash for workflow usage.
     """
     try:
-        file_ext = Path(file.filename).suffix.lower()
-
-        if file_ext not in ALLOWED_EXTENSIONS:
-            return {
-                "success": False,
-                "error": f"Unsupported file type: {file_ext}"
-            }
-
-        timestamp = int(time.time() * 1000)
-        safe_filename = f"{timestamp}_{file.filename}"
-        file_path = UPLOAD_DIR / safe_filename
-
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-
-        return {
-            "success": True,
-            "file_path": str(file_path),
-            "file_name": file.filename,
-            "file_size": file_path.stat().st_size,
-        }
+        stored = await upload_store.save(iter_upload_file(file), file.filename)
+        return {"success": True, "file_name": file.filename, **stored}
 
     except Exception as exc:
         return {"success": False, "error": str(exc)}
 
 
+@app.put("/api/upload/stream")
+async def upload_file_stream(request: Request, filename: str):
+    """
+    Streaming upload: the raw request body is the file content.
+    Bytes are hashed and written as they arrive, never buffered whole.
+    """
+    try:
+        stored = await upload_store.save(request.stream(), filename)
+        return {"success": True, "file_name": filename, **stored}
+
+    except Exception as exc:
+        return {"success": False, "error": str(exc)}
+
+
+@app.get("/api/upload/{content_hash}")
+async def find_upload(content_hash: str):
+    """
+    Look up an upload by SHA-256 so clients can skip re-sending
+    bytes the server already stores.
+    """
+    path = upload_store.find(content_hash)
+    if not path:
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+    return {
+        "success": True,
+        "file_path": str(path),
+        "content_hash": content_hash.lower(),
+        "file_size": path.stat().st_size,
+    }
+
+
 # ================================
 # Workflow Execution
 # ================================
 @app.post("/api/execute", response_model=ExecuteResponse)
-async def execute_workflow(req: ExecuteRequest):
+async def execute_workflow(req: ExecuteRequest, request: Request):
     """
-    Execute a workflow DAG using WorkflowEngine
+    Execute a workflow DAG using WorkflowEngine.
+
+    The response is encoded directly (orjson + optional gzip/brotli)
+    instead of being re-validated through ExecuteResponse.
+
+    `?profile=1` records a profile of the request (see
+    ProfileExecutions); its id and span totals are added to the logs.
+    """
+    return await run_execution(req, request, workflow=req.workflow)
+
+
+@app.post("/api/workflows/{workflow_id}/execute", response_model=ExecuteResponse)
+async def execute_saved_workflow(
+    workflow_id: str, req: SavedWorkflowExecuteRequest, request: Request
+):
+    """
+    Execute a saved workflow by id, with optional input node overrides.
+
+    The workflow was validated and compiled when it was saved, so the
+    request body only carries the inputs and execution options.
+    """
+    plan = await workflow_store.plan(workflow_id, compile_plan)
+    if plan is None:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    if isinstance(plan, Exception):
+        raise HTTPException(status_code=400, detail=str(plan))
+
+    overrides = {}
+    for node_id, value in req.inputs.items():
+        node = plan.node_map.get(node_id)
+        if node is None or node.subtype != "input":
+            raise HTTPException(status_code=400, detail=f"Not an input node: {node_id}")
+        overrides[node_id] = value if isinstance(value, dict) else {"value": value}
+
+    return await run_execution(req, request, plan=plan, overrides=overrides)
+
+
+async def run_execution(options, request: Request, workflow=None, plan=None, **resume):
     """
+    Run a workflow with the given ExecutionOptions and encode the
+    response. `resume` holds extra engine arguments (overrides,
+    completed, rerun).
+    """
+    if not execution_registry.register(options.execution_id):
+        raise HTTPException(status_code=409, detail="Execution is already running")
+
     try:
-        results, logs = await engine.execute(req.workflow)
-        return ExecuteResponse(
-            success=True,
-            status="success",
-            result=results,
-            logs=logs,
+        results, logs = await engine.execute(
+            workflow,
+            deadline_s=options.deadline_s,
+            execution_id=options.execution_id,
+            retain=options.retain,
+            priority=options.priority,
+            tenant=options.tenant,
+            result_nodes=options.result_nodes,
+            memory_budget_bytes=(
+                int(options.memory_budget_mb * 1024 * 1024) if options.memory_budget_mb else None
+            ),
+            plan=plan,
+            **resume,
         )
     except Exception as exc:
         raise HTTPException(status_code=400, detail=str(exc))
+    finally:
+        # Other workers see the run as finished once its checkpoint is on disk
+        execution_registry.release(
+            options.execution_id, checkpoint_store.flush if checkpoint_store else None
+        )
+
+    # "completed" → success; otherwise "cancelled" / "deadline_exceeded"
+    event = logs[-1]["event"]
+
+    profile = getattr(request.state, "profile", None)
+    if profile:
+        logs[0]["profile"] = {
+            "profile_id": profile.id,
+            "url": f"/api/profiles/{profile.id}",
+            "spans_ms": profile.span_totals(),
+        }
+
+    with span("serialize"):
+        return encode_response(
+            {
+                "success": True,
+                "status": "success" if event == "completed" else event,
+                "execution_id": logs[-1]["execution_id"],
+                "result": project_results(results, options.result_nodes, options.result_fields),
+                "logs": logs,
+            },
+            request.headers.get("accept-encoding", ""),
+        )
+
+
+@app.post("/api/executions/{execution_id}/resume", response_model=ExecuteResponse)
+async def resume_execution(execution_id: str, req: ResumeRequest, request: Request):
+    """
+    Resume a checkpointed execution from its completed frontier,
+    optionally with edited config for some nodes (e.g. the one that
+    failed). The resumed run gets its own execution id and checkpoint.
+    """
+    if checkpoint_store is None:
+        raise HTTPException(status_code=404, detail="Checkpoints are disabled")
+    if execution_id in engine.executions or execution_registry.owner(execution_id):
+        raise HTTPException(status_code=409, detail="Execution is still running")
+
+    checkpoint = await checkpoint_store.load(execution_id)
+    if checkpoint is None:
+        raise HTTPException(status_code=404, detail="Checkpoint not found")
+
+    overrides = dict(checkpoint.manifest.get("overrides") or {})
+    for node_id, config in req.config_overrides.items():
+        overrides[node_id] = {**overrides.get(node_id, {}), **config}
+
+    return await run_execution(
+        req,
+        request,
+        workflow=Workflow(**checkpoint.manifest["workflow"]),
+        overrides=overrides,
+        completed=checkpoint.outputs,
+        rerun=set(req.config_overrides),
+    )
+
+
+@app.get("/api/executions")
+async def list_executions():
+    """Currently running executions (of the worker answering, see serve.py)"""
+    return [
+        {
+            "execution_id": execution.id,
+            "running_nodes": execution.running_nodes,
+            "started_at": execution.started_at,
+        }
+        for execution in engine.executions.values()
+    ]
+
+
+@app.post("/api/executions/{execution_id}/cancel")
+async def cancel_execution(execution_id: str):
+    """
+    Cancel a running execution. The node in flight is interrupted
+    (its worker process is killed) and remaining nodes are skipped.
+    """
+    if not engine.cancel(execution_id) and not execution_registry.request_cancel(execution_id):
+        raise HTTPException(status_code=404, detail="Execution not found")
+    return {"success": True, "message": "Cancellation requested"}
 
 
 # ================================
-# Workflow Persistence (In-Memory)
+# Artifacts
+# ================================
+@app.on_event("startup")
+async def prune_artifacts():
+    artifact_store.prune()
+    document_cache.prune()
+    if checkpoint_store:
+        checkpoint_store.prune()
+
+
+@app.on_event("startup")
+async def install_cancel_handler():
+    execution_registry.install(engine)
+
+
+@app.on_event("shutdown")
+async def close_fetcher():
+    await fetcher.close()
+    node_executors.shutdown()
+    if checkpoint_store:
+        await checkpoint_store.flush()
+
+
+@app.get("/api/artifacts/{artifact_id}")
+async def get_artifact(artifact_id: str, request: Request):
+    """
+    Fetch a stored node output by id.
+    Supports single `Range: bytes=start-end` requests.
+    """
+    ref = artifact_store.get(artifact_id)
+    if not ref:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+
+    range_header = request.headers.get("range")
+    if not range_header:
+        return FileResponse(
+            ref.path,
+            media_type="text/plain; charset=utf-8",
+            headers={"Accept-Ranges": "bytes"},
+        )
+
+    try:
+        start, end = parse_range(range_header, ref.size)
+    except ValueError:
+        return Response(
+            status_code=416,
+            headers={"Content-Range": f"bytes */{ref.size}"},
+        )
+
+    return Response(
+        content=ref.read_bytes(start, end),
+        status_code=206,
+        media_type="text/plain; charset=utf-8",
+        headers={
+            "Accept-Ranges": "bytes",
+            "Content-Range": f"bytes {start}-{end}/{ref.size}",
+        },
+    )
+
+
+# ================================
+# Workflow Persistence (shared by all workers)
 # ================================
 @app.post("/api/workflows/save")
 async def save_workflow(workflow: Workflow):
-    workflows_db[workflow.id] = workflow.dict()
+    # Compile once for /api/workflows/{id}/execute; saving again
+    # replaces the plan. Invalid graphs can still be saved (drafts).
+    try:
+        plan = Plan(workflow)
+    except Exception as exc:
+        plan = exc
+
+    await workflow_store.save(workflow.id, workflow.dict(), plan)
     return {"success": True, "message": "Workflow saved"}
 
 
 @app.get("/api/workflows", response_model=List[Workflow])
 async def list_workflows():
-    return list(workflows_db.values())
+    return await workflow_store.list()
 
 
 @app.get("/api/workflows/{workflow_id}", response_model=Workflow)
 async def get_workflow(workflow_id: str):
-    if workflow_id not in workflows_db:
+    workflow = await workflow_store.get(workflow_id)
+    if workflow is None:
         raise HTTPException(status_code=404, detail="Workflow not found")
-    return workflows_db[workflow_id]
+    return workflow
 
 
 @app.delete("/api/workflows/{workflow_id}")
 async def delete_workflow(workflow_id: str):
-    if workflow_id not in workflows_db:
+    if not await workflow_store.delete(workflow_id):
         raise HTTPException(status_code=404, detail="Workflow not found")
-
-    del workflows_db[workflow_id]
     return {"success": True, "message": "Workflow deleted"}
@@ -7,7 +7,7 @@ Pydantic models for:
 - Execution request / response
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Literal, Optional
 from pydantic import BaseModel, Field
 
 
@@ -54,19 +54,76 @@ class Workflow(BaseModel):
 # Execution Models
 # ================================
 
-class ExecuteRequest(BaseModel):
+class ExecutionOptions(BaseModel):
     """
-    Request payload to execute a workflow.
+    Options shared by every way of running a workflow.
+
+    `result_nodes` / `result_fields` project the response down to the
+    listed node ids and output fields (default: everything).
+
+    `execution_id` (optional, client-chosen) allows cancelling the run
+    via `/api/executions/{execution_id}/cancel`; `deadline_s` bounds
+    the total execution time.
+
+    Intermediate outputs not in `result_nodes` are released once their
+    consumers have run (see services/output_memory.py): `retain` lists
+    node ids to keep in memory regardless; `memory_budget_mb` caps the
+    text held in memory before outputs are spilled to disk.
+
+    `priority` ("interactive" or "batch") and `tenant` place the run's
+    LLM and tool calls in the matching scheduler queue (see
+    services/scheduler.py).
+    """
+    execution_id: Optional[str] = None
+    deadline_s: Optional[float] = Field(default=None, gt=0)
+
+    result_nodes: Optional[List[str]] = None
+    result_fields: Optional[List[str]] = None
+
+    retain: Optional[List[str]] = None
+    memory_budget_mb: Optional[float] = Field(default=None, gt=0)
+
+    priority: Literal["interactive", "batch"] = "interactive"
+    tenant: Optional[str] = None
+
+
+class ExecuteRequest(ExecutionOptions):
+    """
+    Request payload to execute a workflow sent in full.
     """
     workflow: Workflow
 
 
+class SavedWorkflowExecuteRequest(ExecutionOptions):
+    """
+    Request payload to execute a saved workflow by id.
+
+    `inputs` maps input node ids to either a value (replacing the
+    node's `value`) or a config dict merged over the saved config,
+    e.g. {"value": "uploads/<hash>.pdf", "input_type": "file"}.
+    """
+    inputs: Dict[str, Any] = Field(default_factory=dict)
+
+
+class ResumeRequest(ExecutionOptions):
+    """
+    Request payload to resume a checkpointed execution.
+
+    Nodes that completed in the earlier run are restored; the rest run
+    again. `config_overrides` (node id -> config merged over the saved
+    one), typically for the node that failed, forces those nodes and
+    everything downstream of them to re-run.
+    """
+    config_overrides: Dict[str, Dict[str, Any]] = Field(default_factory=dict)
+
+
 class ExecuteResponse(BaseModel):
     """
     Standardized execution response.
     """
     success: bool
     status: str = "success"
+    execution_id: Optional[str] = None
 
     result: Optional[Dict[str, Any]] = None
     logs: Optional[List[Dict[str, Any]]] = None
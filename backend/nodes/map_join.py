@@ -0,0 +1,177 @@
+# backend/nodes/map_join.py
+
+import json
+import re
+
+from agent_base import BaseNode
+
+
+class MapNode(BaseNode):
+    """
+    Fan-out node.
+    Splits its input into items; the engine then runs the downstream
+    subgraph (up to the matching Join node) once per item, concurrently.
+
+    Config:
+    - split: auto | json | search_results | markdown_sections | paragraphs | lines
+    - max_items: cap on the number of items (default 50)
+    - concurrency: parallel item executions (read by the engine, default 4)
+
+    Behind a streaming parent the engine splits each chunk as it
+    arrives, so items start before the parent has finished.
+    """
+
+    accepts_stream = True
+
+    def __init__(self):
+        super().__init__(
+            name="Map",
+            description="Run the downstream steps once per item",
+            node_type="tool",
+            icon="🔀",
+        )
+
+    async def execute(self, node_input, parent_outputs):
+        split = node_input.get("split", "auto")
+        max_items = int(node_input.get("max_items", 50))
+
+        try:
+            items = self._split(split, parent_outputs)
+        except ValueError as e:
+            return {"success": False, "error": str(e), "node_type": "map"}
+
+        items = [item for item in items if item.strip()][:max_items]
+        if not items:
+            return {
+                "success": False,
+                "error": "Nothing to map over",
+                "node_type": "map",
+            }
+
+        return {
+            "success": True,
+            "data": f"{len(items)} items",
+            "items": items,
+            "count": len(items),
+            "split": split,
+            "node_type": "map",
+        }
+
+    # ================================
+    # Splitting strategies
+    # ================================
+    def _split(self, split, parent_outputs):
+        if split in ("auto", "search_results"):
+            results = self._search_results(parent_outputs)
+            if results is not None:
+                return results
+            if split == "search_results":
+                raise ValueError("Parent output has no search results")
+
+        text = self.get_parent_data(parent_outputs)
+
+        if split in ("auto", "json"):
+            items = self._json_list(text)
+            if items is not None:
+                return items
+            if split == "json":
+                raise ValueError("Input is not a JSON list")
+
+        if split in ("auto", "markdown_sections"):
+            sections = self._markdown_sections(text)
+            if len(sections) > 1 or split == "markdown_sections":
+                return sections
+
+        if split == "lines":
+            return text.splitlines()
+
+        # auto fallback / "paragraphs"
+        return re.split(r"\n\s*\n", text)
+
+    @staticmethod
+    def _search_results(parent_outputs):
+        """Results of a WebSearchTool parent (`json_data`)."""
+        for output in parent_outputs.values():
+            if not output.get("success") or not output.get("json_data"):
+                continue
+            try:
+                payload = json.loads(str(output["json_data"]))
+            except ValueError:
+                continue
+            return [
+                f"{r.get('title', '')}\n{r.get('snippet', '')}\nSource: {r.get('url', '')}"
+                for r in payload.get("results", [])
+            ]
+        return None
+
+    @staticmethod
+    def _json_list(text):
+        try:
+            value = json.loads(text)
+        except ValueError:
+            return None
+        if not isinstance(value, list):
+            return None
+        return [
+            item if isinstance(item, str) else json.dumps(item, ensure_ascii=False)
+            for item in value
+        ]
+
+    @staticmethod
+    def _markdown_sections(text):
+        """Split before every markdown heading."""
+        return re.split(r"(?m)^(?=#{1,6}\s)", text)
+
+
+class JoinNode(BaseNode):
+    """
+    Collects the per-item outputs of a mapped subgraph, in item order.
+
+    Config:
+    - separator: text placed between items in `data` (default blank line)
+    """
+
+    def __init__(self):
+        super().__init__(
+            name="Join",
+            description="Collect per-item results in order",
+            node_type="tool",
+            icon="🔗",
+        )
+
+    async def execute(self, node_input, parent_outputs):
+        separator = node_input.get("separator", "\n\n")
+        items = []
+        failed = 0
+
+        for output in parent_outputs.values():
+            if output.get("mapped"):
+                # Mapped parent: one output per item
+                for item_output in output["items"]:
+                    if item_output.get("success"):
+                        items.append(str(item_output.get("data", "")))
+                    else:
+                        failed += 1
+
+            elif output.get("node_type") == "map" and output.get("success"):
+                # Join directly after Map: pass the items through
+                items.extend(output["items"])
+
+            elif output.get("success"):
+                items.append(str(output.get("data", "")))
+
+        if not items:
+            return {
+                "success": False,
+                "error": "No successful items to join",
+                "node_type": "join",
+            }
+
+        return {
+            "success": True,
+            "data": separator.join(items),
+            "items": items,
+            "count": len(items),
+            "failed": failed,
+            "node_type": "join",
+        }
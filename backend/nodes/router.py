@@ -0,0 +1,255 @@
+# backend/nodes/router.py
+
+import ast
+import asyncio
+import operator
+import os
+import re
+
+from agent_base import BaseAgent
+from services.subprocess_runner import run_killable
+
+
+# `matches` patterns come from workflow config: cap their length, and
+# evaluate routes that use them in a killable child with a time limit
+# (a backtracking pattern can hold the CPU for minutes)
+MATCH_PATTERN_CHARS = int(os.getenv("ROUTER_MATCH_PATTERN_CHARS", 200))
+MATCH_TIMEOUT_S = float(os.getenv("ROUTER_MATCH_TIMEOUT_S", 2))
+
+
+# ================================
+# Safe expression evaluation
+# ================================
+_BIN_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Mod: operator.mod,
+}
+
+_CMP_OPS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.In: lambda a, b: a in b,
+    ast.NotIn: lambda a, b: a not in b,
+}
+
+
+def _matches(pattern, text):
+    pattern = str(pattern)
+    if len(pattern) > MATCH_PATTERN_CHARS:
+        raise ValueError(f"Pattern longer than {MATCH_PATTERN_CHARS} characters")
+    return re.search(pattern, str(text)) is not None
+
+
+_FUNCTIONS = {
+    "len": len,
+    "int": int,
+    "float": float,
+    "str": str,
+    "lower": lambda s: str(s).lower(),
+    "matches": _matches,
+}
+
+
+def evaluate(expression, variables):
+    """
+    Evaluate a small, side-effect free expression language:
+    literals, variables, arithmetic, comparisons (incl. `in`),
+    and/or/not, subscripts and the functions in `_FUNCTIONS`.
+
+    Raises:
+        ValueError: unsupported syntax or unknown name
+    """
+    tree = ast.parse(expression, mode="eval")
+
+    def ev(node):
+        if isinstance(node, ast.Expression):
+            return ev(node.body)
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, ast.Name):
+            if node.id in ("true", "True"):
+                return True
+            if node.id in ("false", "False"):
+                return False
+            if node.id not in variables:
+                raise ValueError(f"Unknown name: {node.id}")
+            return variables[node.id]
+        if isinstance(node, ast.BoolOp):
+            values = (ev(value) for value in node.values)
+            return all(values) if isinstance(node.op, ast.And) else any(values)
+        if isinstance(node, ast.UnaryOp):
+            if isinstance(node.op, ast.Not):
+                return not ev(node.operand)
+            if isinstance(node.op, ast.USub):
+                return -ev(node.operand)
+        if isinstance(node, ast.BinOp) and type(node.op) in _BIN_OPS:
+            left, right = ev(node.left), ev(node.right)
+            if isinstance(node.op, ast.Mult) and not (
+                isinstance(left, (int, float)) and isinstance(right, (int, float))
+            ):
+                raise ValueError("Only numbers can be multiplied")
+            return _BIN_OPS[type(node.op)](left, right)
+        if isinstance(node, ast.Compare):
+            left = ev(node.left)
+            for op, comparator in zip(node.ops, node.comparators):
+                right = ev(comparator)
+                if not _CMP_OPS[type(op)](left, right):
+                    return False
+                left = right
+            return True
+        if isinstance(node, ast.Subscript):
+            container = ev(node.value)
+            key = ev(node.slice)
+            try:
+                return container[key]
+            except (KeyError, IndexError, TypeError):
+                return None
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+            function = _FUNCTIONS.get(node.func.id)
+            if function and not node.keywords:
+                return function(*(ev(arg) for arg in node.args))
+
+        raise ValueError(f"Unsupported expression: {ast.dump(node)[:60]}")
+
+    return ev(tree)
+
+
+def select_routes(routes, variables, multi=False):
+    """Targets of the routes whose `when` holds (the first only unless `multi`)."""
+    selected = []
+    for route in routes:
+        if evaluate(route.get("when", "False"), variables):
+            selected.append(route["target"])
+            if not multi:
+                break
+    return selected
+
+
+class RouterNode(BaseAgent):
+    """
+    Conditional router.
+    Selects one or more outgoing edges; the engine skips every node
+    reachable only through untaken edges. A failed router selects none.
+
+    Config:
+    - mode: "expression" (default) or "llm"
+    - routes: [{"target": <node id>, "when": <expression>}]   (expression)
+              [{"target": <node id>, "label": <category>}]    (llm)
+    - default: target node id used when nothing matches
+    - multi: select every matching route instead of the first
+
+    Expression variables: `data` (combined parent text), `length`,
+    `outputs` (parent id -> output) and the fields of the first
+    successful parent output (e.g. `count`, `node_type`).
+
+    `matches(pattern, text)` takes patterns of at most
+    ROUTER_MATCH_PATTERN_CHARS characters; routes using it are
+    evaluated in a child process killed after ROUTER_MATCH_TIMEOUT_S.
+    """
+
+    def __init__(self, llm):
+        super().__init__(
+            name="Router",
+            description="Route to branches by condition or LLM classification",
+            llm=llm,
+            icon="🧭",
+        )
+
+    async def execute(self, node_input, parent_outputs):
+        routes = node_input.get("routes") or []
+        mode = node_input.get("mode", "expression")
+        data = self.get_parent_data(parent_outputs)
+
+        if not routes:
+            return {"success": False, "error": "No routes configured", "node_type": "router"}
+
+        try:
+            if mode == "llm":
+                selected, detail = await self._classify(node_input, routes, data)
+            else:
+                selected, detail = await self._match(node_input, routes, data, parent_outputs)
+        except asyncio.TimeoutError:
+            return {
+                "success": False,
+                "error": f"Routing failed: pattern matching took longer than {MATCH_TIMEOUT_S}s",
+                "node_type": "router",
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Routing failed: {str(e)}",
+                "node_type": "router",
+            }
+
+        if not selected and node_input.get("default"):
+            selected = [node_input["default"]]
+
+        return {
+            "success": True,
+            "data": data,
+            "selected": selected,
+            "route_detail": detail,
+            "node_type": "router",
+        }
+
+    async def _match(self, node_input, routes, data, parent_outputs):
+        first = next((o for o in parent_outputs.values() if o.get("success")), {})
+        variables = {
+            key: value for key, value in first.items()
+            if isinstance(value, (str, int, float, bool))
+        }
+        variables.update({
+            "data": data,
+            "length": len(data),
+            "outputs": parent_outputs,
+        })
+
+        multi = bool(node_input.get("multi"))
+        if not any("matches" in str(route.get("when", "")) for route in routes):
+            return select_routes(routes, variables, multi), {"mode": "expression"}
+
+        # The forked child inherits the variables; only targets come back
+        try:
+            selected = await asyncio.wait_for(
+                run_killable(select_routes, routes, variables, multi),
+                MATCH_TIMEOUT_S,
+            )
+        except RuntimeError as e:
+            # Keep the child's error line, not its traceback
+            raise ValueError(str(e).splitlines()[0]) from None
+
+        return selected, {"mode": "expression"}
+
+    async def _classify(self, node_input, routes, data):
+        labels = [route["label"] for route in routes]
+        prompt = (
+            "Classify the input document above into exactly one of these categories:\n"
+            + "\n".join(f"- {label}" for label in labels)
+            + "\n\nRespond with the category name only."
+        )
+
+        options = {"max_output_tokens": 20, **self.llm_options(node_input)}
+        answer = await self.llm(
+            prompt, context=data, task="classification", **options
+        )
+        normalized = answer.strip().strip(".").lower()
+
+        selected = [
+            route["target"] for route in routes
+            if route["label"].lower() == normalized
+        ]
+        if not selected:
+            # Tolerate extra words around the label
+            selected = [
+                route["target"] for route in routes
+                if route["label"].lower() in normalized
+            ][:1]
+
+        return selected, {"mode": "llm", "label": answer.strip()}
@@ -12,7 +12,7 @@ Central place that:
 # ================================
 # LLM Service
 # ================================
-from services.gemini import gemini_generate
+from services.llm import llm_service
 
 # ================================
 # Agents
@@ -26,12 +26,15 @@ from agents.guardrail import GuardrailAgent
 # Core Nodes
 # ================================
 from nodes.input_output import InputNode, OutputNode
+from nodes.map_join import MapNode, JoinNode
+from nodes.router import RouterNode
 
 # ================================
 # Tools
 # ================================
 from tools.document_extractor import DocumentExtractorTool
 from tools.web_search import WebSearchTool
+from tools.retriever import RetrievalTool
 
 
 class NodeRegistry:
@@ -44,13 +47,14 @@ class NodeRegistry:
 
     def __init__(self):
         
-        self.llm = gemini_generate
+        self.llm = llm_service
 
         # ----------------------------
         # Tool instances (singleton)
         # ----------------------------
         self.document_extractor = DocumentExtractorTool()
         self.web_search = WebSearchTool()
+        self.retriever = RetrievalTool()
 
         # Tools available to tool-aware LLMs
         self.available_tools = {
@@ -72,6 +76,11 @@ class NodeRegistry:
             "input": InputNode,
             "output": OutputNode,
 
+            # Flow control
+            "map": MapNode,
+            "join": JoinNode,
+            "router": lambda: RouterNode(self.llm),
+
             # Agents
             "guardrail": lambda: GuardrailAgent(self.llm),
             "summarizer": lambda: SummarizerAgent(self.llm),
@@ -81,6 +90,7 @@ class NodeRegistry:
             # Tools
             "document_extractor": lambda: self.document_extractor,
             "web_search": lambda: self.web_search,
+            "retriever": lambda: self.retriever,
         }
 
     # ================================
@@ -120,6 +130,24 @@ class NodeRegistry:
                 "description": "Final workflow output",
                 "icon": "📤",
             },
+            "map": {
+                "type": "map",
+                "name": "Map",
+                "description": "Run downstream steps once per item (list, search results, sections)",
+                "icon": "🔀",
+            },
+            "join": {
+                "type": "join",
+                "name": "Join",
+                "description": "Collect per-item results in order",
+                "icon": "🔗",
+            },
+            "router": {
+                "type": "router",
+                "name": "Router",
+                "description": "Send the input down one branch by condition or LLM classification",
+                "icon": "🧭",
+            },
 
             # Agents
             "guardrail": {
@@ -160,6 +188,12 @@ class NodeRegistry:
                 "description": "Search the web for information",
                 "icon": "🔍",
             },
+            "retriever": {
+                "type": "retriever",
+                "name": "Retriever",
+                "description": "Pass on only the document chunks relevant to a query (BM25)",
+                "icon": "🔎",
+            },
         }
 
         for subtype, meta in metadata_map.items():
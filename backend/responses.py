@@ -0,0 +1,116 @@
+# backend/responses.py
+
+"""
+Fast execution responses
+------------------------
+- Result projection by node id and field, straight from the engine's
+  output dicts
+- orjson encoding (falls back to stdlib json) with gzip / brotli
+  negotiated from Accept-Encoding
+"""
+
+import gzip
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+from fastapi.responses import Response
+
+from services.artifacts import present
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional codec
+    brotli = None
+
+
+# Responses smaller than this are not worth compressing
+COMPRESS_MIN_BYTES = 1024
+
+
+# ================================
+# Result projection
+# ================================
+# Well-known keys omitted when None (other keys are passed through)
+OPTIONAL_FIELDS = frozenset(("node_type", "status", "data", "error"))
+
+
+def project_output(output: Dict[str, Any], fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    Response form of one node output: `success` coerced to bool,
+    unset well-known keys dropped, artifact refs replaced by their
+    preview, and (with `fields`) only the requested keys kept.
+    """
+    wanted = None if fields is None else set(fields)
+    encoded = {"success": bool(output.get("success"))}
+
+    for key, value in output.items():
+        if key == "success" or (wanted is not None and key not in wanted):
+            continue
+        if value is None and key in OPTIONAL_FIELDS:
+            continue
+        # Only containers and refs need walking
+        encoded[key] = value if isinstance(value, (str, int, float, bool)) else present(value)
+
+    return encoded
+
+
+def project_results(
+    results: Dict[str, Dict[str, Any]],
+    node_ids: Optional[List[str]] = None,
+    fields: Optional[List[str]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Keep only the requested nodes / fields of an execution result.
+    """
+    selected = results if node_ids is None else {
+        node_id: results[node_id] for node_id in node_ids if node_id in results
+    }
+    return {
+        node_id: project_output(output, fields)
+        for node_id, output in selected.items()
+    }
+
+
+# ================================
+# Encoding
+# ================================
+def dumps(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, default=str)
+    return json.dumps(
+        payload, ensure_ascii=False, separators=(",", ":"), default=str
+    ).encode("utf-8")
+
+
+def encode_response(payload: Any, accept_encoding: str = "", status_code: int = 200) -> Response:
+    """
+    Encode a JSON payload, compressing with brotli or gzip when the
+    client accepts it and the body is large enough to benefit.
+    """
+    body = dumps(payload)
+    headers = {"Vary": "Accept-Encoding"}
+    accepted = {
+        item.split(";")[0].strip().lower()
+        for item in accept_encoding.split(",")
+        if item.strip()
+    }
+
+    if len(body) >= COMPRESS_MIN_BYTES:
+        if brotli is not None and "br" in accepted:
+            body = brotli.compress(body, quality=4)
+            headers["Content-Encoding"] = "br"
+        elif "gzip" in accepted:
+            body = gzip.compress(body, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+
+    return Response(
+        content=body,
+        status_code=status_code,
+        media_type="application/json",
+        headers=headers,
+    )
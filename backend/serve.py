@@ -0,0 +1,270 @@
+# backend/serve.py
+
+"""
+Pre-forked Multi-Worker Server
+------------------------------
+Loads the application (torch, Docling models, NodeRegistry) ONCE in
+a master process, then forks workers that share those pages
+copy-on-write and serve from a shared listening socket.
+
+- Heavy models are initialised before fork, then `gc.freeze()` keeps
+  the garbage collector from dirtying shared pages
+- Workers are recycled gracefully after `--max-requests` (with jitter),
+  above `--max-worker-rss-mb`, or on SIGHUP (rolling restart)
+- All workers share AGENTFORGE_CACHE_DIR for model and artifact caches
+
+Per-worker state: any worker may take any request, so state a later
+request needs lives under AGENTFORGE_CACHE_DIR (saved workflows,
+checkpoints, artifacts, profiles, and the owner of each client-named
+execution, see services/workers.py). Cancel and resume reach the
+worker running an execution through that registry (SHARED_WORKERS=1
+is set for the workers). `/api/executions`, the metrics endpoints and
+caches (compiled plans, semantic cache) remain per worker.
+
+Fork safety: the master imports torch and Docling before forking, and
+only the forking thread survives in a child. The master therefore
+keeps torch single-threaded until the fork (workers then get their
+share of the cores), and warns about any other live thread, whose
+locks would stay held in every worker.
+
+Usage (from backend/, Linux/macOS):
+    python serve.py --workers 8 --port 8000
+"""
+
+import argparse
+import gc
+import os
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+
+from settings import CACHE_DIR
+
+# Model caches must be configured before torch / docling are imported
+os.environ.setdefault("HF_HOME", str(CACHE_DIR / "huggingface"))
+os.environ.setdefault("TORCH_HOME", str(CACHE_DIR / "torch"))
+
+
+# ================================
+# Master: preload
+# ================================
+def preload(warm_models: bool):
+    """
+    Import the app and initialise Docling pipelines in the master.
+    """
+    # Never start torch's intra-op (OpenMP) pool before fork: a forked
+    # child entering it can hang
+    try:
+        import torch
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+
+    import main
+
+    if warm_models:
+        main.registry.document_extractor.warm_pipelines()
+
+    # Move everything allocated so far into the permanent generation
+    gc.collect()
+    gc.freeze()
+
+    others = [t.name for t in threading.enumerate() if t is not threading.main_thread()]
+    if others:
+        print(f"⚠️ Threads alive before fork (not copied into workers): {', '.join(others)}")
+    return main.app
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+# ================================
+# Worker
+# ================================
+def run_worker(app, sock: socket.socket, args):
+    """Child process body. Never returns."""
+    import uvicorn
+
+    # Default signal handling; uvicorn installs its own graceful handlers
+    for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD):
+        signal.signal(sig, signal.SIG_DFL)
+
+    # Avoid torch oversubscription: split cores between workers
+    try:
+        import torch
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // args.workers))
+    except ImportError:
+        pass
+
+    max_requests = None
+    if args.max_requests:
+        max_requests = args.max_requests + random.randint(0, args.max_requests_jitter)
+
+    config = uvicorn.Config(
+        app,
+        log_level=args.log_level,
+        limit_max_requests=max_requests,
+        timeout_graceful_shutdown=args.graceful_timeout,
+    )
+    server = uvicorn.Server(config)
+
+    try:
+        server.run(sockets=[sock])
+    finally:
+        os._exit(0)
+
+
+# ================================
+# Master: supervision
+# ================================
+class Arbiter:
+    """
+    Keeps `workers` children alive; handles shutdown and recycling.
+    """
+
+    def __init__(self, app, sock: socket.socket, args):
+        self.app = app
+        self.sock = sock
+        self.args = args
+        self.workers = {}  # pid -> start time
+        self.shutting_down = False
+        self.reload_requested = False
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            run_worker(self.app, self.sock, self.args)
+        self.workers[pid] = time.monotonic()
+        print(f"👷 Worker {pid} started")
+
+    def stop_worker(self, pid: int, sig=signal.SIGTERM):
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            self.workers.pop(pid, None)
+
+    def reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if self.workers.pop(pid, None) is not None:
+                print(f"♻️ Worker {pid} exited ({os.waitstatus_to_exitcode(status)})")
+
+    def check_memory(self):
+        """Recycle workers whose RSS grew past the limit (Linux only)."""
+        limit = self.args.max_worker_rss_mb
+        if not limit:
+            return
+
+        page_size = os.sysconf("SC_PAGE_SIZE")
+        for pid in list(self.workers):
+            try:
+                with open(f"/proc/{pid}/statm") as fh:
+                    rss_mb = int(fh.read().split()[1]) * page_size / (1024 * 1024)
+            except (OSError, IndexError, ValueError):
+                continue
+            if rss_mb > limit:
+                print(f"♻️ Worker {pid} RSS {rss_mb:.0f} MB > {limit} MB, recycling")
+                self.stop_worker(pid)
+
+    def rolling_restart(self):
+        """Replace workers one at a time so capacity never drops to zero."""
+        for pid in list(self.workers):
+            self.spawn()
+            self.stop_worker(pid)
+            time.sleep(self.args.restart_stagger)
+
+    def install_signals(self):
+        def on_terminate(signum, frame):
+            self.shutting_down = True
+
+        def on_hup(signum, frame):
+            self.reload_requested = True
+
+        signal.signal(signal.SIGTERM, on_terminate)
+        signal.signal(signal.SIGINT, on_terminate)
+        signal.signal(signal.SIGHUP, on_hup)
+
+    def run(self):
+        self.install_signals()
+        for _ in range(self.args.workers):
+            self.spawn()
+
+        while not self.shutting_down:
+            time.sleep(0.5)
+            self.reap()
+
+            if self.reload_requested:
+                self.reload_requested = False
+                self.rolling_restart()
+
+            self.check_memory()
+
+            while not self.shutting_down and len(self.workers) < self.args.workers:
+                self.spawn()
+
+        self.shutdown()
+
+    def shutdown(self):
+        print("🛑 Shutting down workers")
+        for pid in list(self.workers):
+            self.stop_worker(pid)
+
+        deadline = time.monotonic() + self.args.graceful_timeout + 5
+        while self.workers and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+
+        for pid in list(self.workers):
+            self.stop_worker(pid, signal.SIGKILL)
+        self.reap()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-forked AgentForge server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--max-requests", type=int, default=0,
+                        help="Recycle a worker after this many requests (0 = never)")
+    parser.add_argument("--max-requests-jitter", type=int, default=50)
+    parser.add_argument("--max-worker-rss-mb", type=int, default=0,
+                        help="Recycle a worker above this resident memory (0 = never)")
+    parser.add_argument("--graceful-timeout", type=int, default=30)
+    parser.add_argument("--restart-stagger", type=float, default=1.0,
+                        help="Seconds between worker replacements on SIGHUP")
+    parser.add_argument("--no-preload-models", action="store_true",
+                        help="Skip Docling pipeline warm-up in the master")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    if not hasattr(os, "fork"):
+        sys.exit("serve.py requires os.fork(); use `uvicorn main:app` on this platform")
+
+    if args.workers > 1:
+        # Cross-worker execution registry (services/workers.py)
+        os.environ["SHARED_WORKERS"] = "1"
+
+    sock = bind_socket(args.host, args.port, args.backlog)
+    app = preload(warm_models=not args.no_preload_models)
+    print(f"🚀 Master {os.getpid()} serving on {args.host}:{args.port} with {args.workers} workers")
+
+    Arbiter(app, sock, args).run()
+
+
+if __name__ == "__main__":
+    main()
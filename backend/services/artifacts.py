@@ -0,0 +1,199 @@
+# backend/services/artifacts.py
+
+"""
+Artifact store for large node outputs.
+
+Text fields above a size threshold are written once to disk
+(content-addressed) and replaced in the node output by an
+`ArtifactRef`. Refs are resolved lazily: `str(ref)` memory-maps the
+file and decodes it, so `get_parent_data` keeps working unchanged
+while API responses only carry a preview and a fetch URL.
+"""
+
+import asyncio
+import hashlib
+import mmap
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+
+ARTIFACT_THRESHOLD_BYTES = int(os.getenv("ARTIFACT_THRESHOLD_BYTES", 32 * 1024))
+ARTIFACT_TTL_S = int(os.getenv("ARTIFACT_TTL_S", 24 * 3600))
+PREVIEW_CHARS = 500
+
+
+class ArtifactRef:
+    """
+    Lightweight handle to a stored artifact.
+    Picklable and cheap to copy; the content is read only on demand.
+    """
+
+    __slots__ = ("artifact_id", "path", "size", "preview")
+
+    def __init__(self, artifact_id: str, path: Path, size: int, preview: str):
+        self.artifact_id = artifact_id
+        self.path = Path(path)
+        self.size = size
+        self.preview = preview
+
+    def read_bytes(self, start: int = 0, end: Optional[int] = None) -> bytes:
+        """Read a byte range (inclusive `end`) via mmap."""
+        if self.size == 0:
+            return b""
+        with open(self.path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            stop = self.size if end is None else end + 1
+            return mm[start:stop]
+
+    def __str__(self) -> str:
+        return self.read_bytes().decode("utf-8")
+
+    def __repr__(self) -> str:
+        return f"ArtifactRef({self.artifact_id!r}, size={self.size})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Response representation: preview plus fetch URL."""
+        return {
+            "artifact_id": self.artifact_id,
+            "size": self.size,
+            "preview": self.preview,
+            "truncated": True,
+            "url": f"/api/artifacts/{self.artifact_id}",
+        }
+
+
+def utf8_size_at_least(text: str, size: int) -> bool:
+    """Whether `text` takes at least `size` bytes as UTF-8."""
+    # Each character is 1 to 4 bytes: only encode when that is unclear
+    if len(text) >= size:
+        return True
+    if len(text) * 4 < size or text.isascii():
+        return False
+    return len(text.encode("utf-8")) >= size
+
+
+class ArtifactStore:
+    """
+    Content-addressed on-disk store: `<root>/<id[:2]>/<id>.txt`.
+    """
+
+    def __init__(self, root: Path, threshold: int = ARTIFACT_THRESHOLD_BYTES):
+        self.root = Path(root)
+        self.threshold = threshold
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, artifact_id: str) -> Path:
+        return self.root / artifact_id[:2] / f"{artifact_id}.txt"
+
+    # ================================
+    # Write
+    # ================================
+    def put(self, text: str) -> ArtifactRef:
+        """Store text once and return a handle to it."""
+        raw = text.encode("utf-8")
+        artifact_id = hashlib.sha256(raw).hexdigest()
+        path = self._path(artifact_id)
+
+        try:
+            # Already stored: mark it as in use again, so prune keeps it
+            os.utime(path)
+        except FileNotFoundError:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{uuid.uuid4().hex}.part")
+            tmp.write_bytes(raw)
+            os.replace(tmp, path)
+
+        return ArtifactRef(artifact_id, path, len(raw), text[:PREVIEW_CHARS])
+
+    async def externalize(
+        self, output: Dict[str, Any], threshold: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Replace large top-level string fields of a node output with refs
+        (`threshold` overrides the store's). Disk writes run off the
+        event loop.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        large = [
+            key for key, value in output.items()
+            if isinstance(value, str) and value and utf8_size_at_least(value, threshold)
+        ]
+        if not large:
+            return output
+
+        output = dict(output)
+        for key in large:
+            output[key] = await asyncio.to_thread(self.put, output[key])
+        return output
+
+    # ================================
+    # Read
+    # ================================
+    def get(self, artifact_id: str) -> Optional[ArtifactRef]:
+        if len(artifact_id) != 64 or not all(c in "0123456789abcdef" for c in artifact_id):
+            return None
+
+        path = self._path(artifact_id)
+        if not path.exists():
+            return None
+
+        size = path.stat().st_size
+        ref = ArtifactRef(artifact_id, path, size, "")
+        ref.preview = ref.read_bytes(0, min(size, PREVIEW_CHARS * 4) - 1).decode(
+            "utf-8", errors="ignore"
+        )[:PREVIEW_CHARS]
+        return ref
+
+    def prune(self, max_age_s: int = ARTIFACT_TTL_S) -> int:
+        """Delete artifacts not modified within `max_age_s`."""
+        cutoff = time.time() - max_age_s
+        removed = 0
+        for path in self.root.glob("*/*.txt"):
+            if path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+
+# ================================
+# Response Helpers
+# ================================
+def present(value: Any) -> Any:
+    """Recursively replace refs with their JSON preview form."""
+    if isinstance(value, ArtifactRef):
+        return value.to_dict()
+    if isinstance(value, dict):
+        return {key: present(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [present(item) for item in value]
+    return value
+
+
+def parse_range(header: str, size: int) -> Tuple[int, int]:
+    """
+    Parse a single `bytes=start-end` Range header into an inclusive
+    (start, end) pair.
+
+    Raises:
+        ValueError: malformed or unsatisfiable range
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        raise ValueError("Only single byte ranges are supported")
+
+    first, _, last = spec.strip().partition("-")
+    if first:
+        start = int(first)
+        end = int(last) if last else size - 1
+    else:
+        # Suffix range: last N bytes
+        length = int(last)
+        start = max(0, size - length)
+        end = size - 1
+
+    end = min(end, size - 1)
+    if start > end or start >= size:
+        raise ValueError("Range not satisfiable")
+    return start, end
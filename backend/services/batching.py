@@ -0,0 +1,87 @@
+# backend/services/batching.py
+
+"""
+Micro-batching of concurrent LLM prompts.
+
+Prompts arriving within `max_wait_ms` of each other (and sharing the
+same model / generation options) are collected into one batch of up
+to `max_batch` requests, dispatched through the backend's batch call,
+and the responses are fanned back out to the awaiting callers.
+"""
+
+import asyncio
+from typing import Dict, List, Set, Tuple
+
+from services.llm_backends import LLMBackend, LLMRequest
+
+
+class MicroBatcher:
+    def __init__(self, backend: LLMBackend, max_wait_ms: float = 5.0, max_batch: int = 16):
+        self.backend = backend
+        self.max_wait_s = max_wait_ms / 1000
+        self.max_batch = max_batch
+
+        self._pending: Dict[Tuple, List[Tuple[LLMRequest, asyncio.Future]]] = {}
+        self._timers: Dict[Tuple, asyncio.TimerHandle] = {}
+        self._inflight: Set[asyncio.Task] = set()
+
+        self.batches = 0
+        self.items = 0
+        self.size_histogram: Dict[int, int] = {}
+
+    async def submit(self, request: LLMRequest) -> str:
+        """Queue a request and wait for its share of the batch result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        key = request.batch_key()
+
+        queue = self._pending.setdefault(key, [])
+        queue.append((request, future))
+
+        if len(queue) >= self.max_batch:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = loop.call_later(self.max_wait_s, self._flush, key)
+
+        return await future
+
+    def _flush(self, key: Tuple):
+        timer = self._timers.pop(key, None)
+        if timer:
+            timer.cancel()
+
+        # Callers that were cancelled while waiting drop out of the batch
+        items = [item for item in self._pending.pop(key, []) if not item[1].done()]
+        if not items:
+            return
+
+        self.batches += 1
+        self.items += len(items)
+        self.size_histogram[len(items)] = self.size_histogram.get(len(items), 0) + 1
+
+        task = asyncio.ensure_future(self._dispatch(items))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, items: List[Tuple[LLMRequest, asyncio.Future]]):
+        try:
+            outputs = await self.backend.generate_batch([request for request, _ in items])
+        except Exception as exc:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for (_, future), output in zip(items, outputs):
+            if not future.done():
+                future.set_result(output)
+
+    def metrics(self) -> Dict:
+        return {
+            "max_wait_ms": self.max_wait_s * 1000,
+            "max_batch": self.max_batch,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0,
+            "size_histogram": dict(sorted(self.size_histogram.items())),
+        }
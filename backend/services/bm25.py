@@ -0,0 +1,211 @@
+# backend/services/bm25.py
+
+"""
+BM25 retrieval over document chunks.
+
+The index is built with NumPy in one pass: every (term, chunk) pair
+is counted with `np.unique`, postings are stored term-major (CSR
+layout) and the full BM25 weight of each posting is precomputed, so
+a query is a handful of array slices and one scatter-add. Indexes
+are persisted under CACHE_DIR/bm25, keyed by a hash of the indexed
+text and chunk size, and kept in a small in-memory LRU.
+"""
+
+import json
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from settings import CACHE_DIR
+
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+INDEX_LRU_SIZE = 16
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN.findall(text.lower()) if len(token) > 1]
+
+
+def chunk_text(text: str, chunk_chars: int = 1500) -> List[str]:
+    """
+    Pack paragraphs into chunks of at most `chunk_chars` characters;
+    longer paragraphs are split on their own.
+    """
+    chunks, current, size = [], [], 0
+
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+
+        pieces = [
+            paragraph[i:i + chunk_chars]
+            for i in range(0, len(paragraph), chunk_chars)
+        ]
+        for piece in pieces:
+            if current and size + len(piece) > chunk_chars:
+                chunks.append("\n\n".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += len(piece) + 2
+
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+class BM25Index:
+    """
+    Immutable BM25 index over a list of chunks.
+    """
+
+    def __init__(self, chunks, vocab, indptr, doc_ids, weights):
+        self.chunks = chunks
+        self.vocab = vocab                  # term -> term id
+        self.indptr = indptr                # term id -> postings slice
+        self.doc_ids = doc_ids              # posting -> chunk index
+        self.weights = weights              # posting -> BM25 weight
+
+    @classmethod
+    def build(cls, chunks: List[str], k1: float = BM25_K1, b: float = BM25_B) -> "BM25Index":
+        vocab: Dict[str, int] = {}
+        term_ids, chunk_ids = [], []
+
+        for chunk_index, chunk in enumerate(chunks):
+            tokens = tokenize(chunk)
+            term_ids.extend(vocab.setdefault(token, len(vocab)) for token in tokens)
+            chunk_ids.extend([chunk_index] * len(tokens))
+
+        n_chunks = len(chunks)
+        terms = np.asarray(term_ids, dtype=np.int64)
+        docs = np.asarray(chunk_ids, dtype=np.int64)
+
+        # Term frequency per (term, chunk), term-major
+        pairs, tf = np.unique(terms * max(n_chunks, 1) + docs, return_counts=True)
+        posting_terms = pairs // max(n_chunks, 1)
+        posting_docs = pairs % max(n_chunks, 1)
+
+        lengths = np.bincount(docs, minlength=n_chunks).astype(np.float64)
+        avg_length = lengths.mean() if n_chunks else 0.0
+        df = np.bincount(posting_terms, minlength=len(vocab)).astype(np.float64)
+        idf = np.log(1.0 + (n_chunks - df + 0.5) / (df + 0.5))
+
+        norm = k1 * (1.0 - b + b * lengths[posting_docs] / (avg_length or 1.0))
+        weights = idf[posting_terms] * tf * (k1 + 1.0) / (tf + norm)
+
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(df.astype(np.int64), out=indptr[1:])
+
+        return cls(
+            chunks,
+            vocab,
+            indptr,
+            posting_docs.astype(np.int32),
+            weights.astype(np.float32),
+        )
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[int, float]]:
+        """Top-k (chunk index, score), best first."""
+        term_ids = {self.vocab[t] for t in tokenize(query) if t in self.vocab}
+        if not term_ids:
+            return []
+
+        slices = [slice(self.indptr[t], self.indptr[t + 1]) for t in term_ids]
+        docs = np.concatenate([self.doc_ids[s] for s in slices])
+        weights = np.concatenate([self.weights[s] for s in slices])
+
+        scores = np.zeros(len(self.chunks), dtype=np.float32)
+        np.add.at(scores, docs, weights)
+
+        k = min(k, int(np.count_nonzero(scores)))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
+
+    # ================================
+    # Persistence
+    # ================================
+    def save(self, path: Path):
+        """Write `<path>.npz` (arrays) and `<path>.json` (text)."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.parent / f".{uuid.uuid4().hex}"
+
+        with open(f"{tmp}.npz", "wb") as f:
+            np.savez(f, indptr=self.indptr, doc_ids=self.doc_ids, weights=self.weights)
+        with open(f"{tmp}.json", "w") as f:
+            json.dump({"chunks": self.chunks, "vocab": list(self.vocab)}, f)
+
+        # The JSON file is written last, so its presence marks a complete index
+        Path(f"{tmp}.npz").replace(f"{path}.npz")
+        Path(f"{tmp}.json").replace(f"{path}.json")
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["BM25Index"]:
+        try:
+            with open(f"{path}.json") as f:
+                text = json.load(f)
+            with np.load(f"{path}.npz") as arrays:
+                indptr, doc_ids, weights = arrays["indptr"], arrays["doc_ids"], arrays["weights"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+        vocab = {term: i for i, term in enumerate(text["vocab"])}
+        return cls(text["chunks"], vocab, indptr, doc_ids, weights)
+
+
+class IndexStore:
+    """
+    On-disk BM25 indexes with an in-memory LRU in front.
+    """
+
+    def __init__(self, root: Path, lru_size: int = INDEX_LRU_SIZE):
+        self.root = Path(root)
+        self.lru_size = lru_size
+        self._loaded: "OrderedDict[str, BM25Index]" = OrderedDict()
+        # Called from worker threads
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def get_or_build(self, key: str, text: str, chunk_chars: int) -> Tuple[BM25Index, str]:
+        """
+        Returns (index, source) with source "memory", "disk" or "built".
+        Blocking: call from a worker thread.
+        """
+        with self._lock:
+            index = self._loaded.get(key)
+        source = "memory"
+
+        if index is None:
+            index = BM25Index.load(self._path(key))
+            source = "disk"
+        if index is None:
+            index = BM25Index.build(chunk_text(text, chunk_chars))
+            index.save(self._path(key))
+            source = "built"
+
+        with self._lock:
+            self._loaded[key] = index
+            self._loaded.move_to_end(key)
+            while len(self._loaded) > self.lru_size:
+                self._loaded.popitem(last=False)
+
+        return index, source
+
+
+# ================================
+# Global Store Instance
+# ================================
+index_store = IndexStore(CACHE_DIR / "bm25")
@@ -0,0 +1,318 @@
+# backend/services/checkpoints.py
+
+"""
+Durable execution checkpoints.
+
+After each unit the engine records the successful node outputs of the
+execution; a failed or interrupted run can then be resumed from its
+completed frontier instead of repeating extractions and LLM calls
+(see `/api/executions/{execution_id}/resume`).
+
+Layout under CACHE_DIR/checkpoints, one directory per execution:
+
+    <sha256(execution_id)[:32]>/manifest.json   workflow, overrides, status
+    <sha256(execution_id)[:32]>/outputs.jsonl   {"node_id", "output"} lines
+
+Writes never block the run, not even at its end: records go to an
+in-memory queue that a background task drains every
+CHECKPOINT_FLUSH_MS, appending each execution's batch with one file
+write off the event loop. Only `load` (and shutdown) wait for the
+queue, at most CHECKPOINT_FLUSH_TIMEOUT_S. A new run under an
+execution id that already has a checkpoint starts a fresh
+outputs.jsonl. Write failures are counted per execution (see
+`errors`) and in `metrics()`.
+
+Outputs passed by reference keep only the artifact id and are
+resolved through the artifact store on load.
+
+Off by default (CHECKPOINTS=1 to enable).
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.artifacts import ArtifactRef
+
+
+CHECKPOINTS = os.getenv("CHECKPOINTS", "0") == "1"
+CHECKPOINT_FLUSH_MS = float(os.getenv("CHECKPOINT_FLUSH_MS", 100))
+CHECKPOINT_FLUSH_TIMEOUT_S = float(os.getenv("CHECKPOINT_FLUSH_TIMEOUT_S", 5))
+CHECKPOINT_TTL_S = int(os.getenv("CHECKPOINT_TTL_S", 24 * 3600))
+
+_ARTIFACT_KEY = "__artifact__"
+
+# Executions whose write failures are remembered for `errors`
+FAILED_EXECUTIONS = 1000
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, ArtifactRef):
+        return {_ARTIFACT_KEY: value.artifact_id}
+    # Anything else that is not JSON (should not reach a final output)
+    return str(value)
+
+
+class Checkpoint:
+    """A loaded checkpoint: manifest plus successful outputs."""
+
+    __slots__ = ("manifest", "outputs")
+
+    def __init__(self, manifest: Dict[str, Any], outputs: Dict[str, Dict[str, Any]]):
+        self.manifest = manifest
+        self.outputs = outputs
+
+
+class CheckpointStore:
+    """
+    Asynchronous, batched checkpoint writer and loader.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        artifacts=None,
+        flush_ms: float = CHECKPOINT_FLUSH_MS,
+        flush_timeout_s: float = CHECKPOINT_FLUSH_TIMEOUT_S,
+    ):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        # ArtifactStore used to resolve refs on load
+        self.artifacts = artifacts
+        self.flush_s = flush_ms / 1000
+        self.flush_timeout_s = flush_timeout_s
+
+        # (execution_id, kind, payload) not yet on disk
+        self._queue: List[Tuple[str, str, Any]] = []
+        self._enqueued = 0
+        self._written = 0
+        self._wake: Optional[asyncio.Event] = None
+        self._flushed: Optional[asyncio.Condition] = None
+        self._writer: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.write_failures = 0
+        self.flush_timeouts = 0
+        self.last_error: Optional[str] = None
+        # execution_id -> last write error
+        self._failed: "OrderedDict[str, str]" = OrderedDict()
+
+    def _dir(self, execution_id: str) -> Path:
+        return self.root / hashlib.sha256(execution_id.encode()).hexdigest()[:32]
+
+    # ================================
+    # Recording (non-blocking)
+    # ================================
+    def begin(self, execution_id: str, workflow, overrides: Optional[Dict] = None):
+        """Start a checkpoint: the manifest needed to rebuild the run."""
+        self._enqueue(execution_id, "manifest", {
+            "execution_id": execution_id,
+            "workflow": workflow.dict() if hasattr(workflow, "dict") else workflow,
+            "overrides": overrides or {},
+            "status": "running",
+            "started_at": time.time(),
+        })
+
+    def record(self, execution_id: str, node_id: str, output: Dict[str, Any]):
+        self._enqueue(execution_id, "output", {"node_id": node_id, "output": output})
+
+    def finish(self, execution_id: str, status: str):
+        """Record the final status; written in the background."""
+        self._enqueue(execution_id, "status", status)
+        self._wake.set()
+
+    def errors(self, execution_id: str) -> Optional[str]:
+        """Last write error of an execution's checkpoint, if any."""
+        return self._failed.get(execution_id)
+
+    def _enqueue(self, execution_id: str, kind: str, payload: Any):
+        self._queue.append((execution_id, kind, payload))
+        self._enqueued += 1
+        self._ensure_writer()
+
+    def _ensure_writer(self):
+        if self._writer is not None and not self._writer.done():
+            return
+        if self._writer is not None and not self._writer.cancelled() and self._writer.exception():
+            print(f"Checkpoint writer died, restarting: {self._writer.exception()}")
+        # Bound lazily to the running event loop
+        self._wake = asyncio.Event()
+        self._flushed = asyncio.Condition()
+        self._writer = asyncio.ensure_future(self._write_loop())
+
+    async def flush(self) -> bool:
+        """
+        Wait until everything enqueued so far is written, at most
+        `flush_timeout_s`. False on timeout.
+        """
+        if self._writer is None:
+            return True
+        self._ensure_writer()
+        target = self._enqueued
+        self._wake.set()
+        try:
+            async with self._flushed:
+                await asyncio.wait_for(
+                    self._flushed.wait_for(lambda: self._written >= target),
+                    self.flush_timeout_s,
+                )
+        except asyncio.TimeoutError:
+            self.flush_timeouts += 1
+            print(f"Checkpoint flush timed out after {self.flush_timeout_s}s")
+            return False
+        return True
+
+    # ================================
+    # Background writer
+    # ================================
+    async def _write_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_s)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+            if not self._queue:
+                continue
+            batch, self._queue = self._queue, []
+            try:
+                failures = await asyncio.to_thread(self._write_batch, batch)
+            except Exception as e:
+                failures = {execution_id: str(e) for execution_id, _, _ in batch}
+            for execution_id, error in failures.items():
+                # A lost checkpoint only costs a longer resume
+                print(f"Checkpoint write failed for {execution_id}: {error}")
+                self._record_failure(execution_id, error)
+
+            self.batches += 1
+            self._written += len(batch)
+            async with self._flushed:
+                self._flushed.notify_all()
+
+    def _record_failure(self, execution_id: str, error: str):
+        self.write_failures += 1
+        self.last_error = error
+        self._failed[execution_id] = error
+        self._failed.move_to_end(execution_id)
+        while len(self._failed) > FAILED_EXECUTIONS:
+            self._failed.popitem(last=False)
+
+    def _write_batch(self, batch: List[Tuple[str, str, Any]]) -> Dict[str, str]:
+        """Write one batch; returns execution_id -> error for failures."""
+        # Per execution, in queue order: a status must not land on the
+        # manifest of a later run that reuses the execution id
+        pending: Dict[str, Dict[str, Any]] = {}
+        for execution_id, kind, payload in batch:
+            state = pending.setdefault(
+                execution_id, {"manifest": None, "lines": [], "truncate": False}
+            )
+            if kind == "manifest":
+                # A new run: its outputs replace the previous generation
+                state.update(manifest=payload, lines=[], truncate=True)
+            elif kind == "output":
+                state["lines"].append(json.dumps(payload, default=_encode) + "\n")
+            else:
+                manifest = state["manifest"] or self._read_manifest(execution_id)
+                if manifest is not None:
+                    state["manifest"] = {**manifest, "status": payload, "finished_at": time.time()}
+
+        failures = {}
+        for execution_id, state in pending.items():
+            try:
+                directory = self._dir(execution_id)
+                directory.mkdir(parents=True, exist_ok=True)
+                if state["lines"] or state["truncate"]:
+                    with open(directory / "outputs.jsonl", "w" if state["truncate"] else "a") as f:
+                        f.write("".join(state["lines"]))
+                if state["manifest"] is not None:
+                    self._write_manifest(execution_id, state["manifest"])
+            except (OSError, TypeError, ValueError) as e:
+                failures[execution_id] = str(e)
+        return failures
+
+    def _write_manifest(self, execution_id: str, manifest: Dict[str, Any]):
+        directory = self._dir(execution_id)
+        directory.mkdir(parents=True, exist_ok=True)
+        tmp = directory / "manifest.json.tmp"
+        tmp.write_text(json.dumps(manifest, default=_encode))
+        tmp.replace(directory / "manifest.json")
+
+    def _read_manifest(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads((self._dir(execution_id) / "manifest.json").read_text())
+        except (OSError, ValueError):
+            return None
+
+    # ================================
+    # Loading
+    # ================================
+    async def load(self, execution_id: str) -> Optional[Checkpoint]:
+        await self.flush()
+        return await asyncio.to_thread(self._load, execution_id)
+
+    def _load(self, execution_id: str) -> Optional[Checkpoint]:
+        manifest = self._read_manifest(execution_id)
+        if manifest is None:
+            return None
+
+        outputs = {}
+        try:
+            with open(self._dir(execution_id) / "outputs.jsonl") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Torn final line from a crash mid-write
+                        continue
+                    output = self._decode(entry["output"])
+                    if output is not None:
+                        outputs[entry["node_id"]] = output
+        except OSError:
+            pass
+
+        return Checkpoint(manifest, outputs)
+
+    def _decode(self, value: Any) -> Any:
+        """Restore refs; None if an artifact has been pruned since."""
+        if isinstance(value, dict):
+            if set(value) == {_ARTIFACT_KEY}:
+                if self.artifacts is None:
+                    return None
+                return self.artifacts.get(value[_ARTIFACT_KEY])
+            decoded = {}
+            for key, item in value.items():
+                decoded[key] = self._decode(item)
+                if decoded[key] is None and item is not None:
+                    return None
+            return decoded
+        if isinstance(value, list):
+            decoded = [self._decode(item) for item in value]
+            if any(d is None and i is not None for d, i in zip(decoded, value)):
+                return None
+            return decoded
+        return value
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._queue),
+            "batches": self.batches,
+            "write_failures": self.write_failures,
+            "flush_timeouts": self.flush_timeouts,
+            "last_error": self.last_error,
+        }
+
+    def prune(self, max_age_s: int = CHECKPOINT_TTL_S) -> int:
+        """Delete checkpoints not modified within `max_age_s`."""
+        cutoff = time.time() - max_age_s
+        removed = 0
+        for directory in self.root.iterdir():
+            if directory.is_dir() and directory.stat().st_mtime < cutoff:
+                shutil.rmtree(directory, ignore_errors=True)
+                removed += 1
+        return removed
@@ -0,0 +1,111 @@
+# backend/services/context_cache.py
+
+"""
+Shared-context caching.
+
+Agents pass a large shared document (usually the parent data) as
+`context`, separately from their instructions. The service frames it
+into a stable prefix; contexts above a size threshold are registered
+once with the backend's provider-side cache and later calls reference
+the cache handle instead of re-sending the text.
+
+Backends without provider caching fall back to sending the framed
+prefix inline, which still benefits from implicit prefix caching.
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+
+CONTEXT_CACHE_MIN_CHARS = int(os.getenv("CONTEXT_CACHE_MIN_CHARS", 8000))
+CONTEXT_CACHE_TTL_S = int(os.getenv("CONTEXT_CACHE_TTL_S", 600))
+
+# Byte-identical frame shared by every agent so prefixes match
+CONTEXT_TEMPLATE = 'Input Document:\n"""\n{context}\n"""\n\n'
+
+
+def frame_context(context: str) -> str:
+    return CONTEXT_TEMPLATE.format(context=context)
+
+
+class ContextCache:
+    """
+    Maps (model, context) to a provider cache handle.
+    """
+
+    def __init__(self, backend, min_chars: int = CONTEXT_CACHE_MIN_CHARS, ttl_s: int = CONTEXT_CACHE_TTL_S):
+        self.backend = backend
+        self.min_chars = min_chars
+        self.ttl_s = ttl_s
+
+        # key -> (handle or None if unsupported, expires_at)
+        self._entries: Dict[str, Tuple[Optional[str], float]] = {}
+        self._creating: Dict[str, asyncio.Future] = {}
+
+        self.registrations = 0
+        self.hits = 0
+        self.inline = 0
+        self.chars_saved = 0
+
+    @staticmethod
+    def _key(model: str, framed: str) -> str:
+        return hashlib.sha256(f"{model}\0{framed}".encode("utf-8")).hexdigest()
+
+    async def lookup(self, model: str, framed: str) -> Optional[str]:
+        """
+        Return a provider cache handle for the framed context, creating
+        it on first use. None means "send the context inline".
+        """
+        if len(framed) < self.min_chars:
+            self.inline += 1
+            return None
+
+        key = self._key(model, framed)
+        entry = self._entries.get(key)
+        # Refresh slightly before the provider TTL runs out
+        if entry and entry[1] > time.monotonic() + 5:
+            return self._count(entry[0], framed)
+
+        pending = self._creating.get(key)
+        if pending:
+            return self._count(await asyncio.shield(pending), framed)
+
+        future = asyncio.get_running_loop().create_future()
+        self._creating[key] = future
+        try:
+            try:
+                handle = await self.backend.create_context_cache(model, framed, self.ttl_s)
+            except Exception:
+                handle = None
+            if handle:
+                self.registrations += 1
+            self._entries[key] = (handle, time.monotonic() + self.ttl_s)
+            future.set_result(handle)
+        finally:
+            if not future.done():
+                future.set_result(None)
+            del self._creating[key]
+
+        if handle is None:
+            self.inline += 1
+        return handle
+
+    def _count(self, handle: Optional[str], framed: str) -> Optional[str]:
+        if handle:
+            self.hits += 1
+            self.chars_saved += len(framed)
+        else:
+            self.inline += 1
+        return handle
+
+    def metrics(self) -> Dict:
+        return {
+            "min_chars": self.min_chars,
+            "registrations": self.registrations,
+            "hits": self.hits,
+            "inline": self.inline,
+            "chars_saved": self.chars_saved,
+        }
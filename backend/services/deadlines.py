@@ -0,0 +1,44 @@
+# backend/services/deadlines.py
+
+"""
+Deadline propagation.
+
+The engine sets the active deadline (monotonic seconds) in a context
+variable before running a node; tools and services read `remaining()`
+to bound their own blocking calls (HTTP timeouts, subprocess work).
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the active deadline, or None if unbounded."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+@contextmanager
+def deadline_scope(timeout_s: Optional[float]) -> Iterator[Optional[float]]:
+    """
+    Tighten the active deadline to at most `timeout_s` from now.
+    Yields the effective remaining time (None if unbounded).
+    """
+    current = _deadline.get()
+    deadline = current
+    if timeout_s is not None:
+        candidate = time.monotonic() + timeout_s
+        deadline = candidate if current is None else min(current, candidate)
+
+    token = _deadline.set(deadline)
+    try:
+        yield remaining()
+    finally:
+        _deadline.reset(token)
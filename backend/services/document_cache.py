@@ -0,0 +1,143 @@
+# backend/services/document_cache.py
+
+"""
+Extracted-document cache.
+
+Extraction results are stored on disk keyed by the SHA-256 of the
+source bytes plus the extraction options, so the same PDF is only
+converted once whether it arrives as an upload, a local path or a URL
+(see services/fetcher.py).
+
+Entries older than DOCUMENT_CACHE_TTL_S (by last use) are pruned on
+startup, then the least recently used until the cache fits in
+DOCUMENT_CACHE_MAX_BYTES.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import aiofiles
+import aiofiles.os
+
+from settings import CACHE_DIR
+
+
+DOCUMENT_CACHE_TTL_S = int(os.getenv("DOCUMENT_CACHE_TTL_S", 7 * 24 * 3600))
+DOCUMENT_CACHE_MAX_BYTES = int(os.getenv("DOCUMENT_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+
+_HASH_NAME = re.compile(r"^[0-9a-f]{64}$")
+
+_touch = aiofiles.os.wrap(os.utime)
+
+# Stores whose files are written as `<root>/<hash[:2]>/<hash><ext>`
+_content_roots: List[Path] = []
+
+
+def register_content_root(root: Path):
+    """Trust hash file names under `root` (the store writes them itself)."""
+    _content_roots.append(Path(root).resolve())
+
+
+def _named_by_hash(path: Path) -> bool:
+    if not _HASH_NAME.match(path.stem) or path.parent.name != path.stem[:2]:
+        return False
+    return path.parent.parent in _content_roots
+
+
+def file_hash(path: str) -> str:
+    """
+    SHA-256 of a file. Files in a content-addressed store (uploads,
+    fetched bodies) are named by their hash, so they are not re-read;
+    any other path is hashed, whatever its name.
+    """
+    resolved = Path(path).resolve()
+    if _named_by_hash(resolved):
+        return resolved.stem
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DocumentCache:
+    """
+    Stores results under `<root>/<key[:2]>/<key>.json`.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.tmp_dir = self.root / ".tmp"
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(content_hash: str, options: Dict[str, Any]) -> str:
+        raw = content_hash + json.dumps(options, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            async with aiofiles.open(self._path(key), "r") as f:
+                value = json.loads(await f.read())
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        try:
+            # Last use, for pruning
+            await _touch(self._path(key))
+        except OSError:
+            pass
+        return value
+
+    async def put(self, key: str, value: Dict[str, Any]):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.tmp_dir / f"{uuid.uuid4().hex}.json"
+        async with aiofiles.open(tmp_path, "w") as out:
+            await out.write(json.dumps(value))
+        await aiofiles.os.replace(tmp_path, path)
+
+    def prune(
+        self, max_age_s: int = DOCUMENT_CACHE_TTL_S, max_bytes: int = DOCUMENT_CACHE_MAX_BYTES
+    ) -> int:
+        """
+        Delete entries unused for `max_age_s`, then the least recently
+        used until the rest fits in `max_bytes`.
+        """
+        entries = []
+        for path in self.root.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        cutoff = time.time() - max_age_s
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for mtime, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if mtime >= cutoff and total <= max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+
+# ================================
+# Global Cache Instance
+# ================================
+document_cache = DocumentCache(CACHE_DIR / "documents")
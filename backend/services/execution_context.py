@@ -0,0 +1,57 @@
+# backend/services/execution_context.py
+
+"""
+Per-node execution context.
+
+The engine records which node is running, and the priority class and
+tenant of the execution it belongs to, in context variables, so shared
+services (LLM caching, scheduling, metrics) can tell callers apart
+without every agent passing its identity through.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional, Tuple
+
+
+PRIORITIES = ("interactive", "batch")
+DEFAULT_PRIORITY = "interactive"
+
+_node: ContextVar[Optional[Tuple[str, str]]] = ContextVar("current_node", default=None)
+_priority: ContextVar[Tuple[str, Optional[str]]] = ContextVar(
+    "current_priority", default=(DEFAULT_PRIORITY, None)
+)
+
+
+def current_node_type() -> Optional[str]:
+    """Subtype of the running node (e.g. "guardrail"), if any."""
+    node = _node.get()
+    return node[1] if node else None
+
+
+def current_node_id() -> Optional[str]:
+    node = _node.get()
+    return node[0] if node else None
+
+
+@contextmanager
+def node_scope(node_id: str, node_type: str) -> Iterator[None]:
+    token = _node.set((node_id, node_type))
+    try:
+        yield
+    finally:
+        _node.reset(token)
+
+
+def current_priority() -> Tuple[str, Optional[str]]:
+    """(priority class, tenant) of the running execution."""
+    return _priority.get()
+
+
+@contextmanager
+def priority_scope(priority: Optional[str], tenant: Optional[str] = None) -> Iterator[None]:
+    token = _priority.set((priority or DEFAULT_PRIORITY, tenant))
+    try:
+        yield
+    finally:
+        _priority.reset(token)
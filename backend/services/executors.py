@@ -0,0 +1,256 @@
+# backend/services/executors.py
+
+"""
+Executor tiers for node execution.
+
+Every node declares an `execution_class` (see agent_base.py):
+
+- "async"        runs on the event loop; must only await. Blocking
+                 helpers of an async node (a synchronous HTTP client,
+                 HTML extraction, a PDF probe) go through
+                 `node_executors.run_blocking`
+- "blocking_io"  `execute_sync` runs in a bounded thread pool
+                 (EXECUTOR_IO_THREADS), with the caller's context
+                 (deadline, node identity, profile) copied in
+- "cpu"          `execute_sync` runs in a pool of EXECUTOR_CPU_PROCESSES
+                 long-lived worker processes, started with
+                 EXECUTOR_CPU_START_METHOD (default "spawn", a fresh
+                 interpreter: the server is multi-threaded and forking
+                 it for arbitrary node code risks deadlocks in the
+                 child, see services/subprocess_runner.py). Workers
+                 start on first use and keep their imports between
+                 calls; cancelling a node kills its worker, which is
+                 replaced on the next call. The node instance and its
+                 inputs are pickled, so CPU nodes must not hold loaded
+                 models, clients or locks
+
+In debug mode (LOOP_BLOCK_DEBUG=1) the engine wraps every node with a
+`BlockDetector`, which times each synchronous step of the node's
+coroutine and flags nodes that hold the event loop longer than
+LOOP_BLOCK_THRESHOLD_MS.
+"""
+
+import asyncio
+import contextvars
+import multiprocessing
+import os
+import signal
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+ASYNC_IO = "async"
+BLOCKING_IO = "blocking_io"
+CPU = "cpu"
+
+EXECUTOR_IO_THREADS = int(os.getenv("EXECUTOR_IO_THREADS", 16))
+EXECUTOR_CPU_PROCESSES = int(os.getenv("EXECUTOR_CPU_PROCESSES", os.cpu_count() or 2))
+EXECUTOR_CPU_START_METHOD = os.getenv("EXECUTOR_CPU_START_METHOD", "spawn")
+
+LOOP_BLOCK_DEBUG = os.getenv("LOOP_BLOCK_DEBUG", "0") == "1"
+LOOP_BLOCK_THRESHOLD_MS = float(os.getenv("LOOP_BLOCK_THRESHOLD_MS", 100))
+
+# Most recent blocking events kept for the metrics endpoint
+BLOCK_EVENTS = 200
+
+
+class CPUWorker:
+    """
+    One CPU-tier worker: a single-process pool, so the process running
+    a call is known and can be killed without touching other calls.
+    """
+
+    def __init__(self, start_method: str = EXECUTOR_CPU_START_METHOD):
+        self.pool = ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context(start_method)
+        )
+        self.pid: Optional[int] = None
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        if self.pid is None:
+            self.pid = await loop.run_in_executor(self.pool, os.getpid)
+        return await loop.run_in_executor(self.pool, fn, *args)
+
+    def kill(self):
+        if self.pid is not None:
+            try:
+                os.kill(self.pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+            except OSError:
+                pass
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+class NodeExecutors:
+    """
+    Lazily created pools for the blocking tiers.
+    """
+
+    def __init__(self, io_threads: int = EXECUTOR_IO_THREADS, cpu_processes: int = EXECUTOR_CPU_PROCESSES):
+        self.io_threads = max(1, io_threads)
+        self.cpu_processes = max(1, cpu_processes)
+        self._threads: Optional[ThreadPoolExecutor] = None
+        # Idle CPU workers; None marks a slot whose worker is not started
+        self._cpu_idle: Optional[asyncio.Queue] = None
+        self.counts = {BLOCKING_IO: 0, CPU: 0}
+        self.cpu_replaced = 0
+
+    @property
+    def threads(self) -> ThreadPoolExecutor:
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(self.io_threads, thread_name_prefix="node-io")
+        return self._threads
+
+    async def run_blocking(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking helper of an async node in the I/O pool."""
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            self.threads, context.run, fn, *args
+        )
+
+    async def run_sync(self, node, node_input: Dict[str, Any], parent_outputs: Dict[str, Any]):
+        """Run `node.execute_sync` on the node's tier."""
+        execution_class = node.execution_class
+        if execution_class not in self.counts:
+            raise ValueError(f"Unknown execution class: {execution_class}")
+        self.counts[execution_class] += 1
+
+        if execution_class == BLOCKING_IO:
+            return await self.run_blocking(node.execute_sync, node_input, parent_outputs)
+
+        return await self._run_cpu(node.execute_sync, node_input, parent_outputs)
+
+    async def _run_cpu(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Raises:
+            RuntimeError: the worker process died
+        """
+        if self._cpu_idle is None:
+            self._cpu_idle = asyncio.Queue()
+            for _ in range(self.cpu_processes):
+                self._cpu_idle.put_nowait(None)
+
+        worker = await self._cpu_idle.get()
+        try:
+            if worker is None:
+                worker = CPUWorker()
+            return await worker.run(fn, *args)
+
+        except asyncio.CancelledError:
+            # The call may still be running: kill its worker
+            worker.kill()
+            worker = None
+            self.cpu_replaced += 1
+            raise
+        except BrokenProcessPool:
+            worker.kill()
+            worker = None
+            self.cpu_replaced += 1
+            raise RuntimeError("CPU worker process died")
+        finally:
+            self._cpu_idle.put_nowait(worker)
+
+    def shutdown(self):
+        if self._threads is not None:
+            self._threads.shutdown(wait=False, cancel_futures=True)
+            self._threads = None
+        if self._cpu_idle is not None:
+            while not self._cpu_idle.empty():
+                worker = self._cpu_idle.get_nowait()
+                if worker is not None:
+                    worker.pool.shutdown(wait=False, cancel_futures=True)
+            self._cpu_idle = None
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "io_threads": self.io_threads,
+            "cpu_processes": self.cpu_processes,
+            "cpu_start_method": EXECUTOR_CPU_START_METHOD,
+            "cpu_workers_replaced": self.cpu_replaced,
+            "dispatched": dict(self.counts),
+        }
+
+
+class _Watched:
+    """Awaitable driving a coroutine step by step, timing each step."""
+
+    __slots__ = ("coro", "detector", "node_id", "node_type")
+
+    def __init__(self, coro, detector, node_id, node_type):
+        self.coro = coro
+        self.detector = detector
+        self.node_id = node_id
+        self.node_type = node_type
+
+    def __await__(self):
+        inner = self.coro.__await__()
+        value, error = None, None
+
+        while True:
+            start = time.perf_counter()
+            try:
+                if error is not None:
+                    yielded = inner.throw(error)
+                else:
+                    yielded = inner.send(value)
+            except StopIteration as stop:
+                self.detector.check(self.node_id, self.node_type, start)
+                return stop.value
+            except BaseException:
+                self.detector.check(self.node_id, self.node_type, start)
+                raise
+            self.detector.check(self.node_id, self.node_type, start)
+
+            try:
+                value, error = (yield yielded), None
+            except BaseException as e:
+                value, error = None, e
+
+
+class BlockDetector:
+    """
+    Flags nodes whose coroutine runs longer than `threshold_ms`
+    without yielding to the event loop.
+    """
+
+    def __init__(self, threshold_ms: float = LOOP_BLOCK_THRESHOLD_MS):
+        self.threshold_s = threshold_ms / 1000
+        self.events = deque(maxlen=BLOCK_EVENTS)
+        self.by_node_type: Dict[str, Dict[str, float]] = {}
+
+    def watch(self, coro: Awaitable, node_id: str, node_type: str) -> Awaitable:
+        return _Watched(coro, self, node_id, node_type)
+
+    def check(self, node_id: str, node_type: str, start: float):
+        elapsed = time.perf_counter() - start
+        if elapsed < self.threshold_s:
+            return
+
+        elapsed_ms = round(elapsed * 1000, 1)
+        print(f"⚠️ Node {node_id} ({node_type}) blocked the event loop for {elapsed_ms} ms")
+        self.events.append({
+            "node_id": node_id,
+            "node_type": node_type,
+            "blocked_ms": elapsed_ms,
+            "at": time.time(),
+        })
+        stats = self.by_node_type.setdefault(node_type, {"count": 0, "max_ms": 0.0})
+        stats["count"] += 1
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "threshold_ms": self.threshold_s * 1000,
+            "by_node_type": self.by_node_type,
+            "recent": list(self.events),
+        }
+
+
+# ================================
+# Global Executor Instances
+# ================================
+node_executors = NodeExecutors()
+block_detector = BlockDetector() if LOOP_BLOCK_DEBUG else None
@@ -0,0 +1,294 @@
+# backend/services/fetcher.py
+
+"""
+Shared async HTTP fetcher.
+
+- One pooled httpx client (keep-alive connections reused across runs)
+- Per-host concurrency limits and a response size cap; requests also
+  take a slot of the shared tool scheduler (services/scheduler.py)
+- On-disk cache under CACHE_DIR/http: bodies are stored by SHA-256
+  (identical content shares one file) and revalidated with
+  conditional GETs (ETag / Last-Modified); responses still fresh per
+  Cache-Control max-age are served without a request
+
+Callers get a local file path and content hash, so downstream caches
+(e.g. extracted documents) can key on content instead of URL.
+"""
+
+import asyncio
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import aiofiles
+import aiofiles.os
+import httpx
+
+from services.deadlines import remaining
+from services.document_cache import register_content_root
+from services.scheduler import tool_scheduler
+from settings import CACHE_DIR
+
+
+FETCH_MAX_BYTES = int(os.getenv("FETCH_MAX_BYTES", 50 * 1024 * 1024))
+FETCH_PER_HOST = int(os.getenv("FETCH_PER_HOST", 4))
+FETCH_TIMEOUT_S = float(os.getenv("FETCH_TIMEOUT_S", 20))
+FETCH_USER_AGENT = os.getenv("FETCH_USER_AGENT", "AgentForge/1.0 (+document fetcher)")
+
+CHUNK_SIZE = 64 * 1024
+
+
+class FetchError(Exception):
+    """Raised when a URL cannot be fetched within the limits."""
+
+
+class FetchedDocument:
+    """
+    A fetched response body stored on disk.
+
+    status: "fetched" (downloaded), "revalidated" (304 from the
+    origin) or "cached" (fresh, no request made)
+    """
+
+    __slots__ = ("url", "path", "content_hash", "content_type", "size", "status")
+
+    def __init__(self, url, path, content_hash, content_type, size, status):
+        self.url = url
+        self.path = Path(path)
+        self.content_hash = content_hash
+        self.content_type = content_type
+        self.size = size
+        self.status = status
+
+    def to_dict(self) -> Dict:
+        return {
+            "url": self.url,
+            "path": str(self.path),
+            "content_hash": self.content_hash,
+            "content_type": self.content_type,
+            "size": self.size,
+            "status": self.status,
+        }
+
+
+class HTTPFetcher:
+    """
+    Fetches URLs into a content-addressed on-disk cache.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        max_bytes: int = FETCH_MAX_BYTES,
+        per_host: int = FETCH_PER_HOST,
+        timeout_s: float = FETCH_TIMEOUT_S,
+    ):
+        self.root = Path(root)
+        self.blob_dir = self.root / "blobs"
+        self.meta_dir = self.root / "meta"
+        self.tmp_dir = self.root / ".tmp"
+        for directory in (self.blob_dir, self.meta_dir, self.tmp_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+        register_content_root(self.blob_dir)
+
+        self.max_bytes = max_bytes
+        self.per_host = per_host
+        self.timeout_s = timeout_s
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self.counts = {"requests": 0, "fetched": 0, "revalidated": 0, "cached": 0, "bytes": 0}
+
+    # ================================
+    # Client lifecycle
+    # ================================
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created lazily so it binds to the running event loop
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                follow_redirects=True,
+                headers={"User-Agent": FETCH_USER_AGENT},
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host)
+        return self._host_limits[host]
+
+    # ================================
+    # Cache metadata
+    # ================================
+    def _meta_path(self, url: str) -> Path:
+        return self.meta_dir / f"{hashlib.sha256(url.encode()).hexdigest()}.json"
+
+    def _load_meta(self, url: str) -> Optional[Dict]:
+        path = self._meta_path(url)
+        try:
+            meta = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+        # The body may have been pruned independently
+        return meta if Path(meta["path"]).exists() else None
+
+    async def _save_meta(self, url: str, meta: Dict):
+        tmp_path = self.tmp_dir / f"{uuid.uuid4().hex}.json"
+        async with aiofiles.open(tmp_path, "w") as out:
+            await out.write(json.dumps(meta))
+        await aiofiles.os.replace(tmp_path, self._meta_path(url))
+
+    @staticmethod
+    def _max_age(headers) -> Optional[float]:
+        cache_control = headers.get("cache-control", "")
+        if "no-store" in cache_control or "no-cache" in cache_control:
+            return None
+        match = re.search(r"max-age=(\d+)", cache_control)
+        return float(match.group(1)) if match else None
+
+    @staticmethod
+    def _extension(url: str, content_type: str) -> str:
+        ext = Path(urlsplit(url).path).suffix.lower()
+        if ext and len(ext) <= 6:
+            return ext
+        guessed = mimetypes.guess_extension(content_type.split(";")[0].strip())
+        return guessed or ".bin"
+
+    # ================================
+    # Fetch
+    # ================================
+    async def fetch(self, url: str) -> FetchedDocument:
+        """
+        Return the body of `url` as a local file, using the cache
+        where possible.
+
+        Raises:
+            FetchError: HTTP error, size limit exceeded or timeout
+        """
+        meta = self._load_meta(url)
+
+        if meta and meta.get("expires_at", 0) > time.time():
+            self.counts["cached"] += 1
+            return self._document(url, meta, "cached")
+
+        headers = {}
+        if meta and meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta and meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+        budget = remaining()
+        timeout = self.timeout_s if budget is None else max(0.1, min(self.timeout_s, budget))
+
+        try:
+            async with self._host_limit(url), tool_scheduler.slot():
+                self.counts["requests"] += 1
+                async with self.client.stream(
+                    "GET", url, headers=headers, timeout=timeout
+                ) as response:
+
+                    if response.status_code == 304 and meta:
+                        validators = self._validators(response.headers)
+                        meta.update({k: v for k, v in validators.items() if v})
+                        await self._save_meta(url, meta)
+                        self.counts["revalidated"] += 1
+                        return self._document(url, meta, "revalidated")
+
+                    if response.status_code >= 400:
+                        raise FetchError(f"HTTP {response.status_code} for {url}")
+
+                    meta = await self._store_body(url, response)
+
+        except httpx.HTTPError as e:
+            raise FetchError(f"Fetch failed for {url}: {str(e) or type(e).__name__}")
+
+        await self._save_meta(url, meta)
+        self.counts["fetched"] += 1
+        return self._document(url, meta, "fetched")
+
+    async def _store_body(self, url: str, response: httpx.Response) -> Dict:
+        """Stream the body to a content-addressed file, enforcing the size cap."""
+        declared = response.headers.get("content-length")
+        if declared and declared.isdigit() and int(declared) > self.max_bytes:
+            raise FetchError(f"Response exceeds {self.max_bytes} bytes: {url}")
+
+        content_type = response.headers.get("content-type", "")
+        digest = hashlib.sha256()
+        size = 0
+        tmp_path = self.tmp_dir / f"{uuid.uuid4().hex}.part"
+
+        try:
+            async with aiofiles.open(tmp_path, "wb") as out:
+                async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise FetchError(f"Response exceeds {self.max_bytes} bytes: {url}")
+                    digest.update(chunk)
+                    await out.write(chunk)
+
+            content_hash = digest.hexdigest()
+            ext = self._extension(str(response.url), content_type)
+            target = self.blob_dir / content_hash[:2] / f"{content_hash}{ext}"
+
+            if target.exists():
+                await aiofiles.os.remove(tmp_path)
+            else:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                await aiofiles.os.replace(tmp_path, target)
+
+        except BaseException:
+            if tmp_path.exists():
+                tmp_path.unlink()
+            raise
+
+        self.counts["bytes"] += size
+        return {
+            "url": url,
+            "path": str(target),
+            "content_hash": content_hash,
+            "content_type": content_type,
+            "size": size,
+            **self._validators(response.headers),
+        }
+
+    def _validators(self, headers) -> Dict:
+        max_age = self._max_age(headers)
+        return {
+            "etag": headers.get("etag"),
+            "last_modified": headers.get("last-modified"),
+            "expires_at": time.time() + max_age if max_age else 0,
+        }
+
+    @staticmethod
+    def _document(url: str, meta: Dict, status: str) -> FetchedDocument:
+        return FetchedDocument(
+            url,
+            meta["path"],
+            meta["content_hash"],
+            meta.get("content_type", ""),
+            meta.get("size", 0),
+            status,
+        )
+
+    def metrics(self) -> Dict:
+        return dict(self.counts)
+
+
+# ================================
+# Global Fetcher Instance
+# ================================
+fetcher = HTTPFetcher(CACHE_DIR / "http")
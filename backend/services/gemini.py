@@ -1,6 +1,9 @@
 # backend/services/gemini.py
 import os
+from typing import Optional
+
 from google import genai
+from google.genai import types
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -9,18 +12,107 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if not GEMINI_API_KEY:
     raise RuntimeError("GEMINI_API_KEY not found in environment")
 
-genai_client = genai.Client(api_key=GEMINI_API_KEY)
+# Optional override of the API endpoint, e.g. the local fake server
+# used by the load-test harness (loadtest/fake_gemini.py).
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL")
+
+DEFAULT_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash-lite")
+
+genai_client = genai.Client(
+    api_key=GEMINI_API_KEY,
+    http_options=(
+        types.HttpOptions(base_url=GEMINI_BASE_URL)
+        if GEMINI_BASE_URL
+        else None
+    ),
+)
+
+
+def _generation_config(
+    max_output_tokens: Optional[int] = None,
+    temperature: Optional[float] = None,
+    cached_content: Optional[str] = None,
+) -> Optional[types.GenerateContentConfig]:
+    """
+    Build a generation config, or None when nothing is set.
+    """
+    if max_output_tokens is None and temperature is None and cached_content is None:
+        return None
+    return types.GenerateContentConfig(
+        max_output_tokens=max_output_tokens,
+        temperature=temperature,
+        cached_content=cached_content,
+    )
+
+
+def _response_text(response) -> str:
+    """
+    Text of a response. Safety-blocked responses, and answers whose
+    token budget went entirely to thinking, have no text: report them
+    as errors (same prefix as failed calls) instead of returning None.
+    """
+    if response.text:
+        return response.text
+
+    feedback = getattr(response, "prompt_feedback", None)
+    reason = getattr(feedback, "block_reason", None)
+    if reason is None and response.candidates:
+        reason = response.candidates[0].finish_reason
+    return f"Error calling Gemini API: empty response (reason: {reason or 'unknown'})"
 
 
-def gemini_generate(prompt: str) -> str:
+def gemini_generate(
+    prompt: str,
+    model: Optional[str] = None,
+    max_output_tokens: Optional[int] = None,
+    temperature: Optional[float] = None,
+) -> str:
     """
     Call Gemini API with a prompt and return the response text.
     """
     try:
         response = genai_client.models.generate_content(
-            model="gemini-2.5-flash-lite",
-            contents=prompt
+            model=model or DEFAULT_MODEL,
+            contents=prompt,
+            config=_generation_config(max_output_tokens, temperature),
         )
-        return response.text
+        return _response_text(response)
     except Exception as e:
         return f"Error calling Gemini API: {str(e)}"
+
+
+async def gemini_generate_async(
+    prompt: str,
+    model: Optional[str] = None,
+    max_output_tokens: Optional[int] = None,
+    temperature: Optional[float] = None,
+    cached_content: Optional[str] = None,
+) -> str:
+    """
+    Non-blocking variant of `gemini_generate` for use inside the event loop.
+    `cached_content` references a prefix created by `gemini_create_cache_async`.
+    """
+    try:
+        response = await genai_client.aio.models.generate_content(
+            model=model or DEFAULT_MODEL,
+            contents=prompt,
+            config=_generation_config(max_output_tokens, temperature, cached_content),
+        )
+        return _response_text(response)
+    except Exception as e:
+        return f"Error calling Gemini API: {str(e)}"
+
+
+async def gemini_create_cache_async(model: str, context: str, ttl_s: int) -> str:
+    """
+    Register `context` with Gemini context caching; returns the cache name.
+    Raises if the model or content size does not support caching.
+    """
+    cache = await genai_client.aio.caches.create(
+        model=model,
+        config=types.CreateCachedContentConfig(
+            contents=[context],
+            ttl=f"{ttl_s}s",
+        ),
+    )
+    return cache.name
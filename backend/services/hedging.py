@@ -0,0 +1,108 @@
+# backend/services/hedging.py
+
+"""
+Hedged LLM requests.
+
+If a call has not returned after the configured percentile of recent
+latency for its model, a duplicate is sent and whichever successful
+response arrives first wins; the other is cancelled. A failed
+response (an exception or an "Error calling ..." answer) never wins
+while the other request may still succeed. A budget caps hedges to a
+fraction of all requests.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional
+
+from services.llm_backends import ERROR_PREFIX
+from services.model_router import LatencyStats
+
+
+def _failed(task: asyncio.Future) -> bool:
+    if task.cancelled() or task.exception() is not None:
+        return True
+    result = task.result()
+    return isinstance(result, str) and result.startswith(ERROR_PREFIX)
+
+
+class HedgePolicy:
+    def __init__(
+        self,
+        stats: LatencyStats,
+        percentile: float = 95,
+        budget: float = 0.05,
+        min_samples: int = 20,
+    ):
+        self.stats = stats
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def delay(self, model: str) -> Optional[float]:
+        """Hedge trigger delay, or None until enough samples exist."""
+        if len(self.stats.samples.get(model, ())) < self.min_samples:
+            return None
+        return self.stats.percentile(model, self.percentile)
+
+    def within_budget(self) -> bool:
+        return self.hedges + 1 <= self.budget * self.requests
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[str]],
+        model: str,
+        hedge_call: Optional[Callable[[], Awaitable[str]]] = None,
+    ) -> str:
+        """
+        Run `call`, hedging with a second invocation (`hedge_call`,
+        default `call`) when it is slow.
+        """
+        self.requests += 1
+        delay = self.delay(model)
+        primary = asyncio.ensure_future(call())
+        tasks = [primary]
+
+        try:
+            if delay is None:
+                return await primary
+
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or not self.within_budget():
+                return await primary
+
+            self.hedges += 1
+            hedge = asyncio.ensure_future((hedge_call or call)())
+            tasks.append(hedge)
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # Prefer the primary when both finished in the same tick
+                for task in tasks:
+                    if task in done and not _failed(task):
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        return task.result()
+
+            # Both failed: report the primary's error
+            return primary.result()
+
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def metrics(self) -> Dict:
+        return {
+            "percentile": self.percentile,
+            "budget": self.budget,
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_rate": round(self.hedges / self.requests, 4) if self.requests else 0,
+            "win_rate": round(self.hedge_wins / self.hedges, 4) if self.hedges else 0,
+        }
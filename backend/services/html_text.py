@@ -0,0 +1,76 @@
+# backend/services/html_text.py
+
+"""
+Fast main-text extraction from HTML.
+
+A single pass of the stdlib HTML parser: boilerplate containers
+(scripts, navigation, headers, footers, forms...) are dropped and the
+text of content blocks is kept, one block per line. Much cheaper than
+a full document conversion and good enough for LLM context.
+"""
+
+import re
+from html.parser import HTMLParser
+from typing import List
+
+
+# Subtrees skipped entirely
+SKIP_TAGS = {
+    "script", "style", "noscript", "template", "svg", "canvas",
+    "nav", "header", "footer", "aside", "form", "button", "select",
+    "iframe", "object", "title",
+}
+
+# Tags that end a text block
+BLOCK_TAGS = {
+    "p", "div", "section", "article", "main", "li", "ul", "ol",
+    "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote",
+    "td", "th", "tr", "table", "br", "dd", "dt", "figcaption",
+}
+
+# Blocks shorter than this (menus, buttons, bylines) are dropped
+MIN_BLOCK_CHARS = 40
+
+
+class _TextExtractor(HTMLParser):
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.skip_depth = 0
+        self.blocks: List[str] = []
+        self.current: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self._flush()
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+        elif tag in BLOCK_TAGS:
+            self._flush()
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.current.append(data)
+
+    def _flush(self):
+        text = re.sub(r"\s+", " ", "".join(self.current)).strip()
+        self.current = []
+        if len(text) >= MIN_BLOCK_CHARS:
+            self.blocks.append(text)
+
+
+def extract_main_text(html: str) -> str:
+    """Main text of an HTML page, one paragraph per line."""
+    parser = _TextExtractor()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        # Malformed markup: keep whatever was parsed
+        pass
+    parser._flush()
+    return "\n".join(parser.blocks)
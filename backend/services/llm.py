@@ -0,0 +1,270 @@
+# backend/services/llm.py
+
+"""
+LLM Service
+-----------
+Single async entry point used by all agents:
+
+    output = await self.llm(prompt, context=document, model=..., task=...)
+
+Responsibilities:
+- Per-call model and generation options
+- Automatic model routing (`model="auto"` or a tier name)
+- Shared document context as a stable prefix, optionally cached
+  provider-side (see services/context_cache.py)
+- Optional micro-batching of concurrent prompts
+- Optional request hedging against tail latency
+- Optional semantic response cache (near-duplicate instructions over
+  the same context)
+- Weighted fair scheduling of calls across executions
+- Latency statistics per model
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from typing import Any, Dict, Optional
+
+from services.batching import MicroBatcher
+from services.context_cache import ContextCache, frame_context
+from services.execution_context import current_node_type
+from services.hedging import HedgePolicy
+from services.llm_backends import ERROR_PREFIX, FunctionBackend, LLMBackend, LLMRequest
+from services.model_router import MODEL_TIERS, LatencyStats, ModelRouter
+from services.profiling import span
+
+
+# Route every call without an explicit model through the router
+AUTO_ROUTING = os.getenv("LLM_AUTO_ROUTING", "0") == "1"
+
+# Micro-batching knobs
+BATCHING = os.getenv("LLM_BATCHING", "0") == "1"
+BATCH_MAX_WAIT_MS = float(os.getenv("LLM_BATCH_MAX_WAIT_MS", 5))
+BATCH_MAX_SIZE = int(os.getenv("LLM_BATCH_MAX_SIZE", 16))
+
+# Provider-side caching of large shared contexts
+CONTEXT_CACHING = os.getenv("LLM_CONTEXT_CACHING", "0") == "1"
+
+# Hedging: duplicate a call still running after the given latency
+# percentile, with at most HEDGE_BUDGET extra requests
+HEDGING = os.getenv("LLM_HEDGING", "0") == "1"
+HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", 95))
+HEDGE_BUDGET = float(os.getenv("LLM_HEDGE_BUDGET", 0.05))
+
+# Semantic cache: reuse answers of near-identical instructions over the
+# same context. Thresholds are per node type, e.g.
+# "llm_tools=0.93,default=0.95". Excluded node types / tasks always call
+# the model (a safety verdict must be about the text actually checked)
+SEMANTIC_CACHE = os.getenv("LLM_SEMANTIC_CACHE", "0") == "1"
+SEMANTIC_CACHE_SIZE = int(os.getenv("LLM_SEMANTIC_CACHE_SIZE", 5000))
+SEMANTIC_CACHE_TTL_S = float(os.getenv("LLM_SEMANTIC_CACHE_TTL_S", 3600))
+SEMANTIC_CACHE_THRESHOLDS = os.getenv("LLM_SEMANTIC_CACHE_THRESHOLDS", "default=0.95")
+SEMANTIC_CACHE_EXCLUDE = set(
+    filter(None, os.getenv("LLM_SEMANTIC_CACHE_EXCLUDE", "guardrail").split(","))
+)
+
+
+def context_hash(framed: str) -> Optional[str]:
+    return hashlib.sha256(framed.encode()).hexdigest() if framed else None
+
+
+class LLMService:
+    """
+    Callable front-end over a swappable `LLMBackend`.
+    """
+
+    def __init__(
+        self,
+        backend: LLMBackend,
+        default_model: str,
+        batching: bool = False,
+        batch_max_wait_ms: float = BATCH_MAX_WAIT_MS,
+        batch_max_size: int = BATCH_MAX_SIZE,
+        context_caching: bool = False,
+        hedging: bool = False,
+        semantic_cache=None,
+        scheduler=None,
+    ):
+        self.backend = backend
+        self.default_model = default_model
+        self.stats = LatencyStats()
+        self.router = ModelRouter(self.stats)
+        self.batcher = (
+            MicroBatcher(backend, batch_max_wait_ms, batch_max_size)
+            if batching
+            else None
+        )
+        self.context_cache = ContextCache(backend) if context_caching else None
+        self.hedger = (
+            HedgePolicy(self.stats, HEDGE_PERCENTILE, HEDGE_BUDGET)
+            if hedging
+            else None
+        )
+        self.semantic_cache = semantic_cache
+        # Optional FairScheduler: every backend request holds one slot
+        self.scheduler = scheduler
+
+    def resolve_model(self, prompt: str, model: Optional[str], task: Optional[str]) -> str:
+        """
+        Explicit model names win; "auto" and tier names go to the router.
+        """
+        if model in MODEL_TIERS:
+            return self.router.choose(prompt, task, tier=model)
+        if model == "auto" or (not model and AUTO_ROUTING):
+            return self.router.choose(prompt, task)
+        return model or self.default_model
+
+    async def __call__(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        max_output_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        task: Optional[str] = None,
+        context: Optional[str] = None,
+    ) -> str:
+        """
+        `context` is a (large) document shared between agents. It is
+        placed before `prompt` in a fixed frame so every agent sends
+        the same prefix, and cached provider-side when enabled.
+        """
+        with span("llm.prompt"):
+            framed = frame_context(context) if context else ""
+
+        # ================================
+        # Semantic cache lookup
+        # ================================
+        node_type = current_node_type() or task
+        if self.semantic_cache and not {node_type, task} & SEMANTIC_CACHE_EXCLUDE:
+            # Only the instruction is embedded: the context must match
+            # exactly (by hash), or a large shared document would
+            # dominate the vector and different questions would collide
+            context_key, vector = await asyncio.to_thread(
+                lambda: (context_hash(framed), self.semantic_cache.embed(prompt))
+            )
+            partition = (node_type, model, max_output_tokens, temperature, context_key)
+            answer, _ = self.semantic_cache.lookup(vector, partition, node_type)
+            if answer is not None:
+                return answer
+
+            answer = await self._generate(prompt, framed, model, max_output_tokens, temperature, task)
+            if not answer.startswith(ERROR_PREFIX):
+                self.semantic_cache.store(vector, partition, answer)
+            return answer
+
+        return await self._generate(prompt, framed, model, max_output_tokens, temperature, task)
+
+    async def _generate(self, prompt, framed, model, max_output_tokens, temperature, task) -> str:
+        request = LLMRequest(
+            prompt,
+            model=self.resolve_model(framed + prompt, model, task),
+            max_output_tokens=max_output_tokens,
+            temperature=temperature,
+        )
+
+        if framed:
+            handle = None
+            if self.context_cache:
+                handle = await self.context_cache.lookup(request.model, framed)
+            if handle:
+                request.cached_context = handle
+            else:
+                request.prompt = framed + prompt
+
+        with span("llm.request"):
+            return await self._dispatch(request, self._timed)
+
+    async def _dispatch(self, request: LLMRequest, send) -> str:
+        """Run `send(request)` holding a scheduler slot, if scheduled."""
+        if self.scheduler:
+            async with self.scheduler.slot():
+                return await send(request)
+        return await send(request)
+
+    async def _timed(self, request: LLMRequest) -> str:
+        """
+        Send with the slot held, so latency samples (and the hedge
+        delay) exclude scheduler queueing. A hedge is a second provider
+        request and takes its own slot. Error answers are not samples.
+        """
+        start = time.perf_counter()
+        if self.hedger:
+            answer = await self.hedger.run(
+                lambda: self._send(request),
+                request.model,
+                hedge_call=lambda: self._dispatch(request, self._send),
+            )
+        else:
+            answer = await self._send(request)
+
+        if not answer.startswith(ERROR_PREFIX):
+            self.stats.record(request.model, time.perf_counter() - start)
+        return answer
+
+    async def _send(self, request: LLMRequest) -> str:
+        if self.batcher:
+            return await self.batcher.submit(request)
+        return await self.backend.generate(request)
+
+    def metrics(self) -> Dict[str, Any]:
+        metrics = {
+            "latency": self.stats.snapshot(),
+            "routing": dict(self.router.decisions),
+        }
+        if self.batcher:
+            metrics["batching"] = self.batcher.metrics()
+        if self.context_cache:
+            metrics["context_cache"] = self.context_cache.metrics()
+        if self.hedger:
+            metrics["hedging"] = self.hedger.metrics()
+        if self.semantic_cache:
+            metrics["semantic_cache"] = self.semantic_cache.metrics()
+        if self.scheduler:
+            metrics["scheduler"] = self.scheduler.metrics()
+        return metrics
+
+
+def create_llm_service() -> LLMService:
+    """
+    Build the service from the environment.
+    LLM_BACKEND=fake swaps in the local FakeBackend (no API key needed).
+    """
+    if os.getenv("LLM_BACKEND", "gemini") == "fake":
+        from services.llm_backends import FakeBackend
+        backend, default_model = FakeBackend(), "fake-model"
+    else:
+        from services.gemini import (
+            DEFAULT_MODEL,
+            gemini_create_cache_async,
+            gemini_generate_async,
+        )
+        backend = FunctionBackend(gemini_generate_async, gemini_create_cache_async)
+        default_model = DEFAULT_MODEL
+
+    semantic_cache = None
+    if SEMANTIC_CACHE:
+        from services.semantic_cache import SemanticCache, parse_thresholds
+        semantic_cache = SemanticCache(
+            capacity=SEMANTIC_CACHE_SIZE,
+            thresholds=parse_thresholds(SEMANTIC_CACHE_THRESHOLDS),
+            ttl_s=SEMANTIC_CACHE_TTL_S,
+        )
+
+    from services.scheduler import llm_scheduler
+
+    return LLMService(
+        backend,
+        default_model,
+        batching=BATCHING,
+        context_caching=CONTEXT_CACHING,
+        hedging=HEDGING,
+        semantic_cache=semantic_cache,
+        scheduler=llm_scheduler,
+    )
+
+
+# ================================
+# Global Service Instance
+# ================================
+llm_service = create_llm_service()
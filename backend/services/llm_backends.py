@@ -0,0 +1,129 @@
+# backend/services/llm_backends.py
+
+"""
+Swappable LLM backends.
+
+Every backend answers single requests and batches; backends without a
+native batch endpoint fan a batch out concurrently. `FakeBackend`
+simulates per-call overhead for tests and benchmarks without a provider.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+# Provider answers starting with this are errors (see services/gemini.py),
+# never cached or used as latency samples
+ERROR_PREFIX = "Error calling"
+
+
+class LLMRequest:
+    """
+    One prompt plus the generation options that affect its output.
+    """
+
+    __slots__ = ("prompt", "model", "max_output_tokens", "temperature", "cached_context")
+
+    def __init__(
+        self,
+        prompt: str,
+        model: str,
+        max_output_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        cached_context: Optional[str] = None,
+    ):
+        self.prompt = prompt
+        self.model = model
+        self.max_output_tokens = max_output_tokens
+        self.temperature = temperature
+        # Provider cache handle holding the shared prefix, if any
+        self.cached_context = cached_context
+
+    def batch_key(self) -> Tuple:
+        """Requests can share a provider call only with identical options."""
+        return (self.model, self.max_output_tokens, self.temperature, self.cached_context)
+
+
+class LLMBackend:
+    """
+    Backend interface.
+    """
+
+    async def generate(self, request: LLMRequest) -> str:
+        raise NotImplementedError
+
+    async def generate_batch(self, requests: List[LLMRequest]) -> List[str]:
+        return list(await asyncio.gather(*(self.generate(r) for r in requests)))
+
+    async def create_context_cache(self, model: str, context: str, ttl_s: int) -> Optional[str]:
+        """
+        Register a shared prefix with the provider and return a handle.
+        None means provider caching is unsupported.
+        """
+        return None
+
+
+class FunctionBackend(LLMBackend):
+    """
+    Adapts a `generate(prompt, model=..., ...)` coroutine function,
+    e.g. `gemini_generate_async`.
+    """
+
+    def __init__(
+        self,
+        generate: Callable[..., Awaitable[str]],
+        create_cache: Optional[Callable[..., Awaitable[Optional[str]]]] = None,
+    ):
+        self._generate = generate
+        self._create_cache = create_cache
+
+    async def generate(self, request: LLMRequest) -> str:
+        options = {}
+        if request.cached_context:
+            options["cached_content"] = request.cached_context
+
+        return await self._generate(
+            request.prompt,
+            model=request.model,
+            max_output_tokens=request.max_output_tokens,
+            temperature=request.temperature,
+            **options,
+        )
+
+    async def create_context_cache(self, model: str, context: str, ttl_s: int) -> Optional[str]:
+        if not self._create_cache:
+            return None
+        return await self._create_cache(model, context, ttl_s)
+
+
+class FakeBackend(LLMBackend):
+    """
+    Local stand-in with a native batch call.
+
+    Each provider call costs `call_overhead_s` plus `per_item_s` per
+    prompt, so batching effects are visible in tests and benchmarks.
+    """
+
+    def __init__(self, call_overhead_s: float = 0.05, per_item_s: float = 0.002):
+        self.call_overhead_s = call_overhead_s
+        self.per_item_s = per_item_s
+        self.calls = 0
+        self.batch_sizes: List[int] = []
+        self.context_caches: Dict[str, str] = {}
+
+    def answer(self, request: LLMRequest) -> str:
+        return f"[{request.model}] {request.prompt[:40]}"
+
+    async def create_context_cache(self, model: str, context: str, ttl_s: int) -> Optional[str]:
+        handle = f"cachedContents/fake-{len(self.context_caches)}"
+        self.context_caches[handle] = context
+        return handle
+
+    async def generate(self, request: LLMRequest) -> str:
+        return (await self.generate_batch([request]))[0]
+
+    async def generate_batch(self, requests: List[LLMRequest]) -> List[str]:
+        self.calls += 1
+        self.batch_sizes.append(len(requests))
+        await asyncio.sleep(self.call_overhead_s + self.per_item_s * len(requests))
+        return [self.answer(request) for request in requests]
@@ -0,0 +1,113 @@
+# backend/services/model_router.py
+
+"""
+Latency-aware model routing.
+
+Prompts are classified into tiers (fast / balanced / strong) from a
+task hint and their length. Within a tier the model with the lowest
+observed latency is chosen, and a tier whose best model runs slower
+than its latency target falls back to the next faster tier.
+"""
+
+import os
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+
+MODEL_TIERS: Dict[str, List[str]] = {
+    "fast": ["gemini-2.5-flash-lite"],
+    "balanced": ["gemini-2.5-flash"],
+    "strong": ["gemini-2.5-pro"],
+}
+
+# Ordered fastest → strongest
+TIER_ORDER = ["fast", "balanced", "strong"]
+
+# p50 latency (seconds) above which a tier steps down to a faster one
+TIER_LATENCY_TARGET_S = {
+    "fast": float("inf"),
+    "balanced": float(os.getenv("ROUTER_BALANCED_TARGET_S", 8)),
+    "strong": float(os.getenv("ROUTER_STRONG_TARGET_S", 20)),
+}
+
+SHORT_PROMPT_CHARS = int(os.getenv("ROUTER_SHORT_PROMPT_CHARS", 2000))
+LONG_PROMPT_CHARS = int(os.getenv("ROUTER_LONG_PROMPT_CHARS", 12000))
+
+# Tasks that are always cheap classification-style calls
+FAST_TASKS = {"guardrail", "tool_decision", "classification"}
+
+
+class LatencyStats:
+    """
+    Per-model latency window (recent samples) plus an EWMA.
+    """
+
+    def __init__(self, window: int = 200, alpha: float = 0.2):
+        self.window = window
+        self.alpha = alpha
+        self.samples: Dict[str, Deque[float]] = {}
+        self.ewma: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+
+    def record(self, model: str, seconds: float):
+        self.samples.setdefault(model, deque(maxlen=self.window)).append(seconds)
+        previous = self.ewma.get(model)
+        self.ewma[model] = seconds if previous is None else (
+            self.alpha * seconds + (1 - self.alpha) * previous
+        )
+        self.calls[model] = self.calls.get(model, 0) + 1
+
+    def percentile(self, model: str, pct: float) -> Optional[float]:
+        values = self.samples.get(model)
+        if not values:
+            return None
+        ordered = sorted(values)
+        index = min(len(ordered) - 1, int(pct / 100 * len(ordered)))
+        return ordered[index]
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        return {
+            model: {
+                "calls": self.calls[model],
+                "ewma_ms": round(self.ewma[model] * 1000, 1),
+                "p50_ms": round(self.percentile(model, 50) * 1000, 1),
+                "p95_ms": round(self.percentile(model, 95) * 1000, 1),
+            }
+            for model in self.samples
+        }
+
+
+class ModelRouter:
+    """
+    Picks a concrete model for a prompt.
+    """
+
+    def __init__(self, stats: LatencyStats, tiers: Optional[Dict[str, List[str]]] = None):
+        self.stats = stats
+        self.tiers = tiers or MODEL_TIERS
+        self.decisions: Dict[str, int] = {}
+
+    def classify(self, prompt: str, task: Optional[str] = None) -> str:
+        if task in FAST_TASKS or len(prompt) <= SHORT_PROMPT_CHARS:
+            return "fast"
+        if len(prompt) <= LONG_PROMPT_CHARS:
+            return "balanced"
+        return "strong"
+
+    def best_in_tier(self, tier: str) -> str:
+        """Lowest observed latency; unobserved models are tried first."""
+        return min(self.tiers[tier], key=lambda model: self.stats.ewma.get(model, 0.0))
+
+    def choose(self, prompt: str, task: Optional[str] = None, tier: Optional[str] = None) -> str:
+        tier = tier or self.classify(prompt, task)
+        index = TIER_ORDER.index(tier)
+
+        while True:
+            model = self.best_in_tier(TIER_ORDER[index])
+            p50 = self.stats.percentile(model, 50)
+            if index == 0 or p50 is None or p50 <= TIER_LATENCY_TARGET_S[TIER_ORDER[index]]:
+                break
+            index -= 1
+
+        self.decisions[model] = self.decisions.get(model, 0) + 1
+        return model
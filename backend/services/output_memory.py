@@ -0,0 +1,162 @@
+# backend/services/output_memory.py
+
+"""
+Lifetime management for node outputs during one execution.
+
+Every output is reference-counted by its consumers (child nodes).
+Once the last consumer has run, an output the client did not ask
+for (`result_nodes` given and not including it) is dropped, keeping
+only status fields. Outputs the response still needs stay in memory.
+
+Only when the text held in memory exceeds the execution's budget are
+outputs spilled to the artifact store, largest first, whether or not
+they are still waiting for consumers (consumers and the response read
+them lazily through `ArtifactRef`). Nodes in `retain` are never
+touched.
+"""
+
+import asyncio
+import os
+from typing import Any, Dict, Iterable, Optional
+
+
+EXECUTION_MEMORY_BUDGET_MB = float(os.getenv("EXECUTION_MEMORY_BUDGET_MB", 256))
+
+# Smaller text fields are not worth a file of their own
+SPILL_MIN_BYTES = int(os.getenv("SPILL_MIN_BYTES", 4096))
+
+# Fields a released output keeps (routing and status decisions read them)
+KEPT_FIELDS = ("success", "status", "error", "blocked", "selected", "node_type", "count")
+
+
+def text_bytes(value: Any) -> int:
+    """Approximate in-memory text size of an output (refs count as 0)."""
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(text_bytes(item) for item in value.values())
+    if isinstance(value, list):
+        return sum(text_bytes(item) for item in value)
+    return 0
+
+
+class OutputMemory:
+    """
+    Tracks and bounds the text held in `results` for one execution.
+    """
+
+    def __init__(
+        self,
+        plan,
+        artifacts=None,
+        retain: Optional[Iterable[str]] = None,
+        result_nodes: Optional[Iterable[str]] = None,
+        budget_bytes: Optional[int] = None,
+    ):
+        self.plan = plan
+        self.artifacts = artifacts
+        self.retain = set(retain or ())
+        self.result_nodes = set(result_nodes) if result_nodes else None
+        if budget_bytes is None:
+            budget_bytes = int(EXECUTION_MEMORY_BUDGET_MB * 1024 * 1024)
+        self.budget_bytes = budget_bytes
+
+        self.refcounts = {node_id: len(children) for node_id, children in plan.children.items()}
+        self.sizes: Dict[str, int] = {}
+        self.live_bytes = 0
+        self.peak_bytes = 0
+        self.spilled_bytes = 0
+        self.spilled = 0
+        self.dropped = 0
+
+    # ================================
+    # Unit bookkeeping
+    # ================================
+    async def after_unit(self, members: Iterable[str], results: Dict[str, Dict]):
+        """
+        Account for the outputs of a finished unit, release outputs
+        whose consumers have all run and enforce the budget.
+        """
+        members = [node_id for node_id in members if node_id in results]
+
+        for node_id in members:
+            self._resize(node_id, results)
+        self.peak_bytes = max(self.peak_bytes, self.live_bytes)
+
+        for node_id in members:
+            for parent in self.plan.parents[node_id]:
+                self.refcounts[parent] -= 1
+                if self.refcounts[parent] == 0 and parent in results:
+                    self._release(parent, results)
+
+        if self.live_bytes > self.budget_bytes:
+            await self._enforce_budget(results)
+
+    def _resize(self, node_id: str, results: Dict[str, Dict]):
+        size = text_bytes(results[node_id])
+        self.live_bytes += size - self.sizes.get(node_id, 0)
+        self.sizes[node_id] = size
+
+    def _release(self, node_id: str, results: Dict[str, Dict]):
+        if node_id in self.retain or not self.sizes.get(node_id):
+            return
+        if self.result_nodes is None or node_id in self.result_nodes:
+            # Still part of the response; only the budget spills it
+            return
+
+        output = results[node_id]
+        results[node_id] = {
+            **{key: output[key] for key in KEPT_FIELDS if key in output},
+            "released": True,
+        }
+        self.dropped += 1
+        self._resize(node_id, results)
+
+    async def _enforce_budget(self, results: Dict[str, Dict]):
+        """Spill the largest in-memory outputs until under budget."""
+        candidates = sorted(
+            (node_id for node_id, size in self.sizes.items() if size and node_id not in self.retain),
+            key=lambda node_id: self.sizes[node_id],
+            reverse=True,
+        )
+        for node_id in candidates:
+            if self.live_bytes <= self.budget_bytes:
+                break
+            await self._spill(node_id, results)
+
+    async def _spill(self, node_id: str, results: Dict[str, Dict]):
+        if not self.artifacts:
+            return
+
+        before = self.sizes.get(node_id, 0)
+        output = await self._externalize(results[node_id])
+        results[node_id] = output
+        self._resize(node_id, results)
+
+        if self.sizes[node_id] < before:
+            self.spilled += 1
+            self.spilled_bytes += before - self.sizes[node_id]
+
+    async def _externalize(self, output: Dict[str, Any]) -> Dict[str, Any]:
+        """Text fields to refs, including per-item outputs of a map."""
+        output = await self.artifacts.externalize(output, threshold=SPILL_MIN_BYTES)
+        if isinstance(output.get("items"), list):
+            items = []
+            for item in output["items"]:
+                if isinstance(item, dict):
+                    item = await self._externalize(item)
+                elif isinstance(item, str) and len(item) >= SPILL_MIN_BYTES:
+                    item = await asyncio.to_thread(self.artifacts.put, item)
+                items.append(item)
+            output = {**output, "items": items}
+        return output
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "budget_bytes": self.budget_bytes,
+            "peak_bytes": self.peak_bytes,
+            "live_bytes": self.live_bytes,
+            "spilled_outputs": self.spilled,
+            "spilled_bytes": self.spilled_bytes,
+            "dropped_outputs": self.dropped,
+        }
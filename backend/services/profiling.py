@@ -0,0 +1,289 @@
+# backend/services/profiling.py
+
+"""
+On-demand profiling of workflow executions.
+
+A `Profile` combines two sources, written as one speedscope file
+(https://www.speedscope.app, also readable by flamegraph tools that
+import speedscope JSON):
+
+- a sampling profiler: a background thread snapshots the Python stack
+  of every thread (event loop and worker threads such as Docling
+  conversions) every PROFILE_INTERVAL_MS
+- spans: named wall-clock intervals around known hot spots
+  (`get_parent_data`, prompt framing, LLM requests, Docling,
+  serialization, each node)
+
+Spans are recorded into the profile bound to the current context, so
+when nothing is being profiled `span(...)` costs one context-variable
+read. Stack samples are process-wide: concurrent executions show up
+in each other's profiles.
+"""
+
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from settings import CACHE_DIR
+
+
+# Fraction of executions profiled without being asked to
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", 5))
+PROFILE_MAX_SAMPLES = int(os.getenv("PROFILE_MAX_SAMPLES", 50_000))
+# Sampler threads running at once; further requests run unprofiled
+PROFILE_MAX_ACTIVE = int(os.getenv("PROFILE_MAX_ACTIVE", 2))
+PROFILE_DIR = CACHE_DIR / "profiles"
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+_current: ContextVar[Optional["Profile"]] = ContextVar("current_profile", default=None)
+
+
+class span:
+    """
+    Time a block into the active profile, if any:
+
+        with span("llm.request"):
+            ...
+    """
+
+    __slots__ = ("name", "profile", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.profile = _current.get()
+
+    def __enter__(self):
+        if self.profile is not None:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.profile is not None:
+            self.profile.record(self.name, self.start, time.perf_counter())
+        return False
+
+
+class Profile:
+    """
+    One profiling session: start() ... stop(), then save().
+    """
+
+    def __init__(self, interval_s: float = PROFILE_INTERVAL_MS / 1000):
+        self.id = uuid.uuid4().hex
+        self.interval_s = interval_s
+        self.started = 0.0
+        self.ended = 0.0
+
+        self.frames: List[Tuple[str, str, int]] = []
+        self._frame_index: Dict[Tuple[str, str, int], int] = {}
+        # thread id -> (name, [(timestamp, stack)])
+        self.samples: Dict[int, Tuple[str, List[Tuple[float, Tuple[int, ...]]]]] = {}
+        self.sample_count = 0
+        self.spans: List[Tuple[str, float, float]] = []
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._token = None
+
+    # ================================
+    # Lifecycle
+    # ================================
+    def start(self) -> "Profile":
+        """Start sampling and bind the profile to the current context."""
+        self.started = time.perf_counter()
+        self._token = _current.set(self)
+        self._thread = threading.Thread(
+            target=self._sample_loop, name=f"profiler-{self.id[:8]}", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.ended = time.perf_counter()
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._token is not None:
+            try:
+                _current.reset(self._token)
+            except ValueError:
+                # Stopped from another context (e.g. middleware teardown)
+                pass
+            self._token = None
+
+    def record(self, name: str, start: float, end: float):
+        self.spans.append((name, start, end))
+
+    # ================================
+    # Sampling
+    # ================================
+    def _frame(self, code) -> int:
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        index = self._frame_index.get(key)
+        if index is None:
+            index = self._frame_index[key] = len(self.frames)
+            self.frames.append(key)
+        return index
+
+    def _sample_loop(self):
+        own = threading.get_ident()
+        names = {}
+
+        while not self._stop.wait(self.interval_s):
+            if self.sample_count >= PROFILE_MAX_SAMPLES:
+                break
+            now = time.perf_counter()
+
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._frame(frame.f_code))
+                    frame = frame.f_back
+                stack.reverse()
+
+                if thread_id not in self.samples:
+                    if thread_id not in names:
+                        names = {t.ident: t.name for t in threading.enumerate()}
+                    self.samples[thread_id] = (names.get(thread_id, str(thread_id)), [])
+                self.samples[thread_id][1].append((now, tuple(stack)))
+                self.sample_count += 1
+
+    # ================================
+    # Output
+    # ================================
+    def span_totals(self) -> Dict[str, float]:
+        """Total milliseconds per span name."""
+        totals: Dict[str, float] = {}
+        for name, start, end in self.spans:
+            totals[name] = totals.get(name, 0.0) + (end - start) * 1000
+        return {name: round(ms, 2) for name, ms in sorted(totals.items(), key=lambda kv: -kv[1])}
+
+    def to_speedscope(self) -> Dict:
+        frames = [
+            {"name": name, "file": filename, "line": line}
+            for name, filename, line in self.frames
+        ]
+        end = self.ended or time.perf_counter()
+        profiles = []
+
+        for thread_name, samples in self.samples.values():
+            if not samples:
+                continue
+            # Each sample stands for the time until the next one
+            times = [timestamp for timestamp, _ in samples] + [end]
+            profiles.append({
+                "type": "sampled",
+                "name": f"thread {thread_name}",
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": end - self.started,
+                "samples": [list(stack) for _, stack in samples],
+                "weights": [max(0.0, b - a) for a, b in zip(times, times[1:])],
+            })
+
+        profiles.extend(self._span_profiles(frames, end))
+
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": f"execution profile {self.id}",
+            "exporter": "agentforge",
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+    def _span_profiles(self, frames: List[Dict], end: float) -> List[Dict]:
+        """
+        Spans as evented profiles. Spans of concurrent tasks overlap
+        without nesting, so they are packed into lanes of
+        non-overlapping spans.
+        """
+        span_frames: Dict[str, int] = {}
+        lanes: List[List[Tuple[str, float, float]]] = []
+
+        for name, start, stop in sorted(self.spans, key=lambda s: (s[1], -s[2])):
+            for lane in lanes:
+                if lane[-1][2] <= start:
+                    lane.append((name, start, stop))
+                    break
+            else:
+                lanes.append([(name, start, stop)])
+
+            if name not in span_frames:
+                span_frames[name] = len(frames)
+                frames.append({"name": name})
+
+        profiles = []
+        for number, lane in enumerate(lanes, 1):
+            events = []
+            for name, start, stop in lane:
+                events.append({"type": "O", "frame": span_frames[name], "at": start - self.started})
+                events.append({"type": "C", "frame": span_frames[name], "at": stop - self.started})
+            profiles.append({
+                "type": "evented",
+                "name": f"spans {number}",
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": end - self.started,
+                "events": events,
+            })
+        return profiles
+
+    def save(self, directory: Path = PROFILE_DIR) -> Path:
+        """Write `<id>.speedscope.json`. Blocking."""
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{self.id}.speedscope.json"
+        tmp = directory / f".{self.id}.tmp"
+        tmp.write_text(json.dumps(self.to_speedscope()))
+        tmp.replace(path)
+        return path
+
+
+# ================================
+# Session control
+# ================================
+_active = 0
+_active_lock = threading.Lock()
+
+
+def should_profile(requested: bool) -> bool:
+    """Requested explicitly, or picked by PROFILE_SAMPLE_RATE."""
+    return requested or (PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE)
+
+
+def start_profile() -> Optional[Profile]:
+    """A started profile, or None if too many are already running."""
+    global _active
+    with _active_lock:
+        if _active >= PROFILE_MAX_ACTIVE:
+            return None
+        _active += 1
+    return Profile().start()
+
+
+def finish_profile(profile: Profile) -> Path:
+    """Stop and save a profile started with start_profile(). Blocking."""
+    global _active
+    try:
+        profile.stop()
+        return profile.save()
+    finally:
+        with _active_lock:
+            _active -= 1
+
+
+def profile_path(profile_id: str) -> Optional[Path]:
+    if len(profile_id) != 32 or not all(c in "0123456789abcdef" for c in profile_id):
+        return None
+    path = PROFILE_DIR / f"{profile_id}.speedscope.json"
+    return path if path.exists() else None
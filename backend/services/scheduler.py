@@ -0,0 +1,234 @@
+# backend/services/scheduler.py
+
+"""
+Weighted fair scheduling of LLM and tool calls.
+
+Without a policy, one large batch run fills every slot of the shared
+model capacity and interactive canvas runs queue behind it. Calls now
+pass through a scheduler:
+
+- one queue per (priority class, tenant); the class comes from the
+  execute request (see services/execution_context.py)
+- start-time fair queuing across queues, weighted per class
+  (interactive work is dispatched several times as often as batch)
+- a global concurrency limit, with a share of the slots reserved
+  for interactive calls so they never wait for a batch call to finish
+- aging: a call waiting longer than `max_wait_s` is dispatched next,
+  so no queue starves
+
+Usage:
+
+    async with llm_scheduler.slot():
+        answer = await backend.generate(request)
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Hashable, Optional
+
+from services.execution_context import DEFAULT_PRIORITY, PRIORITIES, current_priority
+
+
+SCHEDULER_LLM_CONCURRENCY = int(os.getenv("SCHEDULER_LLM_CONCURRENCY", 16))
+SCHEDULER_TOOL_CONCURRENCY = int(os.getenv("SCHEDULER_TOOL_CONCURRENCY", 32))
+# Relative dispatch rates, e.g. "interactive=8,batch=1"
+SCHEDULER_WEIGHTS = os.getenv("SCHEDULER_WEIGHTS", "interactive=8,batch=1")
+# Fraction of slots only interactive calls may use
+SCHEDULER_INTERACTIVE_RESERVED = float(os.getenv("SCHEDULER_INTERACTIVE_RESERVED", 0.25))
+SCHEDULER_MAX_WAIT_S = float(os.getenv("SCHEDULER_MAX_WAIT_S", 30))
+
+# Wait samples kept per class for percentiles
+WAIT_SAMPLES = 1000
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """"interactive=8,batch=1" -> dict"""
+    weights = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        weights[name.strip()] = float(value)
+    return weights
+
+
+class _Waiter:
+    __slots__ = ("future", "start_tag", "enqueued_at")
+
+    def __init__(self, future: asyncio.Future, start_tag: float):
+        self.future = future
+        self.start_tag = start_tag
+        self.enqueued_at = time.monotonic()
+
+
+class _Queue:
+    __slots__ = ("priority", "weight", "waiters", "last_finish")
+
+    def __init__(self, priority: str, weight: float):
+        self.priority = priority
+        self.weight = weight
+        self.waiters: Deque[_Waiter] = deque()
+        self.last_finish = 0.0
+
+
+class FairScheduler:
+    """
+    Concurrency limiter with weighted fair dispatch across queues.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limit: int,
+        weights: Optional[Dict[str, float]] = None,
+        interactive_reserved: float = SCHEDULER_INTERACTIVE_RESERVED,
+        max_wait_s: float = SCHEDULER_MAX_WAIT_S,
+    ):
+        self.name = name
+        self.limit = max(1, limit)
+        self.weights = weights or parse_weights(SCHEDULER_WEIGHTS)
+        # Batch may use at most this many slots (always at least one)
+        self.batch_limit = max(1, self.limit - int(self.limit * interactive_reserved))
+        self.max_wait_s = max_wait_s
+
+        self._queues: Dict[Hashable, _Queue] = {}
+        self._vtime = 0.0
+        self.running = {priority: 0 for priority in PRIORITIES}
+        self.dispatched = {priority: 0 for priority in PRIORITIES}
+        self.aged = 0
+        self._waits = {priority: deque(maxlen=WAIT_SAMPLES) for priority in PRIORITIES}
+
+    # ================================
+    # Public API
+    # ================================
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one slot of this scheduler for the calling execution."""
+        priority, tenant = current_priority()
+        if priority not in self.running:
+            priority = DEFAULT_PRIORITY
+
+        await self._acquire(priority, tenant)
+        try:
+            yield
+        finally:
+            self._release(priority)
+
+    async def _acquire(self, priority: str, tenant: Optional[str]):
+        key = (priority, tenant)
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = _Queue(priority, self.weights.get(priority, 1.0))
+
+        # Start-time fair queuing tags
+        start_tag = max(self._vtime, queue.last_finish)
+        queue.last_finish = start_tag + 1.0 / queue.weight
+
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), start_tag)
+        queue.waiters.append(waiter)
+        self._dispatch()
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just before the cancellation: hand the slot back
+                self._release(priority)
+            elif waiter in queue.waiters:
+                queue.waiters.remove(waiter)
+                self._drop_if_idle(key, queue)
+            raise
+
+        self._waits[priority].append(time.monotonic() - waiter.enqueued_at)
+
+    def _release(self, priority: str):
+        self.running[priority] -= 1
+        self._dispatch()
+
+    # ================================
+    # Dispatch
+    # ================================
+    def _can_run(self, priority: str) -> bool:
+        if sum(self.running.values()) >= self.limit:
+            return False
+        return priority == "interactive" or self.running[priority] < self.batch_limit
+
+    def _dispatch(self):
+        while True:
+            now = time.monotonic()
+            heads = [
+                (key, queue)
+                for key, queue in self._queues.items()
+                if queue.waiters and self._can_run(queue.priority)
+            ]
+            if not heads:
+                return
+
+            overdue = [
+                item for item in heads
+                if now - item[1].waiters[0].enqueued_at > self.max_wait_s
+            ]
+            if overdue:
+                key, queue = min(overdue, key=lambda item: item[1].waiters[0].enqueued_at)
+                self.aged += 1
+            else:
+                key, queue = min(heads, key=lambda item: item[1].waiters[0].start_tag)
+
+            waiter = queue.waiters.popleft()
+            if waiter.future.done():
+                self._drop_if_idle(key, queue)
+                continue
+
+            self._vtime = max(self._vtime, waiter.start_tag)
+            self.running[queue.priority] += 1
+            self.dispatched[queue.priority] += 1
+            waiter.future.set_result(None)
+            self._drop_idle()
+
+    def _drop_if_idle(self, key: Hashable, queue: _Queue):
+        # An emptied queue is forgotten once virtual time has passed its
+        # last finish tag: until then a flow sending one call at a time
+        # is still charged for the call it just made, afterwards it
+        # keeps no credit and restarts at the current virtual time
+        if not queue.waiters and queue.last_finish <= self._vtime:
+            self._queues.pop(key, None)
+
+    def _drop_idle(self):
+        for key, queue in list(self._queues.items()):
+            self._drop_if_idle(key, queue)
+
+    def metrics(self) -> Dict:
+        def percentile(samples, q):
+            if not samples:
+                return None
+            ordered = sorted(samples)
+            return round(ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))] * 1000, 1)
+
+        return {
+            "limit": self.limit,
+            "batch_limit": self.batch_limit,
+            "weights": self.weights,
+            "aged_dispatches": self.aged,
+            "by_priority": {
+                priority: {
+                    "running": self.running[priority],
+                    "waiting": sum(
+                        len(queue.waiters)
+                        for queue in self._queues.values()
+                        if queue.priority == priority
+                    ),
+                    "dispatched": self.dispatched[priority],
+                    "wait_p50_ms": percentile(self._waits[priority], 50),
+                    "wait_p95_ms": percentile(self._waits[priority], 95),
+                }
+                for priority in PRIORITIES
+            },
+        }
+
+
+# ================================
+# Global Scheduler Instances
+# ================================
+llm_scheduler = FairScheduler("llm", SCHEDULER_LLM_CONCURRENCY)
+tool_scheduler = FairScheduler("tools", SCHEDULER_TOOL_CONCURRENCY)
@@ -0,0 +1,207 @@
+# backend/services/semantic_cache.py
+
+"""
+Semantic LLM response cache.
+
+Exact-match caching misses prompts that differ only in wording,
+casing or whitespace. Here each instruction is embedded with a hashed
+bag of word unigrams and bigrams, and the answer of the most similar
+earlier instruction is reused when the cosine similarity clears a
+per-node-type threshold.
+
+Entries only match within the same partition: requested model,
+generation options and the exact shared context (by hash, see
+services/llm.py). The context is not embedded; a large document would
+outweigh the instruction, and "summarize" and "list the risks" over
+the same document would look alike. The index is a fixed-size NumPy
+matrix; when it is full the least recently used row is overwritten.
+"""
+
+import re
+import time
+import zlib
+from typing import Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+
+DEFAULT_THRESHOLD = 0.95
+
+# Similarity histogram bins (best match per lookup)
+HISTOGRAM_BINS = np.linspace(0.0, 1.0, 21)
+
+_TOKEN = re.compile(r"\w+")
+
+
+def parse_thresholds(spec: str) -> Dict[str, float]:
+    """"guardrail=0.97,llm_tools=0.9,default=0.95" -> dict"""
+    thresholds = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        thresholds[name.strip()] = float(value)
+    return thresholds
+
+
+class HashingEmbedder:
+    """
+    Stateless text -> unit vector. Words are lowercased, so casing and
+    whitespace differences map to the same vector.
+    """
+
+    def __init__(self, dim: int = 2048):
+        self.dim = dim
+
+    def __call__(self, text: str) -> np.ndarray:
+        words = _TOKEN.findall(text.lower())
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+        vector = np.zeros(self.dim, dtype=np.float32)
+        if not features:
+            return vector
+
+        hashes = np.fromiter(
+            (zlib.crc32(feature.encode()) for feature in features),
+            dtype=np.uint32,
+            count=len(features),
+        )
+        # Signed hashing keeps collisions from only ever adding up
+        signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+        np.add.at(vector, hashes % self.dim, signs)
+
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class SemanticCache:
+    """
+    In-process vector index of (prompt embedding -> answer).
+    """
+
+    def __init__(
+        self,
+        capacity: int = 5000,
+        thresholds: Optional[Dict[str, float]] = None,
+        ttl_s: float = 3600,
+        dim: int = 2048,
+    ):
+        self.capacity = capacity
+        self.thresholds = thresholds or {}
+        self.ttl_s = ttl_s
+        self.embed = HashingEmbedder(dim)
+
+        self._vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self._partitions = np.full(capacity, -1, dtype=np.int64)
+        self._last_used = np.zeros(capacity, dtype=np.float64)
+        self._created = np.zeros(capacity, dtype=np.float64)
+        self._answers = [None] * capacity
+        self._size = 0
+        self._partition_ids: Dict[Hashable, int] = {}
+        self._next_partition = 0
+
+        self.lookups: Dict[str, int] = {}
+        self.hits: Dict[str, int] = {}
+        self.evictions = 0
+        self._histogram = np.zeros(len(HISTOGRAM_BINS) - 1, dtype=np.int64)
+        self._hit_similarity_sum = 0.0
+
+    def threshold(self, node_type: Optional[str]) -> float:
+        return self.thresholds.get(
+            node_type or "default",
+            self.thresholds.get("default", DEFAULT_THRESHOLD),
+        )
+
+    def _partition(self, partition: Hashable) -> int:
+        pid = self._partition_ids.get(partition)
+        if pid is None:
+            # One partition per context: forget those no row uses
+            if len(self._partition_ids) >= 2 * self.capacity:
+                live = set(self._partitions[: self._size].tolist())
+                self._partition_ids = {
+                    key: value for key, value in self._partition_ids.items() if value in live
+                }
+            pid = self._partition_ids[partition] = self._next_partition
+            self._next_partition += 1
+        return pid
+
+    # ================================
+    # Lookup / store
+    # ================================
+    def lookup(
+        self, vector: np.ndarray, partition: Hashable, node_type: Optional[str]
+    ) -> Tuple[Optional[str], float]:
+        """
+        Best cached answer for `vector` within the partition.
+        Returns (answer or None if below threshold, similarity).
+        """
+        kind = node_type or "default"
+        self.lookups[kind] = self.lookups.get(kind, 0) + 1
+
+        pid = self._partition_ids.get(partition)
+        if pid is None or not self._size or not vector.any():
+            return None, 0.0
+
+        now = time.time()
+        scores = self._vectors[: self._size] @ vector
+        valid = (self._partitions[: self._size] == pid) & (
+            self._created[: self._size] > now - self.ttl_s
+        )
+        if not valid.any():
+            return None, 0.0
+
+        scores = np.where(valid, scores, -1.0)
+        best = int(np.argmax(scores))
+        similarity = float(scores[best])
+        self._histogram += np.histogram([min(max(similarity, 0.0), 1.0)], HISTOGRAM_BINS)[0]
+
+        if similarity < self.threshold(node_type):
+            return None, similarity
+
+        self._last_used[best] = now
+        self.hits[kind] = self.hits.get(kind, 0) + 1
+        self._hit_similarity_sum += similarity
+        return self._answers[best], similarity
+
+    def store(self, vector: np.ndarray, partition: Hashable, answer: str):
+        if not vector.any():
+            return
+
+        if self._size < self.capacity:
+            row = self._size
+            self._size += 1
+        else:
+            row = int(np.argmin(self._last_used))
+            self.evictions += 1
+
+        now = time.time()
+        self._vectors[row] = vector
+        self._partitions[row] = self._partition(partition)
+        self._last_used[row] = now
+        self._created[row] = now
+        self._answers[row] = answer
+
+    def metrics(self) -> Dict:
+        lookups = sum(self.lookups.values())
+        hits = sum(self.hits.values())
+        return {
+            "entries": self._size,
+            "capacity": self.capacity,
+            "evictions": self.evictions,
+            "lookups": lookups,
+            "hits": hits,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "by_node_type": {
+                kind: {
+                    "lookups": count,
+                    "hits": self.hits.get(kind, 0),
+                    "threshold": self.threshold(None if kind == "default" else kind),
+                }
+                for kind, count in self.lookups.items()
+            },
+            "mean_hit_similarity": round(self._hit_similarity_sum / hits, 4) if hits else None,
+            # Best-match similarity per lookup, 0.05-wide bins
+            "similarity_histogram": {
+                f"{low:.2f}": int(count)
+                for low, count in zip(HISTOGRAM_BINS[:-1], self._histogram)
+                if count
+            },
+        }
@@ -0,0 +1,85 @@
+# backend/services/streams.py
+
+"""
+Streaming node outputs.
+
+A node that produces its output in parts (e.g. a document converted
+page batch by page batch) calls `publish(chunk)`; the engine runs it
+inside `stream_scope(channel)` and starts chunk-capable consumers
+right away, which read the parts with `async for chunk in channel`.
+Outside a stream scope `publish` is a no-op, so producers need no
+special casing.
+"""
+
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, List, Optional
+
+
+class StreamError(Exception):
+    """The producer failed before finishing its stream."""
+
+
+class StreamChannel:
+    """
+    Append-only list of chunks with any number of async readers.
+    Every reader sees every chunk from the start, in order.
+    """
+
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.closed = False
+        self.error: Optional[str] = None
+        self._event = asyncio.Event()
+
+    def publish(self, chunk: str):
+        if self.closed:
+            raise StreamError("Stream already closed")
+        self.chunks.append(chunk)
+        self._wake()
+
+    def close(self, error: Optional[str] = None):
+        if self.closed:
+            return
+        self.closed = True
+        self.error = error
+        self._wake()
+
+    def _wake(self):
+        self._event.set()
+        self._event = asyncio.Event()
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        index = 0
+        while True:
+            while index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+
+            if self.closed:
+                if self.error:
+                    raise StreamError(self.error)
+                return
+
+            await self._event.wait()
+
+
+_channel: ContextVar[Optional[StreamChannel]] = ContextVar("stream_channel", default=None)
+
+
+def publish(chunk: str):
+    """Publish a partial output of the running node (if streamed)."""
+    channel = _channel.get()
+    if channel is not None:
+        channel.publish(chunk)
+
+
+@contextmanager
+def stream_scope(channel: StreamChannel):
+    """Route `publish` calls made in this context to `channel`."""
+    token = _channel.set(channel)
+    try:
+        yield channel
+    finally:
+        _channel.reset(token)
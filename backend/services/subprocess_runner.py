@@ -0,0 +1,88 @@
+# backend/services/subprocess_runner.py
+
+"""
+Killable subprocess execution for blocking work.
+
+`run_killable(fn, *args)` runs `fn` in a child process and awaits the
+result without blocking the event loop. If the awaiting task is
+cancelled (node timeout, workflow deadline, cancel endpoint) the child
+is killed, so the work really stops.
+
+Start methods:
+
+- "fork" (default): the child inherits already-loaded models
+  copy-on-write, which is what makes per-call Docling children cheap.
+  The server is multi-threaded by then (thread pools, the profiler,
+  torch's intra-op pool) and only the forking thread survives in the
+  child, so `fn` must be fork-safe: it must not take locks another
+  thread may have held at fork time (logging handlers, shared caches,
+  the event loop) and must not need state from other threads. The
+  child never returns into the server: it sends its result and leaves
+  with os._exit. As a guard against the known OpenMP hang after fork,
+  torch in the child is limited to FORK_CHILD_TORCH_THREADS threads.
+- "spawn": a fresh interpreter; nothing is inherited, `fn` and its
+  arguments must be picklable and the child re-imports their modules.
+  Slower to start, but safe for arbitrary code.
+
+Without fork, "fork" calls fall back to a worker thread, which cannot
+be interrupted.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import sys
+import traceback
+from typing import Any, Callable
+
+
+# torch threads in forked children (1: never enter OpenMP after fork)
+FORK_CHILD_TORCH_THREADS = int(os.getenv("FORK_CHILD_TORCH_THREADS", 1))
+
+
+def _child(conn, fn, args, forked):
+    try:
+        if forked and "torch" in sys.modules:
+            sys.modules["torch"].set_num_threads(FORK_CHILD_TORCH_THREADS)
+        conn.send((True, fn(*args)))
+    except BaseException as exc:
+        conn.send((False, f"{type(exc).__name__}: {exc}\n{traceback.format_exc()}"))
+    finally:
+        conn.close()
+        os._exit(0)
+
+
+async def run_killable(fn: Callable[..., Any], *args: Any, start_method: str = "fork") -> Any:
+    """
+    Raises:
+        RuntimeError: the function raised, or the child died
+    """
+    if start_method == "fork" and not hasattr(os, "fork"):
+        return await asyncio.to_thread(fn, *args)
+
+    ctx = multiprocessing.get_context(start_method)
+    receiver, sender = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_child, args=(sender, fn, args, start_method == "fork"), daemon=True)
+    process.start()
+    sender.close()
+
+    loop = asyncio.get_running_loop()
+    ready = loop.create_future()
+    loop.add_reader(receiver.fileno(), lambda: ready.done() or ready.set_result(None))
+
+    try:
+        await ready
+        try:
+            ok, payload = receiver.recv()
+        except EOFError:
+            raise RuntimeError(f"Worker process died (exit code {process.exitcode})")
+        if not ok:
+            raise RuntimeError(payload)
+        return payload
+
+    finally:
+        loop.remove_reader(receiver.fileno())
+        receiver.close()
+        if process.is_alive():
+            process.kill()
+        await asyncio.to_thread(process.join, 5)
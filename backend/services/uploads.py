@@ -0,0 +1,158 @@
+# backend/services/uploads.py
+
+"""
+Content-addressed upload storage.
+
+Uploads are streamed chunk by chunk to a temporary file while the
+SHA-256 digest is computed in flight. Size and type limits are
+enforced as bytes arrive, and the finished file is moved to a path
+derived from its hash, so identical uploads share a single copy.
+"""
+
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+import aiofiles
+import aiofiles.os
+
+from services.document_cache import register_content_root
+
+
+CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 50 * 1024 * 1024))
+
+# Leading bytes expected for each allowed extension
+MAGIC_BYTES = {
+    ".pdf": (b"%PDF",),
+    ".jpg": (b"\xff\xd8\xff",),
+    ".jpeg": (b"\xff\xd8\xff",),
+    ".png": (b"\x89PNG\r\n\x1a\n",),
+}
+
+
+class UploadRejected(Exception):
+    """Raised when an upload violates a size or type limit."""
+
+
+class UploadStore:
+    """
+    Stores uploads under `<root>/<hash[:2]>/<hash><ext>`.
+    """
+
+    def __init__(self, root: Path, max_bytes: int = MAX_UPLOAD_BYTES):
+        self.root = Path(root)
+        self.tmp_dir = self.root / ".tmp"
+        self.max_bytes = max_bytes
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        register_content_root(self.root)
+
+    # ================================
+    # Lookup
+    # ================================
+    def path_for(self, content_hash: str, ext: str) -> Path:
+        return self.root / content_hash[:2] / f"{content_hash}{ext}"
+
+    def find(self, content_hash: str) -> Optional[Path]:
+        """
+        Return the stored file for a hash, if any.
+        Lets clients skip re-uploading bytes the server already has.
+        """
+        content_hash = content_hash.lower()
+        if len(content_hash) != 64 or not all(c in "0123456789abcdef" for c in content_hash):
+            return None
+
+        for ext in MAGIC_BYTES:
+            path = self.path_for(content_hash, ext)
+            if path.exists():
+                return path
+        return None
+
+    # ================================
+    # Streaming Write
+    # ================================
+    async def save(self, chunks: AsyncIterator[bytes], filename: str) -> dict:
+        """
+        Consume `chunks`, enforcing limits mid-stream, and store the
+        result content-addressed.
+
+        Raises:
+            UploadRejected: unsupported type or size limit exceeded
+        """
+        ext = Path(filename or "").suffix.lower()
+        if ext not in MAGIC_BYTES:
+            raise UploadRejected(f"Unsupported file type: {ext}")
+
+        digest = hashlib.sha256()
+        size = 0
+        head = b""
+        tmp_path = self.tmp_dir / f"{uuid.uuid4().hex}.part"
+
+        try:
+            async with aiofiles.open(tmp_path, "wb") as out:
+                async for chunk in chunks:
+                    if not chunk:
+                        continue
+
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise UploadRejected(
+                            f"File exceeds upload limit of {self.max_bytes} bytes"
+                        )
+
+                    # Reject mismatching content on the first bytes
+                    if len(head) < 8:
+                        head += chunk[: 8 - len(head)]
+                        self._check_signature(head, ext, complete=False)
+
+                    digest.update(chunk)
+                    await out.write(chunk)
+
+            if size == 0:
+                raise UploadRejected("Empty upload")
+            self._check_signature(head, ext, complete=True)
+
+            content_hash = digest.hexdigest()
+            target = self.path_for(content_hash, ext)
+            deduplicated = target.exists()
+
+            if deduplicated:
+                await aiofiles.os.remove(tmp_path)
+            else:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                await aiofiles.os.replace(tmp_path, target)
+
+        except BaseException:
+            if tmp_path.exists():
+                tmp_path.unlink()
+            raise
+
+        return {
+            "file_path": str(target),
+            "content_hash": content_hash,
+            "file_size": size,
+            "deduplicated": deduplicated,
+        }
+
+    @staticmethod
+    def _check_signature(head: bytes, ext: str, complete: bool):
+        """
+        Compare the leading bytes against the signatures for `ext`.
+        While `complete` is False a partial prefix is accepted.
+        """
+        for sig in MAGIC_BYTES[ext]:
+            n = min(len(sig), len(head))
+            if head[:n] == sig[:n] and (not complete or len(head) >= len(sig)):
+                return
+        raise UploadRejected(f"File content does not match {ext}")
+
+
+async def iter_upload_file(upload, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Adapt a FastAPI `UploadFile` into an async chunk iterator."""
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
@@ -0,0 +1,270 @@
+# backend/services/workers.py
+
+"""
+State shared between pre-forked workers (see serve.py).
+
+serve.py runs several worker processes behind one listening socket;
+any worker may take any request, and each has its own memory. State
+that a later request must see, wherever it lands, lives under
+CACHE_DIR instead:
+
+- `WorkflowStore`: saved workflows, one JSON file each. Workers keep
+  compiled plans in memory, keyed by the file's version, and compile
+  on first use after a save elsewhere.
+- `ExecutionRegistry`: which worker (pid) runs which client-named
+  execution. A cancel that reaches another worker is left as a
+  request file and signalled to the owner (SIGUSR1), which cancels
+  it; resume refuses executions still running on any worker.
+
+Saved workflows are always files (so they also survive a restart).
+The registry only touches disk when SHARED_WORKERS=1 (set by serve.py
+for more than one worker); a single process tracks executions in
+memory as before. `/api/executions` lists the answering worker's
+executions only.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import signal
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+SHARED_WORKERS = os.getenv("SHARED_WORKERS", "0") == "1"
+
+
+def _key(name: str) -> str:
+    return hashlib.sha256(name.encode()).hexdigest()[:32]
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, owned by another user
+        return True
+    return True
+
+
+def _write_atomic(path: Path, text: str):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(text)
+    tmp.replace(path)
+
+
+class WorkflowStore:
+    """
+    Saved workflows as `<root>/<sha256(id)[:32]>.json`.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        # workflow id -> (file version, Plan or compile error)
+        self._plans: Dict[str, Tuple[int, Any]] = {}
+
+    def _path(self, workflow_id: str) -> Path:
+        return self.root / f"{_key(workflow_id)}.json"
+
+    def _version(self, workflow_id: str) -> Optional[int]:
+        try:
+            return self._path(workflow_id).stat().st_mtime_ns
+        except OSError:
+            return None
+
+    async def save(self, workflow_id: str, workflow: Dict[str, Any], plan: Any = None):
+        """Store a workflow; `plan` (its compiled Plan or error) is cached."""
+        def write():
+            _write_atomic(self._path(workflow_id), json.dumps(workflow))
+            return self._version(workflow_id)
+
+        version = await asyncio.to_thread(write)
+        if plan is not None:
+            self._plans[workflow_id] = (version, plan)
+
+    async def get(self, workflow_id: str) -> Optional[Dict[str, Any]]:
+        def read():
+            try:
+                return json.loads(self._path(workflow_id).read_text())
+            except (OSError, ValueError):
+                return None
+
+        return await asyncio.to_thread(read)
+
+    async def list(self) -> List[Dict[str, Any]]:
+        def read_all():
+            paths, workflows = [], []
+            for path in self.root.glob("*.json"):
+                try:
+                    paths.append((path.stat().st_mtime_ns, path))
+                except OSError:
+                    continue
+            # Oldest save first, like the in-memory dict was
+            for _, path in sorted(paths):
+                try:
+                    workflows.append(json.loads(path.read_text()))
+                except (OSError, ValueError):
+                    continue
+            return workflows
+
+        return await asyncio.to_thread(read_all)
+
+    async def delete(self, workflow_id: str) -> bool:
+        self._plans.pop(workflow_id, None)
+        try:
+            await asyncio.to_thread(self._path(workflow_id).unlink)
+        except FileNotFoundError:
+            return False
+        return True
+
+    async def plan(self, workflow_id: str, compile_plan) -> Any:
+        """
+        Compiled plan of a saved workflow (or the compile error), None
+        if not saved. `compile_plan(workflow_dict)` builds one on a miss.
+        """
+        version = await asyncio.to_thread(self._version, workflow_id)
+        if version is None:
+            self._plans.pop(workflow_id, None)
+            return None
+
+        cached = self._plans.get(workflow_id)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        workflow = await self.get(workflow_id)
+        if workflow is None:
+            return None
+        try:
+            plan = compile_plan(workflow)
+        except Exception as exc:
+            plan = exc
+        self._plans[workflow_id] = (version, plan)
+        return plan
+
+
+class ExecutionRegistry:
+    """
+    Owner pid per running execution id, and cross-worker cancel.
+    """
+
+    def __init__(self, root: Path, enabled: bool = SHARED_WORKERS):
+        self.enabled = enabled
+        self.running = Path(root) / "running"
+        self.cancels = Path(root) / "cancels"
+        if enabled:
+            self.running.mkdir(parents=True, exist_ok=True)
+            self.cancels.mkdir(parents=True, exist_ok=True)
+        self._engine = None
+
+    def install(self, engine):
+        """Handle cancel signals from other workers (call on startup)."""
+        self._engine = engine
+        if self.enabled:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, self._on_cancel_signal)
+
+    # ================================
+    # Ownership
+    # ================================
+    def owner(self, execution_id: str) -> Optional[int]:
+        """Pid of the live worker running `execution_id`, if any."""
+        if not self.enabled:
+            return None
+        try:
+            pid = int((self.running / _key(execution_id)).read_text())
+        except (OSError, ValueError):
+            return None
+        return pid if _alive(pid) else None
+
+    def register(self, execution_id: Optional[str]) -> bool:
+        """
+        Claim an execution id; False if a live worker (this one
+        included) runs it. The claim is a hard link of a file already
+        holding our pid: it fails if the claim exists, like
+        O_CREAT | O_EXCL, and is never seen half-written.
+        """
+        if not self.enabled or execution_id is None:
+            return True
+
+        path = self.running / _key(execution_id)
+        claim = self.running / f".{path.name}.{os.getpid()}.claim"
+        claim.write_text(str(os.getpid()))
+        try:
+            # Second try after clearing a dead worker's claim
+            for _ in range(2):
+                try:
+                    os.link(claim, path)
+                    return True
+                except FileExistsError:
+                    if not self._clear_stale(path):
+                        return False
+            return False
+        finally:
+            claim.unlink(missing_ok=True)
+
+    def _clear_stale(self, path: Path) -> bool:
+        """Remove a claim whose worker is gone; False if its owner lives."""
+        import fcntl
+
+        # Serialize removals, so a claim made after another worker
+        # read the stale pid is never removed
+        with open(self.running / ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                pid = int(path.read_text())
+            except FileNotFoundError:
+                return True
+            except ValueError:
+                pid = None
+            if pid is not None and _alive(pid):
+                return False
+            path.unlink(missing_ok=True)
+            return True
+
+    def release(
+        self,
+        execution_id: Optional[str],
+        after: Optional[Callable[[], Awaitable]] = None,
+    ):
+        """
+        Give up an execution id once `after()` (e.g. the checkpoint
+        flush, so a resume elsewhere reads the final state) is done,
+        without holding up the caller.
+        """
+        if not self.enabled or execution_id is None:
+            return
+
+        async def release():
+            try:
+                if after is not None:
+                    await after()
+            finally:
+                path = self.running / _key(execution_id)
+                if self.owner(execution_id) == os.getpid():
+                    path.unlink(missing_ok=True)
+
+        asyncio.ensure_future(release())
+
+    # ================================
+    # Cross-worker cancel
+    # ================================
+    def request_cancel(self, execution_id: str) -> bool:
+        """Ask the owning worker to cancel; False if nobody runs it."""
+        pid = self.owner(execution_id)
+        if pid is None or pid == os.getpid():
+            return False
+        _write_atomic(self.cancels / f"{pid}-{_key(execution_id)}", execution_id)
+        os.kill(pid, signal.SIGUSR1)
+        return True
+
+    def _on_cancel_signal(self):
+        for path in self.cancels.glob(f"{os.getpid()}-*"):
+            try:
+                execution_id = path.read_text()
+                path.unlink()
+            except OSError:
+                continue
+            self._engine.cancel(execution_id)
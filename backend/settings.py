@@ -0,0 +1,15 @@
+# backend/settings.py
+
+"""
+Shared runtime paths.
+
+CACHE_DIR is shared by every worker process on a host (see serve.py):
+model weights, artifacts and other derived data live under it.
+"""
+
+import os
+from pathlib import Path
+
+
+CACHE_DIR = Path(os.getenv("AGENTFORGE_CACHE_DIR", ".cache")).resolve()
+CACHE_DIR.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,16 @@
+# backend/tests/conftest.py
+
+"""
+Shared test setup: make the backend modules importable and keep
+derived data (artifacts, checkpoints, profiles) out of the repo. The
+global LLM service uses the local fake backend.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("AGENTFORGE_CACHE_DIR", tempfile.mkdtemp(prefix="agentforge-tests-"))
+os.environ.setdefault("LLM_BACKEND", "fake")
@@ -0,0 +1,63 @@
+# backend/tests/test_artifacts.py
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from services.artifacts import ArtifactRef, ArtifactStore, parse_range
+
+
+def test_parse_range_forms():
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=500-", 1000) == (500, 999)
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range(" bytes = 10-19", 1000) == (10, 19)
+
+
+def test_parse_range_clamps_to_size():
+    assert parse_range("bytes=900-5000", 1000) == (900, 999)
+    assert parse_range("bytes=-5000", 1000) == (0, 999)
+
+
+@pytest.mark.parametrize("header", [
+    "bytes=1000-",          # starts past the end
+    "bytes=50-10",          # end before start
+    "bytes=-0",             # empty suffix
+    "bytes=0-9,20-29",      # multiple ranges
+    "items=0-9",            # other units
+    "bytes=a-b",
+    "bytes=-",
+])
+def test_parse_range_rejects(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 1000)
+
+
+def test_parse_range_empty_artifact():
+    with pytest.raises(ValueError):
+        parse_range("bytes=0-", 0)
+
+
+def test_threshold_counts_utf8_bytes(tmp_path):
+    store = ArtifactStore(tmp_path, threshold=100)
+    output = {"ascii": "a" * 99, "accented": "é" * 60, "short": "é" * 40}
+
+    spilled = asyncio.run(store.externalize(output))
+
+    assert spilled["ascii"] == output["ascii"]
+    assert isinstance(spilled["accented"], ArtifactRef)
+    assert spilled["short"] == output["short"]
+
+
+def test_put_existing_artifact_refreshes_mtime(tmp_path):
+    store = ArtifactStore(tmp_path)
+    ref = store.put("still referenced")
+    old = time.time() - 10 * 86400
+    os.utime(ref.path, (old, old))
+
+    store.put("still referenced")
+
+    assert store.prune(max_age_s=86400) == 0
+    assert store.get(ref.artifact_id) is not None
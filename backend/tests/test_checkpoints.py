@@ -0,0 +1,81 @@
+# backend/tests/test_checkpoints.py
+
+import asyncio
+import time
+
+from services.checkpoints import CheckpointStore
+
+
+WORKFLOW = {"id": "w", "nodes": [], "connections": []}
+
+
+def test_finish_does_not_wait_and_load_sees_status(tmp_path):
+    store = CheckpointStore(tmp_path, flush_ms=10_000)
+
+    async def main():
+        store.begin("run", WORKFLOW)
+        store.record("run", "a", {"success": True, "data": "A"})
+        store.finish("run", "completed")
+        assert store.batches == 0
+        return await store.load("run")
+
+    checkpoint = asyncio.run(main())
+    assert checkpoint.manifest["status"] == "completed"
+    assert checkpoint.outputs == {"a": {"success": True, "data": "A"}}
+
+
+def test_reused_execution_id_starts_new_generation(tmp_path):
+    store = CheckpointStore(tmp_path)
+
+    async def main():
+        store.begin("run", WORKFLOW)
+        store.record("run", "a", {"success": True, "data": "old"})
+        store.record("run", "b", {"success": True, "data": "old"})
+        store.finish("run", "failed")
+        await store.flush()
+
+        store.begin("run", WORKFLOW)
+        store.record("run", "a", {"success": True, "data": "new"})
+        return await store.load("run")
+
+    checkpoint = asyncio.run(main())
+    assert checkpoint.manifest["status"] == "running"
+    assert checkpoint.outputs == {"a": {"success": True, "data": "new"}}
+
+
+def test_status_of_old_run_does_not_land_on_new_one(tmp_path):
+    store = CheckpointStore(tmp_path, flush_ms=10_000)
+
+    async def main():
+        store.begin("run", WORKFLOW)
+        store.finish("run", "failed")
+        store.begin("run", WORKFLOW)
+        return await store.load("run")
+
+    assert asyncio.run(main()).manifest["status"] == "running"
+
+
+def test_write_failure_is_reported(tmp_path):
+    store = CheckpointStore(tmp_path)
+
+    async def main():
+        store.begin("run", WORKFLOW)
+        # A file where the checkpoint directory should go
+        store._dir("run").write_text("")
+        await store.flush()
+
+    asyncio.run(main())
+    assert store.errors("run")
+    assert store.metrics()["write_failures"] == 1
+
+
+def test_flush_is_bounded_when_writer_stalls(tmp_path):
+    store = CheckpointStore(tmp_path, flush_timeout_s=0.05)
+
+    async def main():
+        store.begin("run", WORKFLOW)
+        store._write_batch = lambda batch: time.sleep(0.5) or {}
+        return await store.flush()
+
+    assert asyncio.run(main()) is False
+    assert store.flush_timeouts == 1
@@ -0,0 +1,50 @@
+# backend/tests/test_document_cache.py
+
+import asyncio
+import hashlib
+import os
+import time
+
+import pytest
+
+pytest.importorskip("aiofiles")
+
+from services.document_cache import DocumentCache, file_hash, register_content_root
+
+FAKE_HASH = "ab" + "0" * 62
+
+
+def test_hash_names_trusted_only_inside_stores(tmp_path):
+    store = tmp_path / "uploads"
+    (store / "ab").mkdir(parents=True)
+    stored = store / "ab" / f"{FAKE_HASH}.pdf"
+    stored.write_bytes(b"%PDF stored")
+    register_content_root(store)
+
+    # A user file with a misleading name elsewhere is hashed
+    (tmp_path / "ab").mkdir()
+    local = tmp_path / "ab" / f"{FAKE_HASH}.pdf"
+    local.write_bytes(b"%PDF other")
+
+    assert file_hash(str(stored)) == FAKE_HASH
+    assert file_hash(str(local)) == hashlib.sha256(b"%PDF other").hexdigest()
+
+
+def test_prune_by_age_then_size(tmp_path):
+    cache = DocumentCache(tmp_path)
+    keys = [DocumentCache.key(str(i), {}) for i in range(4)]
+    for key in keys:
+        asyncio.run(cache.put(key, {"text": "x" * 1000}))
+
+    now = time.time()
+    for age, key in zip([10 * 86400, 30, 20, 10], keys):
+        os.utime(cache._path(key), (now - age, now - age))
+
+    assert cache.prune(max_age_s=86400, max_bytes=10**9) == 1
+    assert asyncio.run(cache.get(keys[0])) is None
+
+    # Reading refreshes an entry: key 1 survives, key 2 is now the oldest
+    assert asyncio.run(cache.get(keys[1])) is not None
+    assert cache.prune(max_age_s=86400, max_bytes=2500) == 1
+    assert asyncio.run(cache.get(keys[2])) is None
+    assert asyncio.run(cache.get(keys[3])) is not None
@@ -0,0 +1,110 @@
+# backend/tests/test_engine.py
+
+import asyncio
+from types import SimpleNamespace
+
+from agent_base import BaseNode
+from engine import WorkflowEngine
+from nodes.input_output import OutputNode
+from nodes.map_join import MapNode
+from nodes.router import RouterNode
+
+
+class Text(BaseNode):
+    def __init__(self):
+        super().__init__("text", "test", "tool")
+
+    async def execute(self, node_input, parent_outputs):
+        return {"success": True, "data": node_input["text"], "node_type": "text"}
+
+
+class Echo(BaseNode):
+    """Joins what it received from each parent."""
+
+    def __init__(self):
+        super().__init__("echo", "test", "tool")
+
+    async def execute(self, node_input, parent_outputs):
+        data = " | ".join(f"{key}={value.get('data')}" for key, value in sorted(parent_outputs.items()))
+        return {"success": True, "data": data, "node_type": "echo"}
+
+
+class Guard(BaseNode):
+    """Blocks items containing "bad"; others pass after a short wait."""
+
+    def __init__(self):
+        super().__init__("guard", "test", "tool")
+
+    async def execute(self, node_input, parent_outputs):
+        data = next(iter(parent_outputs.values()))["data"]
+        if "bad" in data:
+            return {"success": False, "blocked": True, "data": "unsafe", "reason": "bad item", "node_type": "guard"}
+        await asyncio.sleep(0.5)
+        return {"success": True, "data": data, "node_type": "guard"}
+
+
+class Registry:
+    nodes = {
+        "text": Text,
+        "echo": Echo,
+        "guard": Guard,
+        "map": MapNode,
+        "router": lambda: RouterNode(llm=None),
+        "output": OutputNode,
+    }
+
+    def get_node_instance(self, subtype):
+        return self.nodes[subtype]()
+
+
+def workflow(nodes, edges):
+    return SimpleNamespace(
+        id="wf",
+        nodes=[
+            SimpleNamespace(id=node_id, type="tool", subtype=subtype, name=node_id, config=config)
+            for node_id, subtype, config in nodes
+        ],
+        connections=[SimpleNamespace(source=a, target=b) for a, b in edges],
+    )
+
+
+def run(wf):
+    results, logs = asyncio.run(WorkflowEngine(Registry()).execute(wf))
+    return results, logs[0]["event"]
+
+
+def test_untaken_router_edge_contributes_no_parent_data():
+    results, _ = run(workflow(
+        [
+            ("doc", "text", {"text": "report"}),
+            ("route", "router", {"routes": [{"target": "other", "when": "True"}]}),
+            ("extra", "text", {"text": "notes"}),
+            ("join", "echo", {}),
+            ("other", "echo", {}),
+        ],
+        [("doc", "route"), ("route", "join"), ("extra", "join"), ("route", "other")],
+    ))
+
+    assert results["join"]["data"] == "extra=notes"
+    assert results["other"]["data"] == "route=report"
+
+
+def test_blocked_map_item_stops_the_workflow():
+    results, _ = run(workflow(
+        [
+            ("doc", "text", {"text": "one\nbad two\nthree\nfour"}),
+            ("map", "map", {"split": "lines", "concurrency": 4}),
+            ("guard", "guard", {}),
+            ("after", "echo", {}),
+            ("output", "output", {}),
+        ],
+        [("doc", "map"), ("map", "guard"), ("guard", "after"), ("after", "output")],
+    ))
+
+    guard = results["guard"]
+    assert guard["blocked"] is True and guard["blocked_item"] == 1
+    statuses = [item.get("status") for item in guard["items"]]
+    assert statuses == ["cancelled", None, "cancelled", "cancelled"]
+    # Nothing after the guard ran; the output reports the block
+    assert all(item.get("status") == "cancelled" for item in results["after"]["items"])
+    assert results["output"]["data"] == "unsafe"
@@ -0,0 +1,148 @@
+# backend/tests/test_executors.py
+
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from agent_base import BaseTool
+from services.deadlines import deadline_scope, remaining
+from services.executors import BLOCKING_IO, CPU, BlockDetector, NodeExecutors
+
+
+class SleepyIO(BaseTool):
+    execution_class = BLOCKING_IO
+
+    def __init__(self):
+        super().__init__("sleepy", "test")
+
+    def execute_sync(self, node_input, parent_outputs):
+        time.sleep(0.05)
+        return {
+            "success": True,
+            "thread": threading.current_thread().name,
+            "deadline": remaining() is not None,
+        }
+
+
+class Squares(BaseTool):
+    execution_class = CPU
+
+    def __init__(self):
+        super().__init__("squares", "test")
+
+    def execute_sync(self, node_input, parent_outputs):
+        return {"success": True, "pid": os.getpid(), "data": sum(i * i for i in range(node_input["n"]))}
+
+
+class Forever(Squares):
+    def execute_sync(self, node_input, parent_outputs):
+        while True:
+            pass
+
+
+class NoSyncBody(BaseTool):
+    execution_class = BLOCKING_IO
+
+    def __init__(self):
+        super().__init__("none", "test")
+
+
+def test_blocking_io_runs_in_pool_with_context():
+    executors = NodeExecutors(io_threads=2)
+
+    async def main():
+        with deadline_scope(5):
+            return await executors.run_sync(SleepyIO(), {}, {})
+
+    result = asyncio.run(main())
+    executors.shutdown()
+    assert result["thread"].startswith("node-io")
+    assert result["deadline"] is True
+
+
+def test_run_blocking_keeps_loop_free():
+    executors = NodeExecutors(io_threads=2)
+    ticks = 0
+
+    async def main():
+        nonlocal ticks
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        ticker = asyncio.ensure_future(tick())
+        await executors.run_blocking(time.sleep, 0.1)
+        ticker.cancel()
+
+    asyncio.run(main())
+    executors.shutdown()
+    assert ticks >= 5
+
+
+def test_cpu_tier_reuses_pool_worker():
+    executors = NodeExecutors(cpu_processes=1)
+
+    async def main():
+        first = await executors.run_sync(Squares(), {"n": 1000}, {})
+        second = await executors.run_sync(Squares(), {"n": 10}, {})
+        return first, second
+
+    first, second = asyncio.run(main())
+    executors.shutdown()
+    assert first["data"] == sum(i * i for i in range(1000))
+    assert first["pid"] != os.getpid()
+    assert second["pid"] == first["pid"]
+    assert executors.metrics()["dispatched"][CPU] == 2
+
+
+def test_cancelling_cpu_node_replaces_worker():
+    executors = NodeExecutors(cpu_processes=1)
+
+    async def main():
+        before = await executors.run_sync(Squares(), {"n": 1}, {})
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(executors.run_sync(Forever(), {}, {}), 1)
+        after = await executors.run_sync(Squares(), {"n": 1}, {})
+        return before["pid"], after["pid"]
+
+    started = time.monotonic()
+    before, after = asyncio.run(main())
+    executors.shutdown()
+    assert time.monotonic() - started < 15
+    assert before != after
+    assert executors.metrics()["cpu_workers_replaced"] == 1
+
+
+def test_missing_execute_sync():
+    executors = NodeExecutors()
+
+    with pytest.raises(NotImplementedError):
+        asyncio.run(executors.run_sync(NoSyncBody(), {}, {}))
+    executors.shutdown()
+
+
+def test_block_detector_flags_blocking_step():
+    detector = BlockDetector(threshold_ms=20)
+
+    async def blocking():
+        time.sleep(0.05)
+        await asyncio.sleep(0)
+        return "done"
+
+    async def polite():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        assert await detector.watch(blocking(), "a", "bad") == "done"
+        assert await detector.watch(polite(), "b", "good") == "done"
+
+    asyncio.run(main())
+    assert list(detector.by_node_type) == ["bad"]
+    assert detector.events[0]["node_id"] == "a"
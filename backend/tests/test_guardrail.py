@@ -0,0 +1,125 @@
+# backend/tests/test_guardrail.py
+
+import asyncio
+
+from agents.guardrail import GuardrailAgent, parse_verdict, split_overlapping
+from services.llm_backends import ERROR_PREFIX
+from services.streams import StreamChannel
+
+
+def test_parse_verdict_plain_and_fenced():
+    assert parse_verdict('{ "allowed": true }') == {"allowed": True, "reason": None}
+    assert parse_verdict('```json\n{"allowed": false, "reason": "weapons"}\n```') == {
+        "allowed": False,
+        "reason": "weapons",
+    }
+
+
+def test_parse_verdict_text_around_json():
+    verdict = parse_verdict('Sure. {"note": 1} Verdict: {"allowed": "false", "reason": "x"} ok')
+    assert verdict == {"allowed": False, "reason": "x"}
+
+
+def test_parse_verdict_only_true_allows():
+    assert parse_verdict('{"allowed": " TRUE "}')["allowed"] is True
+    for value in ['"no"', '"blocked"', '"yes"', '1', '"1"', 'null', '[]']:
+        assert parse_verdict(f'{{"allowed": {value}}}')["allowed"] is False, value
+
+
+def test_parse_verdict_broken_json_with_false_blocks():
+    assert parse_verdict('{"allowed": false, "reason": "unterminated')["allowed"] is False
+
+
+def test_parse_verdict_fails_closed():
+    unparsed = parse_verdict("I think this is fine")
+    assert unparsed["allowed"] is False
+    assert unparsed["error"]
+
+    failed = parse_verdict(f"{ERROR_PREFIX} Gemini API: quota exceeded")
+    assert failed["allowed"] is False
+    assert failed["error"].startswith(ERROR_PREFIX)
+
+
+def test_split_overlapping_covers_text():
+    text = "word " * 2000
+    spans = split_overlapping(text, 1000, 100)
+
+    assert spans[0][0] == 0 and spans[-1][1] == len(text)
+    assert all(end - start <= 1000 for start, end in spans)
+    # Consecutive spans overlap, so nothing falls between them
+    assert all(b_start < a_end for (_, a_end), (b_start, _) in zip(spans, spans[1:]))
+    # Ends snap back to whitespace
+    assert all(text[end - 1] == " " for _, end in spans)
+
+
+class FakeLLM:
+    """Blocks any text containing BAD; answers errors for text containing FAIL."""
+
+    def __init__(self):
+        self.contexts = []
+
+    async def __call__(self, prompt, context=None, task=None, **options):
+        self.contexts.append(context)
+        await asyncio.sleep(0)
+        if "FAIL" in context:
+            return f"{ERROR_PREFIX} Gemini API: 503"
+        if "BAD" in context:
+            return '{"allowed": false, "reason": "bad"}'
+        return '{"allowed": true}'
+
+
+def test_llm_error_blocks():
+    agent = GuardrailAgent(FakeLLM())
+
+    result = asyncio.run(agent.execute({"input": "FAIL"}, {}))
+
+    assert result["success"] is False
+    assert result["blocked"] is True
+    assert result["error"].startswith("Safety check failed")
+
+
+def test_chunked_check_reports_location():
+    agent = GuardrailAgent(FakeLLM())
+    text = "safe line\n" * 300 + "BAD\n" + "safe line\n" * 300
+
+    result = asyncio.run(agent.execute({"input": text, "chunk_chars": 1000}, {}))
+
+    location = result["location"]
+    assert result["blocked"] is True
+    assert "BAD" in text[location["start"]:location["end"]]
+    assert location["line"] == text.count("\n", 0, location["start"]) + 1
+
+
+def check_stream(agent, chunks, node_input):
+    async def main():
+        channel = StreamChannel()
+        for chunk in chunks:
+            channel.publish(chunk)
+        channel.close()
+        return await agent.execute(node_input, {"parent": {"stream": channel}})
+
+    return asyncio.run(main())
+
+
+def test_stream_splits_oversized_chunks():
+    llm = FakeLLM()
+    agent = GuardrailAgent(llm)
+    chunks = ["page one", "safe line\n" * 300 + "BAD\n" + "safe line\n" * 300]
+
+    result = check_stream(agent, chunks, {"chunk_chars": 1000})
+
+    assert all(len(context) <= 1000 for context in llm.contexts)
+    location = result["location"]
+    joined = "\n\n".join(chunks)
+    assert location["chunk"] == 1
+    assert "BAD" in joined[location["start"]:location["end"]]
+
+
+def test_stream_passes_joined_text():
+    agent = GuardrailAgent(FakeLLM())
+    chunks = ["page one", "", "page three"]
+
+    result = check_stream(agent, chunks, {})
+
+    assert result["success"] is True
+    assert result["data"] == "page one\n\n\n\npage three"
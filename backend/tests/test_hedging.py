@@ -0,0 +1,122 @@
+# backend/tests/test_hedging.py
+
+import asyncio
+
+from services.hedging import HedgePolicy
+from services.llm_backends import ERROR_PREFIX
+from services.model_router import LatencyStats
+
+
+MODEL = "fake-model"
+ERROR = f"{ERROR_PREFIX} Gemini API: 503"
+
+
+class FakeBackend:
+    """Answers scripted (delay_s, answer) pairs, one per call."""
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.calls = 0
+        self.cancelled = 0
+
+    async def call(self):
+        delay, answer = self.script[self.calls]
+        self.calls += 1
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return answer
+
+
+def make_policy(budget=1.0):
+    # p95 of 20 samples at 10 ms: hedge after 10 ms
+    stats = LatencyStats()
+    for _ in range(20):
+        stats.record(MODEL, 0.01)
+    return HedgePolicy(stats, budget=budget)
+
+
+def run(policy, backend):
+    return asyncio.run(policy.run(backend.call, MODEL))
+
+
+def test_no_hedge_without_samples():
+    policy = HedgePolicy(LatencyStats())
+    backend = FakeBackend((0.03, "primary"))
+
+    assert run(policy, backend) == "primary"
+    assert policy.hedges == 0
+
+
+def test_fast_primary_is_not_hedged():
+    policy = make_policy()
+    backend = FakeBackend((0, "primary"))
+
+    assert run(policy, backend) == "primary"
+    assert backend.calls == 1
+
+
+def test_slow_primary_loses_to_hedge():
+    policy = make_policy()
+    backend = FakeBackend((0.2, "primary"), (0, "hedge"))
+
+    assert run(policy, backend) == "hedge"
+    assert policy.hedge_wins == 1
+    assert backend.cancelled == 1
+
+
+def test_budget_caps_hedges():
+    policy = make_policy(budget=0)
+    backend = FakeBackend((0.03, "primary"), (0, "hedge"))
+
+    assert run(policy, backend) == "primary"
+    assert backend.calls == 1
+
+
+def test_fast_hedge_error_waits_for_primary():
+    policy = make_policy()
+    backend = FakeBackend((0.05, "primary"), (0, ERROR))
+
+    assert run(policy, backend) == "primary"
+    assert policy.hedge_wins == 0
+
+
+def test_primary_error_waits_for_hedge():
+    policy = make_policy()
+    backend = FakeBackend((0.02, ERROR), (0.05, "hedge"))
+
+    assert run(policy, backend) == "hedge"
+    assert policy.hedge_wins == 1
+
+
+def test_hedge_exception_waits_for_primary():
+    policy = make_policy()
+    backend = FakeBackend((0.05, "primary"), (0, None))
+
+    async def call():
+        if backend.calls == 1:
+            backend.calls += 1
+            raise RuntimeError("connection reset")
+        return await backend.call()
+
+    assert asyncio.run(policy.run(call, MODEL)) == "primary"
+
+
+def test_both_failed_returns_primary_error():
+    policy = make_policy()
+    backend = FakeBackend((0.02, ERROR + " primary"), (0, ERROR + " hedge"))
+
+    assert run(policy, backend) == ERROR + " primary"
+
+
+def test_separate_hedge_call():
+    policy = make_policy()
+    backend = FakeBackend((0.2, "primary"))
+
+    async def hedge_call():
+        return "hedge via own slot"
+
+    answer = asyncio.run(policy.run(backend.call, MODEL, hedge_call=hedge_call))
+    assert answer == "hedge via own slot"
@@ -0,0 +1,117 @@
+# backend/tests/test_output_memory.py
+
+import asyncio
+from types import SimpleNamespace
+
+from services.output_memory import OutputMemory, text_bytes
+
+
+class FakeRef:
+    def __init__(self, text):
+        self.size = len(text)
+
+
+class FakeArtifacts:
+    """Externalizes every large string field to a FakeRef."""
+
+    def __init__(self):
+        self.spilled = []
+
+    async def externalize(self, output, threshold=0):
+        spilled = {}
+        for key, value in output.items():
+            if isinstance(value, str) and len(value) >= threshold:
+                self.spilled.append(key)
+                value = FakeRef(value)
+            spilled[key] = value
+        return spilled
+
+    def put(self, text):
+        return FakeRef(text)
+
+
+def make_plan(edges):
+    nodes = {node for edge in edges for node in edge}
+    return SimpleNamespace(
+        children={node: [b for a, b in edges if a == node] for node in nodes},
+        parents={node: [a for a, b in edges if b == node] for node in nodes},
+    )
+
+
+def output(size):
+    return {"success": True, "data": "x" * size}
+
+
+# in -> a -> out, plus in -> b -> out
+EDGES = [("in", "a"), ("in", "b"), ("a", "out"), ("b", "out")]
+
+
+def run_units(memory, units, sizes):
+    results = {}
+
+    async def main():
+        for unit in units:
+            for node_id in unit:
+                results[node_id] = output(sizes[node_id])
+            await memory.after_unit(unit, results)
+
+    asyncio.run(main())
+    return results
+
+
+def test_text_bytes_ignores_refs():
+    assert text_bytes({"data": "abc", "items": ["de", FakeRef("f" * 100)], "n": 3}) == 5
+
+
+def test_refcount_drops_after_last_consumer():
+    memory = OutputMemory(make_plan(EDGES), FakeArtifacts(), result_nodes=["out"])
+    sizes = {"in": 10_000, "a": 10_000, "b": 10_000, "out": 100}
+
+    results = run_units(memory, [["in"], ["a"]], sizes)
+    # "b" has not run yet: "in" still has a consumer
+    assert results["in"]["data"] == "x" * 10_000
+    assert memory.refcounts["in"] == 1
+
+    results = run_units(memory, [["in"], ["a"], ["b"], ["out"]], sizes)
+    assert results["in"] == {"success": True, "released": True}
+    assert results["a"] == {"success": True, "released": True}
+    assert results["out"]["data"] == "x" * 100
+    assert memory.dropped == 3
+    assert memory.live_bytes == 100
+
+
+def test_consumed_outputs_stay_in_memory_under_budget():
+    artifacts = FakeArtifacts()
+    memory = OutputMemory(make_plan(EDGES), artifacts)
+    sizes = {"in": 10_000, "a": 10_000, "b": 10_000, "out": 100}
+
+    results = run_units(memory, [["in"], ["a", "b"], ["out"]], sizes)
+
+    assert all(isinstance(results[node]["data"], str) for node in sizes)
+    assert artifacts.spilled == []
+    assert memory.spilled == 0
+
+
+def test_budget_spills_largest_first():
+    artifacts = FakeArtifacts()
+    memory = OutputMemory(make_plan(EDGES), artifacts, budget_bytes=25_000)
+    sizes = {"in": 5_000, "a": 20_000, "b": 10_000, "out": 100}
+
+    results = run_units(memory, [["in"], ["a", "b"]], sizes)
+
+    assert isinstance(results["a"]["data"], FakeRef)
+    assert isinstance(results["b"]["data"], str)
+    assert memory.spilled == 1
+    assert memory.live_bytes <= 25_000
+    assert memory.peak_bytes == 35_000
+
+
+def test_retained_outputs_are_never_released():
+    memory = OutputMemory(
+        make_plan(EDGES), FakeArtifacts(), retain=["in"], result_nodes=["out"], budget_bytes=0
+    )
+    sizes = {"in": 10_000, "a": 10_000, "b": 10_000, "out": 100}
+
+    results = run_units(memory, [["in"], ["a", "b"], ["out"]], sizes)
+
+    assert results["in"]["data"] == "x" * 10_000
@@ -0,0 +1,48 @@
+# backend/tests/test_responses.py
+
+import gzip
+import json
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from responses import encode_response, project_output, project_results  # noqa: E402
+from services.artifacts import ArtifactRef  # noqa: E402
+
+
+def test_project_output_drops_unset_fields():
+    output = {"success": 1, "data": "x", "error": None, "status": None, "count": None}
+
+    assert project_output(output) == {"success": True, "data": "x", "count": None}
+
+
+def test_project_results_selects_nodes_and_fields():
+    results = {
+        "a": {"success": True, "data": "A", "node_type": "llm", "prompt_used": "p"},
+        "b": {"success": False, "error": "boom", "node_type": "llm"},
+    }
+
+    projected = project_results(results, ["b", "missing"], ["error"])
+
+    assert projected == {"b": {"success": False, "error": "boom"}}
+
+
+def test_refs_are_presented(tmp_path):
+    path = tmp_path / "artifact.txt"
+    path.write_text("long text")
+    ref = ArtifactRef("abc", path, 9, "long")
+
+    projected = project_output({"success": True, "data": ref, "items": [ref, "s"]})
+
+    assert projected["data"] == ref.to_dict()
+    assert projected["items"] == [ref.to_dict(), "s"]
+
+
+def test_encode_response_compresses_large_bodies():
+    payload = {"result": "x" * 5000}
+
+    response = encode_response(payload, "gzip")
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert json.loads(gzip.decompress(response.body)) == payload
@@ -0,0 +1,29 @@
+# backend/tests/test_retriever.py
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from tools.retriever import RetrievalTool
+
+
+def retrieve(text, **parent):
+    outputs = {"extract": {"success": True, "data": text, "node_type": "document_extractor", **parent}}
+    return asyncio.run(RetrievalTool().execute({"query": "warranty period", "top_k": 1}, outputs))
+
+
+def test_index_follows_the_text_not_the_source_hash():
+    # Same source file, different extraction options -> different text
+    first = retrieve("The warranty period is two years.", content_hash="a" * 64)
+    second = retrieve("Pages 5-6: the warranty period is ninety days.", content_hash="a" * 64)
+
+    assert "two years" in first["data"]
+    assert "ninety days" in second["data"]
+
+
+def test_repeated_text_reuses_the_index():
+    text = "Delivery within 30 days. The warranty period is one year."
+    retrieve(text)
+    assert retrieve(text)["index"]["source"] == "memory"
@@ -0,0 +1,97 @@
+# backend/tests/test_router.py
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from engine import WorkflowEngine
+from nodes import router
+from nodes.router import RouterNode, evaluate, select_routes
+
+
+def route(routes, parent, **config):
+    node = RouterNode(llm=None)
+    outputs = {"parent": {"success": True, "node_type": "input", **parent}}
+    return asyncio.run(node.execute({"routes": routes, **config}, outputs))
+
+
+def test_evaluate_expressions():
+    variables = {"count": 3, "data": "Invoice #12", "outputs": {"a": {"x": 1}}}
+
+    assert evaluate("count > 2 and 'Invoice' in data", variables)
+    assert evaluate("outputs['a']['x'] + 1 == 2", variables)
+    assert evaluate("outputs['missing'] == None", variables)
+    assert evaluate("lower(data) == 'invoice #12'", variables)
+
+
+def test_evaluate_rejects_unsafe_syntax():
+    for expression in ["__import__('os')", "data.upper()", "unknown > 1", "'a' * 10**9"]:
+        with pytest.raises(ValueError):
+            evaluate(expression, {"data": "x"})
+
+
+def test_select_routes_first_or_all():
+    routes = [
+        {"target": "a", "when": "count > 1"},
+        {"target": "b", "when": "count > 2"},
+        {"target": "c", "when": "count > 5"},
+    ]
+
+    assert select_routes(routes, {"count": 3}) == ["a"]
+    assert select_routes(routes, {"count": 3}, multi=True) == ["a", "b"]
+
+
+def test_router_default_and_failure():
+    routes = [{"target": "big", "when": "count > 10"}]
+
+    output = route(routes, {"count": 1}, default="small")
+    assert output["success"] and output["selected"] == ["small"]
+
+    output = route([{"target": "x", "when": "nope > 1"}], {"count": 1})
+    assert not output["success"]
+    assert "selected" not in output
+
+
+def test_matches_runs_bounded():
+    routes = [{"target": "invoice", "when": "matches('inv[0-9]+', data)"}]
+    assert route(routes, {"data": "see inv42"})["selected"] == ["invoice"]
+
+    long_pattern = [{"target": "x", "when": f"matches('{'a' * 500}', data)"}]
+    output = route(long_pattern, {"data": "a"})
+    assert not output["success"]
+    assert "Pattern longer than" in output["error"]
+
+
+def test_matches_times_out(monkeypatch):
+    monkeypatch.setattr(router, "MATCH_TIMEOUT_S", 0.5)
+    routes = [{"target": "x", "when": "matches('(a+)+$', data)"}]
+
+    output = route(routes, {"data": "a" * 40 + "b"})
+    assert not output["success"]
+    assert "took longer than" in output["error"]
+
+
+def make_plan(subtypes, edges):
+    return SimpleNamespace(
+        node_map={node: SimpleNamespace(subtype=subtype) for node, subtype in subtypes.items()},
+        parents={node: [a for a, b in edges if b == node] for node in subtypes},
+    )
+
+
+def test_failed_router_skips_all_children():
+    plan = make_plan(
+        {"r": "router", "a": "llm", "b": "llm", "t": "text", "c": "llm"},
+        [("r", "a"), ("r", "b"), ("t", "c")],
+    )
+    unreachable = WorkflowEngine._unreachable
+
+    results = {"r": {"success": True, "selected": ["a"]}}
+    assert not unreachable(plan, "a", results)
+    assert unreachable(plan, "b", results)
+
+    results = {"r": {"success": False, "error": "Routing failed"}, "t": {"success": False}}
+    assert unreachable(plan, "a", results)
+    assert unreachable(plan, "b", results)
+    # A failed ordinary node still leaves its children to run
+    assert not unreachable(plan, "c", results)
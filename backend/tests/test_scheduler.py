@@ -0,0 +1,92 @@
+# backend/tests/test_scheduler.py
+
+import asyncio
+
+from services.execution_context import priority_scope
+from services.scheduler import FairScheduler, parse_weights
+
+
+def test_parse_weights():
+    assert parse_weights("interactive=8, batch=1") == {"interactive": 8.0, "batch": 1.0}
+
+
+def run_calls(scheduler, calls, hold_s=0.01):
+    """Start (priority, tenant, label) calls at once; labels in dispatch order."""
+    order = []
+
+    async def call(priority, tenant, label):
+        with priority_scope(priority, tenant):
+            async with scheduler.slot():
+                order.append(label)
+                await asyncio.sleep(hold_s)
+
+    async def main():
+        await asyncio.gather(*(call(*spec) for spec in calls))
+
+    asyncio.run(main())
+    return order
+
+
+def test_interactive_overtakes_queued_batch():
+    scheduler = FairScheduler("t", 1, {"interactive": 8, "batch": 1}, 0, 60)
+    calls = [("batch", "b", f"b{i}") for i in range(4)] + [("interactive", "u", "i0")]
+
+    order = run_calls(scheduler, calls)
+
+    # The first batch call had the slot; the interactive one goes next
+    assert order[:2] == ["b0", "i0"]
+    assert sorted(order) == ["b0", "b1", "b2", "b3", "i0"]
+
+
+def test_weighted_share_between_classes():
+    scheduler = FairScheduler("t", 1, {"interactive": 3, "batch": 1}, 0, 60)
+    calls = [("batch", "b", "b")] * 8 + [("interactive", "u", "i")] * 8
+
+    order = run_calls(scheduler, calls, hold_s=0)
+
+    # Roughly three interactive dispatches per batch one while both wait
+    assert order[:8].count("i") >= 5
+
+
+def test_tenants_in_one_class_alternate():
+    scheduler = FairScheduler("t", 1, {"batch": 1}, 0, 60)
+    calls = [("batch", "a", "a")] * 4 + [("batch", "b", "b")] * 4
+
+    order = run_calls(scheduler, calls, hold_s=0)
+
+    assert order[1:5] in (["b", "a", "b", "a"], ["a", "b", "a", "b"])
+
+
+def test_batch_never_takes_reserved_slots():
+    scheduler = FairScheduler("t", 4, {"interactive": 8, "batch": 1}, 0.5, 60)
+    peak = 0
+
+    async def call():
+        nonlocal peak
+        with priority_scope("batch", None):
+            async with scheduler.slot():
+                peak = max(peak, scheduler.running["batch"])
+                await asyncio.sleep(0.01)
+
+    async def main():
+        await asyncio.gather(*(call() for _ in range(10)))
+
+    asyncio.run(main())
+    assert peak == 2
+    assert scheduler.running == {"interactive": 0, "batch": 0}
+
+
+def test_cancelled_waiter_leaves_queue():
+    scheduler = FairScheduler("t", 1, {"batch": 1}, 0, 60)
+
+    async def main():
+        with priority_scope("batch", None):
+            async with scheduler.slot():
+                waiter = asyncio.ensure_future(scheduler.slot().__aenter__())
+                await asyncio.sleep(0)
+                waiter.cancel()
+                await asyncio.sleep(0)
+        assert scheduler.running["batch"] == 0
+        assert not any(queue.waiters for queue in scheduler._queues.values())
+
+    asyncio.run(main())
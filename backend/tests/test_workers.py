@@ -0,0 +1,157 @@
+# backend/tests/test_workers.py
+
+import asyncio
+import os
+import signal
+
+from services.workers import ExecutionRegistry, WorkflowStore, _key
+
+
+WORKFLOW = {"id": "w1", "nodes": [], "connections": []}
+
+
+def test_workflow_store_is_shared_between_instances(tmp_path):
+    # Two stores on one directory stand in for two workers
+    first, second = WorkflowStore(tmp_path), WorkflowStore(tmp_path)
+    compiled = []
+
+    def compile_plan(workflow):
+        compiled.append(workflow["id"])
+        return ("plan", workflow["id"], len(workflow["nodes"]))
+
+    async def main():
+        await first.save("w1", WORKFLOW, plan="local plan")
+        assert await first.plan("w1", compile_plan) == "local plan"
+        assert await second.get("w1") == WORKFLOW
+        assert await second.plan("w1", compile_plan) == ("plan", "w1", 0)
+        assert await second.plan("w1", compile_plan) == ("plan", "w1", 0)
+
+        # A save elsewhere invalidates the compiled plan
+        os.utime(first._path("w1"), ns=(1, 1))
+        await first.save("w1", {**WORKFLOW, "nodes": [{"id": "n"}]})
+        assert await second.plan("w1", compile_plan) == ("plan", "w1", 1)
+
+        assert [w["id"] for w in await second.list()] == ["w1"]
+        assert await second.delete("w1") is True
+        assert await first.plan("w1", compile_plan) is None
+        assert await first.delete("w1") is False
+
+    asyncio.run(main())
+    assert compiled == ["w1", "w1"]
+
+
+def test_compile_errors_are_cached(tmp_path):
+    store = WorkflowStore(tmp_path)
+
+    def compile_plan(workflow):
+        raise ValueError("cycle")
+
+    async def main():
+        await store.save("w1", WORKFLOW)
+        return await store.plan("w1", compile_plan)
+
+    assert isinstance(asyncio.run(main()), ValueError)
+
+
+def test_registry_disabled_is_a_no_op(tmp_path):
+    registry = ExecutionRegistry(tmp_path, enabled=False)
+
+    assert registry.register("run") is True
+    assert registry.owner("run") is None
+    assert registry.request_cancel("run") is False
+    assert not (tmp_path / "running").exists()
+
+
+def test_registry_owner_and_release(tmp_path):
+    registry = ExecutionRegistry(tmp_path, enabled=True)
+    flushed = []
+
+    async def flush():
+        flushed.append(True)
+
+    async def main():
+        assert registry.register("run") is True
+        assert registry.owner("run") == os.getpid()
+        # Already running (here or in another worker)
+        assert registry.register("run") is False
+
+        registry.release("run", flush)
+        await asyncio.sleep(0.01)
+
+    asyncio.run(main())
+    assert flushed == [True]
+    assert registry.owner("run") is None
+
+
+def test_registry_ignores_dead_owner(tmp_path):
+    registry = ExecutionRegistry(tmp_path, enabled=True)
+    (registry.running / _key("garbled")).write_text("not a pid")
+
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0)
+    os.waitpid(pid, 0)
+    (registry.running / _key("run")).write_text(str(pid))
+
+    assert registry.owner("garbled") is None
+    assert registry.owner("run") is None
+    assert registry.register("run") is True
+
+
+def test_concurrent_register_has_one_winner(tmp_path):
+    registry = ExecutionRegistry(tmp_path, enabled=True)
+    results_r, results_w = os.pipe()
+    release_r, release_w = os.pipe()
+
+    children = []
+    for _ in range(8):
+        pid = os.fork()
+        if pid == 0:
+            os.close(release_w)
+            outcome = b"E"
+            try:
+                outcome = b"1" if registry.register("run") else b"0"
+            finally:
+                os.write(results_w, outcome)
+                # Stay alive (a live owner) until every worker has tried
+                os.read(release_r, 1)
+                os._exit(0)
+        children.append(pid)
+
+    outcomes = b""
+    while len(outcomes) < len(children):
+        outcomes += os.read(results_r, len(children))
+    assert registry.owner("run") in children
+    os.close(release_w)
+    for pid in children:
+        os.waitpid(pid, 0)
+
+    assert outcomes.count(b"1") == 1
+    assert registry.register("run") is True
+
+
+def test_cross_worker_cancel(tmp_path, monkeypatch):
+    registry = ExecutionRegistry(tmp_path, enabled=True)
+    cancelled = []
+
+    class Engine:
+        def cancel(self, execution_id):
+            cancelled.append(execution_id)
+            return True
+
+    async def main():
+        registry.install(Engine())
+        registry.register("run")
+        # Pretend the request landed on another worker
+        registry._on_cancel_signal()
+        assert cancelled == []
+
+        with monkeypatch.context() as patch:
+            patch.setattr(os, "getpid", lambda: -1)
+            assert registry.request_cancel("run") is True
+        await asyncio.sleep(0.05)
+        asyncio.get_running_loop().remove_signal_handler(signal.SIGUSR1)
+
+    asyncio.run(main())
+    assert cancelled == ["run"]
+    assert not list(registry.cancels.iterdir())
@@ -1,7 +1,62 @@
+import threading
+from collections import OrderedDict
 from agent_base import BaseTool
-from docling.document_converter import DocumentConverter
+from docling.datamodel.base_models import InputFormat
+from docling.datamodel.pipeline_options import AcceleratorOptions, PdfPipelineOptions
+from docling.document_converter import DocumentConverter, PdfFormatOption
+from services.deadlines import remaining
+from services.document_cache import document_cache, file_hash
+from services.execution_context import current_node_id
+from services.executors import ASYNC_IO, node_executors
+from services.fetcher import fetcher
+from services.profiling import span
+from services.streams import publish
+from services.subprocess_runner import run_killable
+
+# Docling converters kept per distinct pipeline options (LRU)
+CONVERTER_CACHE_SIZE = 4
+
+# Pipelines loaded before a converter is first used; a pipeline first
+# built in a killable child would be lost with it
+WARM_FORMATS = (InputFormat.PDF, InputFormat.IMAGE)
+
+# Characters (per page) a text layer needs before it is trusted
+TEXT_LAYER_MIN_CHARS = 100
+
+# Share of "normal" characters below which a text layer is treated as
+# garbage (broken font encodings, OCR noise)
+TEXT_LAYER_MIN_CLEAN_RATIO = 0.85
+
+TEXT_LAYER = "text_layer"
+DOCLING = "docling"
 
 class DocumentExtractorTool(BaseTool):
+    """
+    Tiered extraction: born-digital PDF pages are read straight from
+    their text layer; scanned or garbled pages (and non-PDF inputs) go
+    through the full Docling pipeline, one page range at a time.
+
+    URLs are fetched through the shared fetcher (services/fetcher.py)
+    and results are cached by content hash (services/document_cache.py).
+
+    Config:
+    - tier: auto (default) | text_layer | docling
+    - min_text_chars: text-layer characters a page needs in auto mode
+    - do_ocr, do_table_structure, num_threads: Docling pipeline options
+    - max_pages: only extract the first N pages of the range
+    - page_range: "3-10" or [3, 10] (1-based, inclusive)
+    - stream: convert in page batches and publish each batch as soon
+      as it is ready, so chunk-capable consumers can start early
+    - batch_pages: pages per batch when streaming (default 4)
+    """
+
+    produces_stream = True
+
+    # Orchestrates awaits: Docling conversions run in killable forked
+    # children (they need the models loaded in this process), file
+    # hashing and the text-layer tier in the I/O pool
+    execution_class = ASYNC_IO
+
     def __init__(self):
         super().__init__(
             name="Document Extractor",
@@ -9,30 +64,306 @@ class DocumentExtractorTool(BaseTool):
             icon="📄"
         )
         self.converter = DocumentConverter()
+        # Pipeline options -> converter (pipelines are expensive to
+        # build, and hold their models: keep only the recent few)
+        self._converters = OrderedDict()
+        # Looked up from I/O pool threads
+        self._converters_lock = threading.Lock()
+        self._default_warm = False
+        self._warm_lock = threading.Lock()
+
+    # ================================
+    # Docling tier
+    # ================================
+    @staticmethod
+    def _pipeline_key(node_input):
+        """Hashable Docling options from the node config, None for defaults."""
+        keys = ("do_ocr", "do_table_structure", "num_threads")
+        if all(node_input.get(key) in (None, "") for key in keys):
+            return None
+        return (
+            bool(node_input.get("do_ocr", True)),
+            bool(node_input.get("do_table_structure", True)),
+            int(node_input.get("num_threads") or 4),
+        )
+
+    @staticmethod
+    def _warm(converter):
+        """Load the converter's PDF and image pipelines (and models) here."""
+        for input_format in WARM_FORMATS:
+            try:
+                converter.initialize_pipeline(input_format)
+            except Exception as exc:
+                print(f"⚠️ Could not load the Docling {input_format} pipeline: {exc}")
+
+    def warm_pipelines(self):
+        """Load the default pipelines once (serve.py: in the master)."""
+        with self._warm_lock:
+            if not self._default_warm:
+                self._warm(self.converter)
+                self._default_warm = True
+
+    def _converter(self, key):
+        if key is None:
+            self.warm_pipelines()
+            return self.converter
+
+        with self._converters_lock:
+            converter = self._converters.get(key)
+            if converter is not None:
+                self._converters.move_to_end(key)
+                return converter
+
+        do_ocr, do_table_structure, num_threads = key
+        options = PdfPipelineOptions(
+            do_ocr=do_ocr,
+            do_table_structure=do_table_structure,
+            accelerator_options=AcceleratorOptions(num_threads=num_threads),
+        )
+        converter = DocumentConverter(
+            format_options={InputFormat.PDF: PdfFormatOption(pipeline_options=options)}
+        )
+        # Load the models here, not in every killable child
+        self._warm(converter)
+
+        with self._converters_lock:
+            self._converters[key] = converter
+            while len(self._converters) > CONVERTER_CACHE_SIZE:
+                self._converters.popitem(last=False)
+        return converter
+
+    def _convert(self, source: str, page_range=None, converter=None) -> str:
+        converter = converter or self.converter
+        if page_range:
+            doc = converter.convert(source, page_range=page_range).document
+        else:
+            doc = converter.convert(source).document
+        return doc.export_to_markdown()
+
+    async def _run_convert(self, source, page_range=None, pipeline_key=None):
+        with span("docling.convert"):
+            converter = await node_executors.run_blocking(self._converter, pipeline_key)
+
+            # Inside an execution (which can always be cancelled) or under
+            # a deadline, convert in a killable child process so a cancel
+            # or timeout really stops Docling; otherwise just keep the
+            # blocking conversion off the event loop.
+            if current_node_id() is not None or remaining() is not None:
+                return await run_killable(self._convert, source, page_range, converter)
+            return await node_executors.run_blocking(self._convert, source, page_range, converter)
+
+    # ================================
+    # Text-layer tier
+    # ================================
+    @staticmethod
+    def _is_local_pdf(source):
+        if "://" in str(source):
+            return False
+        with open(source, "rb") as f:
+            return f.read(4) == b"%PDF"
+
+    @staticmethod
+    def _clean_ratio(text):
+        if not text:
+            return 0.0
+        normal = sum(
+            ch.isalnum() or ch.isspace() or ch in ".,;:!?'\"()[]-–—/%&*+=#@$€"
+            for ch in text
+        )
+        return normal / len(text)
+
+    def _probe(self, source, page_range, tier, min_chars):
+        """
+        Tier for each page of a local PDF: [(page, tier)], 1-based.
+        None if the source is not a readable local PDF.
+        """
+        if not self._is_local_pdf(source):
+            return None
+        try:
+            import pypdfium2 as pdfium
+            pdf = pdfium.PdfDocument(source)
+        except Exception:
+            return None
+
+        try:
+            start, end = page_range or (1, len(pdf))
+            end = min(end, len(pdf))
+            plan = []
+
+            for number in range(start, end + 1):
+                if tier in (TEXT_LAYER, DOCLING):
+                    plan.append((number, tier))
+                    continue
+
+                page = pdf[number - 1]
+                textpage = page.get_textpage()
+                text = textpage.get_text_range().strip()
+                textpage.close()
+                page.close()
+
+                good = len(text) >= min_chars and self._clean_ratio(text) >= TEXT_LAYER_MIN_CLEAN_RATIO
+                plan.append((number, TEXT_LAYER if good else DOCLING))
+
+            return plan
+        finally:
+            pdf.close()
+
+    @staticmethod
+    def _read_text_layer(source, first, last):
+        import pypdfium2 as pdfium
+
+        pdf = pdfium.PdfDocument(source)
+        try:
+            pages = []
+            for number in range(first, last + 1):
+                page = pdf[number - 1]
+                textpage = page.get_textpage()
+                pages.append(textpage.get_text_range().strip())
+                textpage.close()
+                page.close()
+            return "\n\n".join(pages)
+        finally:
+            pdf.close()
+
+    @staticmethod
+    def _segments(plan, batch_pages):
+        """
+        Group consecutive pages with the same tier into
+        (tier, first, last), at most `batch_pages` long.
+        """
+        segments = []
+        for number, tier in plan:
+            if segments:
+                last_tier, first, last = segments[-1]
+                if (
+                    last_tier == tier
+                    and last == number - 1
+                    and (batch_pages is None or number - first < batch_pages)
+                ):
+                    segments[-1] = (tier, first, number)
+                    continue
+            segments.append((tier, number, number))
+        return segments
+
+    @staticmethod
+    def _parse_page_range(value):
+        if not value:
+            return None
+        if isinstance(value, str):
+            start, _, end = value.partition("-")
+            return int(start), int(end or start)
+        start, end = value
+        return int(start), int(end)
 
     async def execute(self, node_input, parent_outputs):
         """Extract markdown directly from the source"""
-        
+
         # Determine source (path or URL)
         source = node_input.get("value") or self.get_parent_data(parent_outputs)
-        
+
         if not source:
             return {"success": False, "error": "No source path or URL provided"}
-        
+
         try:
-            # Simple conversion logic as requested
-            doc = self.converter.convert(source).document
-            markdown_output = doc.export_to_markdown()
-            
-            return {
+            page_range = self._parse_page_range(node_input.get("page_range"))
+            if node_input.get("max_pages"):
+                start, end = page_range or (1, 10 ** 6)
+                page_range = (start, min(end, start + int(node_input["max_pages"]) - 1))
+
+            options = {
+                "tier": node_input.get("tier", "auto"),
+                "min_chars": int(node_input.get("min_text_chars", TEXT_LAYER_MIN_CHARS)),
+                "pipeline": self._pipeline_key(node_input),
+                "page_range": page_range,
+            }
+            streaming = bool(node_input.get("stream"))
+            batch_pages = max(1, int(node_input.get("batch_pages", 4))) if streaming else None
+
+            # ================================
+            # Resolve to local bytes + content hash
+            # ================================
+            # URLs go through the shared pooled/cached fetcher; the
+            # extraction cache is keyed by content, not location.
+            source = str(source).strip()
+            fetched = None
+            if "://" in source:
+                fetched = await fetcher.fetch(source)
+                path, content_hash = str(fetched.path), fetched.content_hash
+            else:
+                path = source
+                content_hash = await node_executors.run_blocking(file_hash, path)
+
+            cache_key = document_cache.key(content_hash, options)
+            result = await document_cache.get(cache_key)
+            cache_hit = result is not None
+
+            if cache_hit:
+                publish(result["data"])
+            else:
+                result = await self._extract(path, options, batch_pages)
+                await document_cache.put(cache_key, result)
+
+            output = {
                 "success": True,
-                "data": markdown_output,
+                **result,
+                "content_hash": content_hash,
+                "cache_hit": cache_hit,
                 "node_type": "document_extractor"
             }
-        
+            if fetched:
+                output["fetch"] = fetched.to_dict()
+            return output
+
         except Exception as e:
             return {
                 "success": False,
                 "error": str(e),
                 "node_type": "document_extractor"
             }
+
+    async def _extract(self, path, options, batch_pages):
+        """
+        Tiered extraction of a local file.
+        Returns {"data", and "tier" or per-page "pages" / "tiers"}.
+        """
+        tier = options["tier"]
+        page_range = options["page_range"]
+        pipeline_key = options["pipeline"]
+
+        plan = await node_executors.run_blocking(
+            self._probe, path, page_range, tier, options["min_chars"]
+        )
+
+        # ================================
+        # Not a PDF: Docling in one go
+        # ================================
+        if plan is None:
+            if tier == TEXT_LAYER:
+                raise ValueError("Text-layer extraction needs a PDF file")
+            markdown_output = await self._run_convert(path, page_range, pipeline_key)
+            publish(markdown_output)
+            return {"data": markdown_output, "tier": DOCLING}
+
+        # ================================
+        # Page segments, in order
+        # ================================
+        # Each segment is published as soon as it is ready (a no-op
+        # unless the engine streams this node).
+        parts = []
+        for segment_tier, first, last in self._segments(plan, batch_pages):
+            if segment_tier == TEXT_LAYER:
+                text = await node_executors.run_blocking(self._read_text_layer, path, first, last)
+            else:
+                text = await self._run_convert(path, (first, last), pipeline_key)
+            parts.append(text)
+            publish(text)
+
+        counts = {TEXT_LAYER: 0, DOCLING: 0}
+        for _, page_tier in plan:
+            counts[page_tier] += 1
+
+        return {
+            "data": "\n\n".join(parts),
+            "pages": [{"page": number, "tier": page_tier} for number, page_tier in plan],
+            "tiers": counts,
+        }
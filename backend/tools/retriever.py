@@ -0,0 +1,95 @@
+# backend/tools/retriever.py
+
+import hashlib
+import time
+
+from agent_base import BaseTool
+from services.bm25 import index_store
+from services.executors import node_executors
+
+
+def _index(text, chunk_chars):
+    """Index of exactly this text and chunk size: (index, source)."""
+    key = hashlib.sha256(f"{chunk_chars}:{text}".encode("utf-8")).hexdigest()
+    return index_store.get_or_build(key, text, chunk_chars)
+
+
+class RetrievalTool(BaseTool):
+    """
+    BM25 retrieval over the parent document.
+    Passes on only the chunks relevant to a query instead of the
+    whole document.
+
+    Config:
+    - query: search text; defaults to the prompts of the downstream
+      nodes (filled in by the engine)
+    - top_k: chunks to return (default 5)
+    - chunk_chars: target chunk size (default 1500)
+    """
+
+    # Engine adds `downstream_prompts` to this node's config
+    reads_downstream_prompts = True
+
+    def __init__(self):
+        super().__init__(
+            name="Retriever",
+            description="Select the document chunks relevant to a query (BM25)",
+            icon="🔎",
+        )
+
+    async def execute(self, node_input, parent_outputs):
+        text = self.get_parent_data(parent_outputs)
+        if not text:
+            return {"success": False, "error": "No document to search", "node_type": "retriever"}
+
+        query = node_input.get("query") or " ".join(
+            prompt for prompt in node_input.get("downstream_prompts", []) if prompt
+        )
+        if not query.strip():
+            return {
+                "success": False,
+                "error": "No query: set `query` or connect a node with a prompt",
+                "node_type": "retriever",
+            }
+
+        top_k = int(node_input.get("top_k", 5))
+        chunk_chars = int(node_input.get("chunk_chars", 1500))
+
+        try:
+            start = time.perf_counter()
+            index, source = await node_executors.run_blocking(_index, text, chunk_chars)
+            index_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            hits = index.search(query, top_k)
+            query_ms = (time.perf_counter() - start) * 1000
+
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Retrieval failed: {str(e)}",
+                "node_type": "retriever",
+            }
+
+        if not hits:
+            return {
+                "success": False,
+                "error": "No chunk matches the query",
+                "node_type": "retriever",
+            }
+
+        # Keep document order so the excerpt reads naturally
+        selected = sorted(hits)
+        return {
+            "success": True,
+            "data": "\n\n---\n\n".join(index.chunks[i] for i, _ in selected),
+            "query": query,
+            "chunks": [{"index": i, "score": round(score, 3)} for i, score in hits],
+            "index": {
+                "chunks": len(index.chunks),
+                "source": source,
+                "index_ms": round(index_ms, 1),
+                "query_ms": round(query_ms, 2),
+            },
+            "node_type": "retriever",
+        }
@@ -1,9 +1,39 @@
+import asyncio
 import json
+import re
+import time
+import zlib
 from agent_base import BaseTool
 from duckduckgo_search import DDGS
+from services.deadlines import deadline_scope, remaining
+from services.document_cache import document_cache
+from services.executors import ASYNC_IO, node_executors
+from services.fetcher import fetcher
+from services.html_text import extract_main_text
+from services.scheduler import tool_scheduler
+
+# Deep mode defaults
+DEEP_PAGES = 4
+DEEP_BUDGET_S = 8.0
+DEEP_CONTEXT_CHARS = 12000
+
+# Pages whose word-shingle overlap reaches this are near-duplicates
+DUPLICATE_JACCARD = 0.8
 
 class WebSearchTool(BaseTool):
-    """Tool for performing India-localized web searches with quality filtering."""
+    """
+    Tool for performing India-localized web searches with quality filtering.
+
+    Deep mode (`deep: true`) also fetches the top `deep_pages` result
+    pages concurrently, extracts their main text, drops near-duplicate
+    pages and appends a ranked context block capped at `context_chars`.
+    The whole deep step is bounded by `deep_budget_s` (and the node
+    deadline); pages not ready in time are left out.
+    """
+
+    # Orchestrates awaits; the blocking search client, HTML extraction
+    # and page ranking run in the I/O pool
+    execution_class = ASYNC_IO
     
     def __init__(self):
         super().__init__(
@@ -30,6 +60,17 @@ class WebSearchTool(BaseTool):
         blocks = " ".join(f"-site:{site}" for site in self.blocked_sites)
         return f"{clean} {blocks}".strip()
     
+    def _search(self, processed_query: str, max_results: int, timeout: int) -> list:
+        # Search with India region
+        with DDGS(timeout=timeout) as ddgs:
+            return list(ddgs.text(
+                processed_query,
+                region=self.region,
+                safesearch="moderate",
+                backend="html",
+                max_results=max_results
+            ))
+
     async def execute(self, node_input, parent_outputs):
         # Get query
         query = (
@@ -45,15 +86,14 @@ class WebSearchTool(BaseTool):
         processed_query = self._clean_query(query)
         
         try:
-            # Search with India region
-            with DDGS() as ddgs:
-                results = list(ddgs.text(
-                    processed_query,
-                    region=self.region,
-                    safesearch="moderate",
-                    backend="html",
-                    max_results=max_results
-                ))
+            # Blocking HTTP client: run off the event loop, bounded by
+            # the node / workflow deadline (threads cannot be killed)
+            budget = remaining()
+            timeout = 10 if budget is None else max(1, int(budget))
+            async with tool_scheduler.slot():
+                results = await node_executors.run_blocking(
+                    self._search, processed_query, max_results, timeout
+                )
             
             # Light filtering - just remove empty snippets
             valid = [r for r in results if r.get("body", "").strip()][:6]
@@ -73,8 +113,13 @@ class WebSearchTool(BaseTool):
                     f"{r.get('body', '')}\n"
                     f"Source: {r.get('href', '')}\n\n"
                 )
-            
-            return {
+
+            deep = None
+            if node_input.get("deep"):
+                deep = await self._deep_search(query, valid, node_input)
+                summary += deep.pop("context")
+
+            output = {
                 "success": True,
                 "data": summary,
                 "json_data": json.dumps({
@@ -89,14 +134,169 @@ class WebSearchTool(BaseTool):
                             "snippet": r.get("body", "")
                         } for i, r in enumerate(valid, 1)
                     ]
-                }, indent=2),
+                }, separators=(",", ":")),
                 "node_type": "web_search",
                 "count": len(valid)
             }
+            if deep is not None:
+                output["deep"] = deep
+            return output
             
         except Exception as e:
             return {
                 "success": False,
                 "error": f"Search failed: {str(e)}",
                 "node_type": "web_search"
-            }
\ No newline at end of file
+            }
+
+    # ================================
+    # Deep mode
+    # ================================
+    async def _deep_search(self, query, results, node_input):
+        """
+        Fetch and extract the top result pages within the time budget.
+        Returns page stats plus the formatted `context` block.
+        """
+        started = time.monotonic()
+        pages = int(node_input.get("deep_pages", DEEP_PAGES))
+        budget = float(node_input.get("deep_budget_s", DEEP_BUDGET_S))
+        context_chars = int(node_input.get("context_chars", DEEP_CONTEXT_CHARS))
+
+        candidates = [r for r in results if r.get("href")][:pages]
+
+        with deadline_scope(budget) as time_left:
+            tasks = {
+                asyncio.ensure_future(self._page_text(r["href"])): rank
+                for rank, r in enumerate(candidates, 1)
+            }
+            done, pending = await asyncio.wait(tasks, timeout=time_left) if tasks else (set(), set())
+            for task in pending:
+                task.cancel()
+
+        texts, failed = {}, 0
+        for task in done:
+            if task.exception() is None and task.result():
+                texts[tasks[task]] = task.result()
+            else:
+                failed += 1
+
+        context, page_stats, duplicates = await node_executors.run_blocking(
+            self._build_context, query, candidates, texts, context_chars
+        )
+
+        return {
+            "context": context if page_stats else "",
+            "pages": page_stats,
+            "fetched": len(texts),
+            "failed": failed,
+            "timed_out": len(pending),
+            "duplicates": duplicates,
+            "elapsed_ms": round((time.monotonic() - started) * 1000, 1),
+        }
+
+    def _build_context(self, query, candidates, texts, context_chars):
+        """
+        Deduplicated, ranked context block from page texts (rank ->
+        text). Returns (context, page stats, duplicates dropped).
+        """
+        # ================================
+        # Near-duplicate removal (rank order wins)
+        # ================================
+        kept, duplicates, seen = [], 0, []
+        for rank in sorted(texts):
+            shingles = self._shingles(texts[rank])
+            if any(self._jaccard(shingles, other) >= DUPLICATE_JACCARD for other in seen):
+                duplicates += 1
+                continue
+            seen.append(shingles)
+            kept.append(rank)
+
+        # ================================
+        # Ranked, budgeted context
+        # ================================
+        terms = {w for w in re.findall(r"\w+", query.lower()) if len(w) > 2}
+        scored = sorted(
+            kept,
+            key=lambda rank: self._relevance(texts[rank], terms) + 1.0 / rank,
+            reverse=True,
+        )
+
+        context = "### Page content\n\n"
+        page_stats = []
+        left = context_chars
+        for position, rank in enumerate(scored):
+            share = left // (len(scored) - position)
+            excerpt = self._excerpt(texts[rank], terms, share)
+            left -= len(excerpt)
+            result = candidates[rank - 1]
+            context += (
+                f"**[{rank}] {result.get('title', 'No title')}**\n"
+                f"{excerpt}\n"
+                f"Source: {result['href']}\n\n"
+            )
+            page_stats.append({"rank": rank, "url": result["href"], "chars": len(excerpt)})
+
+        return context, page_stats, duplicates
+
+    async def _page_text(self, url):
+        """Main text of an HTML page; cached by content hash."""
+        fetched = await fetcher.fetch(url)
+        if not fetched.content_type.startswith(("text/html", "text/plain")):
+            return ""
+
+        cache_key = document_cache.key(fetched.content_hash, {"extractor": "html_text"})
+        cached = await document_cache.get(cache_key)
+        if cached is not None:
+            return cached["data"]
+
+        def extract():
+            raw = fetched.path.read_bytes().decode("utf-8", errors="replace")
+            if fetched.content_type.startswith("text/plain"):
+                return raw
+            return extract_main_text(raw)
+
+        text = await node_executors.run_blocking(extract)
+        await document_cache.put(cache_key, {"data": text})
+        return text
+
+    @staticmethod
+    def _shingles(text, size=5):
+        words = re.findall(r"\w+", text.lower())
+        return {
+            zlib.crc32(" ".join(words[i:i + size]).encode())
+            for i in range(max(1, len(words) - size + 1))
+        }
+
+    @staticmethod
+    def _jaccard(a, b):
+        if not a or not b:
+            return 0.0
+        return len(a & b) / len(a | b)
+
+    @staticmethod
+    def _relevance(text, terms):
+        """Share of query terms that appear in the page."""
+        if not terms:
+            return 0.0
+        lowered = text.lower()
+        return sum(term in lowered for term in terms) / len(terms)
+
+    @staticmethod
+    def _excerpt(text, terms, limit):
+        """
+        Paragraphs mentioning query terms first (kept in page order),
+        then the rest, up to `limit` characters.
+        """
+        paragraphs = [p for p in text.split("\n") if p.strip()]
+        matching = [i for i, p in enumerate(paragraphs) if any(t in p.lower() for t in terms)]
+        is_matching = set(matching)
+        rest = [i for i in range(len(paragraphs)) if i not in is_matching]
+        chosen, size = set(), 0
+        for i in matching + rest:
+            if size + len(paragraphs[i]) > limit:
+                continue
+            chosen.add(i)
+            size += len(paragraphs[i]) + 1
+        if not chosen and paragraphs:
+            return paragraphs[0][:limit]
+        return "\n".join(paragraphs[i] for i in sorted(chosen))